@@ -0,0 +1,156 @@
+"""
+Benchmark compressed text columns in the SQLite database.
+
+Fills a database with synthetic chunks and conversations stored
+uncompressed, measures its size and read latency, migrates a copy with
+compress_database() and measures again.
+
+Usage:
+    python -m benchmarks.bench_db_compression --chunks 100000 --codec zlib
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from src.database import crud
+from src.database.compression import compress_database, default_codec
+from src.database.init_db import get_session
+
+# Words drawn with a Zipf-like skew so the text compresses like prose, not filler
+_WORDS = (
+    "the of and to in is that for it as with was on be by this are from or have an "
+    "which not but at data model system document page value result section table "
+    "figure method process user request response error time number report analysis "
+    "契約 条項 本書 甲 乙 期間 支払 通知 責任 損害 解除 変更 規定 対象 範囲 場合 条件 "
+    "revenue quarter growth cost margin customer product market risk policy"
+).split()
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    """Prose-like text of roughly the given number of words."""
+    weights = [1.0 / (rank + 1) for rank in range(len(_WORDS))]
+    tokens = rng.choices(_WORDS, weights=weights, k=words)
+    for i in range(0, len(tokens), 12):
+        tokens[i] = f"{tokens[i]} {rng.randint(1, 99999)}"
+    return " ".join(tokens)
+
+
+def build_database(db_path: str, chunks: int, conversations: int, chunks_per_document: int = 200):
+    """Write chunks and conversations without compression."""
+    rng = random.Random(0)
+    os.environ["DB_COMPRESSION"] = "none"
+    db = get_session(db_path)
+    try:
+        for begin in range(0, chunks, chunks_per_document):
+            document = crud.create_document(db, f"doc-{begin}.pdf", f"/data/doc-{begin}.pdf", "pdf")
+            count = min(chunks_per_document, chunks - begin)
+            crud.replace_document_chunks(db, document.id, [
+                {
+                    "chunk_index": i,
+                    "content": synthetic_text(rng, 180),
+                    "content_hash": f"{begin + i:064x}",
+                    "vector_id": f"chunk-{begin + i}",
+                }
+                for i in range(count)
+            ])
+
+        crud.create_conversations(db, [
+            {
+                "session_id": f"session-{i % 100}",
+                "user_message": synthetic_text(rng, 15),
+                "assistant_message": synthetic_text(rng, 150),
+            }
+            for i in range(conversations)
+        ])
+    finally:
+        db.close()
+
+
+def measure_reads(db_path: str, chunks: int, iterations: int) -> Dict[str, float]:
+    """Median milliseconds of the reads the UI makes."""
+    rng = random.Random(1)
+    source_reads: List[float] = []
+    history_reads: List[float] = []
+    db = get_session(db_path)
+    try:
+        for i in range(iterations):
+            ids = [f"chunk-{rng.randrange(chunks)}" for _ in range(4)]
+            start = time.perf_counter()
+            texts = [c.content for c in crud.get_chunks_by_vector_ids(db, ids).values()]
+            source_reads.append(time.perf_counter() - start)
+            assert texts
+
+            start = time.perf_counter()
+            page = crud.get_conversations_page(db, f"session-{i % 100}", limit=10)
+            _ = [(c.user_message, c.assistant_message) for c in page]
+            history_reads.append(time.perf_counter() - start)
+            db.expire_all()
+    finally:
+        db.close()
+
+    return {
+        "source_read_ms": round(statistics.median(source_reads) * 1000, 3),
+        "history_page_ms": round(statistics.median(history_reads) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--conversations", type=int, default=20_000)
+    parser.add_argument("--codec", choices=["zlib", "zstd"], default=None, help="Default: DB_COMPRESSION")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: temp dir)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    codec = args.codec or default_codec()
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="doc-sage-dbcompress-"))
+    plain_path = str(workdir / "plain.db")
+    compressed_path = str(workdir / "compressed.db")
+
+    try:
+        start = time.perf_counter()
+        build_database(plain_path, args.chunks, args.conversations)
+        build_seconds = time.perf_counter() - start
+        shutil.copyfile(plain_path, compressed_path)
+
+        start = time.perf_counter()
+        migration = compress_database(compressed_path, codec=codec)
+        migrate_seconds = time.perf_counter() - start
+
+        before = measure_reads(plain_path, args.chunks, args.iterations)
+        after = measure_reads(compressed_path, args.chunks, args.iterations)
+
+        results = {
+            "chunks": args.chunks,
+            "conversations": args.conversations,
+            "codec": codec,
+            "build_seconds": round(build_seconds, 2),
+            "migrate_seconds": round(migrate_seconds, 2),
+            "rows_rewritten": migration["rewritten"],
+            "bytes_before": os.path.getsize(plain_path),
+            "bytes_after": os.path.getsize(compressed_path),
+            "size_ratio": round(os.path.getsize(compressed_path) / os.path.getsize(plain_path), 3),
+            "before": before,
+            "after": after,
+        }
+        print(json.dumps(results, indent=2))
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Measure import-time cost of application modules with ``python -X importtime``.
+
+Each module is imported in a fresh interpreter; the report lists the
+cumulative import time of the module itself and the heaviest dependencies
+it pulled in.
+
+Usage:
+    python -m benchmarks.bench_import_time src.ui.app src.config --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class ImportRecord:
+    """One line of ``-X importtime`` output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """
+    Parse the stderr produced by ``python -X importtime``.
+
+    Args:
+        output: Raw stderr text
+
+    Returns:
+        Import records in the order they were reported
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line ("self [us] | cumulative | imported package")
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2
+            )
+        )
+    return records
+
+
+def measure_import(module: str, python: str = sys.executable) -> List[ImportRecord]:
+    """
+    Import a module in a fresh interpreter and collect its import timings.
+
+    Args:
+        module: Dotted module name
+        python: Interpreter to run
+
+    Returns:
+        Import records
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        errors = [l for l in result.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(errors[-10:]))
+    return parse_importtime(result.stderr)
+
+
+def summarize(module: str, records: List[ImportRecord], top: int = 10) -> Dict:
+    """
+    Summarize import records for one module.
+
+    Args:
+        module: Module that was imported
+        records: Records from measure_import
+        top: Number of heaviest top-level packages to list
+
+    Returns:
+        Dictionary with total time and the heaviest packages
+    """
+    total_us = next(
+        (r.cumulative_us for r in reversed(records) if r.module == module),
+        sum(r.self_us for r in records)
+    )
+    packages: Dict[str, int] = {}
+    for record in records:
+        root = record.module.split(".")[0]
+        packages[root] = packages.get(root, 0) + record.self_us
+
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(records),
+        "heaviest_packages_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=["src.config", "src.ui.app"])
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [
+        summarize(module, measure_import(module), top=args.top)
+        for module in args.modules
+    ]
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Ingestion throughput benchmark with offline fakes.
+
+Generates synthetic Japanese and English PDFs, runs the ingestion pipeline
+(PDFDocumentLoader load and split, then VectorStoreManager.create_vectorstore)
+against a deterministic hash-based embeddings model and a scratch Chroma
+directory, and reports pages/sec, chunks/sec, peak RSS and per-stage time.
+Each case runs in a fresh process so peak RSS is attributable to it.
+
+Results are saved as JSON so runs can be compared across commits:
+
+    python -m benchmarks.bench_ingest --pages 10 200 2000 --output before.json
+    python -m benchmarks.bench_ingest --pages 10 200 2000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_case(language: str, pages: int, dimension: int) -> Dict:
+    """Generate one PDF and ingest it, returning throughput and stage timings."""
+    from src.loaders.pdf_loader import PDFDocumentLoader
+    from src.processing.vectorstore import VectorStoreManager
+    from .fakes import HashEmbeddings
+    from .pdfgen import generate_pdf
+
+    with tempfile.TemporaryDirectory(prefix="doc-sage-ingest-") as workdir:
+        pdf_path = Path(workdir) / f"{language}-{pages}.pdf"
+        generate_pdf(pdf_path, pages, language)
+
+        embeddings = HashEmbeddings(dimension=dimension)
+        loader = PDFDocumentLoader()
+        manager = VectorStoreManager(
+            persist_directory=str(Path(workdir) / "chroma"),
+            embeddings=embeddings
+        )
+
+        stages = {}
+        start = time.perf_counter()
+        documents = loader.load(str(pdf_path))
+        stages["load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chunks = loader.text_splitter.split_documents(documents)
+        stages["split"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        manager.create_vectorstore(chunks)
+        store_seconds = time.perf_counter() - start
+        stages["embed"] = embeddings.seconds
+        stages["vector_write"] = store_seconds - embeddings.seconds
+
+    total = sum(stages.values())
+    return {
+        "language": language,
+        "pages": len(documents),
+        "chunks": len(chunks),
+        "seconds": round(total, 3),
+        "pages_per_sec": round(len(documents) / total, 1),
+        "chunks_per_sec": round(len(chunks) / total, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_seconds": {name: round(value, 3) for name, value in stages.items()},
+    }
+
+
+def git_commit() -> str:
+    """Current commit hash, or 'unknown' outside a git checkout."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True
+    )
+    return result.stdout.strip() or "unknown"
+
+
+def compare(previous: Dict, current: Dict) -> List[str]:
+    """Describe the throughput change of each case present in both runs."""
+    before = {(c["language"], c["pages"]): c for c in previous["cases"]}
+    lines = []
+    for case in current["cases"]:
+        old = before.get((case["language"], case["pages"]))
+        if old is None:
+            continue
+        change = (case["chunks_per_sec"] / old["chunks_per_sec"] - 1) * 100
+        lines.append(
+            f"{case['language']} {case['pages']:>5} pages: "
+            f"{old['chunks_per_sec']:>9.1f} -> {case['chunks_per_sec']:>9.1f} chunks/s ({change:+.1f}%), "
+            f"peak RSS {old['peak_rss_mb']:.0f} -> {case['peak_rss_mb']:.0f} MB"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 200, 2000])
+    parser.add_argument("--languages", nargs="+", choices=["ja", "en"], default=["ja", "en"])
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    cases = []
+    for language in args.languages:
+        for pages in args.pages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                case = pool.submit(run_case, language, pages, args.dimension).result()
+            cases.append(case)
+            print(json.dumps(case), flush=True)
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "dimension": args.dimension,
+        "cases": cases,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\nCompared with {previous.get('commit', 'unknown')}:")
+        print("\n".join(compare(previous, results)))
+
+
+if __name__ == "__main__":
+    main()
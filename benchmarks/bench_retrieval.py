@@ -0,0 +1,332 @@
+"""
+Retrieval latency and recall benchmark harness.
+
+Builds a synthetic corpus of clustered unit vectors, loads it into one or
+more retrieval backends and fires a query workload at each. Reports
+p50/p95/p99 latency, QPS under concurrent threads and recall@k against
+exact brute-force ground truth.
+
+Backends are pluggable: pass any registered name or a ``module:Class``
+path to a RetrievalBackend subclass.
+
+Usage:
+    python -m benchmarks.bench_retrieval --chunks 100000 --k 4 \\
+        --backend numpy --backend manager --backend retriever \\
+        --backend manager:layout=per-document --scoped --threads 1 8
+"""
+import argparse
+import importlib
+import json
+import logging
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+
+
+@dataclass
+class Corpus:
+    """Synthetic chunk vectors with their document assignment."""
+
+    vectors: np.ndarray
+    document_ids: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.vectors)
+
+
+@dataclass
+class Query:
+    """A query vector, its embedding lookup text and optional document scope."""
+
+    text: str
+    vector: np.ndarray
+    document_id: Optional[int] = None
+
+
+def build_corpus(chunks: int, dimension: int, documents: int, clusters: int = 256, seed: int = 0) -> Corpus:
+    """Clustered unit vectors, which resemble real embeddings better than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignment = rng.integers(0, clusters, chunks)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((chunks, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    document_ids = np.sort(rng.integers(1, documents + 1, chunks))
+    return Corpus(vectors=vectors, document_ids=document_ids)
+
+
+def build_queries(corpus: Corpus, count: int, scoped: bool, seed: int = 1) -> List[Query]:
+    """Queries near random corpus vectors, optionally scoped to that vector's document."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, corpus.size, count)
+    noise = 0.3 * rng.standard_normal((count, corpus.vectors.shape[1])).astype(np.float32)
+    vectors = corpus.vectors[picks] + noise
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [
+        Query(
+            text=f"query-{i}",
+            vector=vectors[i],
+            document_id=int(corpus.document_ids[picks[i]]) if scoped else None
+        )
+        for i in range(count)
+    ]
+
+
+def ground_truth(corpus: Corpus, queries: List[Query], k: int) -> List[List[int]]:
+    """Exact top-k chunk indices by cosine similarity."""
+    results = []
+    for query in queries:
+        candidates = np.arange(corpus.size)
+        if query.document_id is not None:
+            candidates = np.flatnonzero(corpus.document_ids == query.document_id)
+        scores = corpus.vectors[candidates] @ query.vector
+        top = np.argsort(-scores)[:k]
+        results.append(candidates[top].tolist())
+    return results
+
+
+class RetrievalBackend:
+    """Interface for a retrieval backend under test."""
+
+    name = "base"
+
+    def __init__(self, **options):
+        self.options = options
+
+    def build(self, corpus: Corpus, queries: List[Query]):
+        """Index the corpus. Queries are given so embedding lookups can be prepared."""
+        raise NotImplementedError
+
+    def search(self, query: Query, k: int) -> List[int]:
+        """Return the chunk indices of the top-k results."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources."""
+
+
+class NumpyBackend(RetrievalBackend):
+    """Exact in-memory search; the lower bound for latency at full recall."""
+
+    name = "numpy"
+
+    def build(self, corpus: Corpus, queries: List[Query]):
+        self.corpus = corpus
+
+    def search(self, query: Query, k: int) -> List[int]:
+        candidates = None
+        vectors = self.corpus.vectors
+        if query.document_id is not None:
+            candidates = np.flatnonzero(self.corpus.document_ids == query.document_id)
+            vectors = vectors[candidates]
+        scores = vectors @ query.vector
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+        return (candidates[top] if candidates is not None else top).tolist()
+
+
+class VectorStoreBackend(RetrievalBackend):
+    """
+    VectorStoreManager.similarity_search over Chroma.
+
+    Options:
+        layout: 'single' (one collection, document scope via metadata filter)
+            or 'per-document' (one collection per document)
+    """
+
+    name = "manager"
+
+    def build(self, corpus: Corpus, queries: List[Query]):
+        from src.processing.vectorstore import VectorStoreManager
+        from .fakes import LookupEmbeddings
+
+        self.layout = self.options.get("layout", "single")
+        self.workdir = Path(tempfile.mkdtemp(prefix="doc-sage-retrieval-"))
+        self.embeddings = LookupEmbeddings(
+            {q.text: q.vector.tolist() for q in queries},
+            dimension=corpus.vectors.shape[1]
+        )
+
+        groups = {"documents": np.arange(corpus.size)}
+        if self.layout == "per-document":
+            groups = {
+                f"documents_{document_id}": np.flatnonzero(corpus.document_ids == document_id)
+                for document_id in np.unique(corpus.document_ids)
+            }
+
+        self.stores = {}
+        for collection_name, indices in groups.items():
+            manager = VectorStoreManager(
+                persist_directory=str(self.workdir),
+                collection_name=collection_name,
+                embeddings=self.embeddings
+            )
+            vectorstore = manager.get_vectorstore()
+            batch_size = manager._max_batch_size(vectorstore)
+            for begin in range(0, len(indices), batch_size):
+                batch = indices[begin:begin + batch_size]
+                vectorstore._collection.add(
+                    ids=[str(i) for i in batch],
+                    embeddings=corpus.vectors[batch].tolist(),
+                    documents=[f"chunk {i}" for i in batch],
+                    metadatas=[
+                        {"chunk_index": int(i), "document_id": int(corpus.document_ids[i])}
+                        for i in batch
+                    ]
+                )
+            self.stores[collection_name] = (manager, vectorstore)
+
+    def _store(self, query: Query):
+        if self.layout == "per-document" and query.document_id is not None:
+            return self.stores[f"documents_{query.document_id}"], None
+        scope = {"document_id": query.document_id} if query.document_id is not None else None
+        return self.stores["documents"], scope
+
+    def search(self, query: Query, k: int) -> List[int]:
+        if self.layout == "per-document" and query.document_id is None:
+            return self._search_all(query, k)
+        (manager, vectorstore), scope = self._store(query)
+        results = manager.similarity_search(query.text, k=k, vectorstore=vectorstore, filter=scope)
+        return [doc.metadata["chunk_index"] for doc in results]
+
+    def _search_all(self, query: Query, k: int) -> List[int]:
+        """Fan out over every per-document collection and merge by distance."""
+        scored = []
+        for _, vectorstore in self.stores.values():
+            scored.extend(vectorstore.similarity_search_with_score(query.text, k=k))
+        scored.sort(key=lambda item: item[1])
+        return [doc.metadata["chunk_index"] for doc, _ in scored[:k]]
+
+    def close(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class RetrieverBackend(VectorStoreBackend):
+    """The retriever QAChainManager builds with vectorstore.as_retriever()."""
+
+    name = "retriever"
+
+    def search(self, query: Query, k: int) -> List[int]:
+        (_, vectorstore), scope = self._store(query)
+        search_kwargs = {"k": k}
+        if scope:
+            search_kwargs["filter"] = scope
+        retriever = vectorstore.as_retriever(search_kwargs=search_kwargs)
+        return [doc.metadata["chunk_index"] for doc in retriever.get_relevant_documents(query.text)]
+
+
+BACKENDS: Dict[str, Type[RetrievalBackend]] = {
+    backend.name: backend for backend in (NumpyBackend, VectorStoreBackend, RetrieverBackend)
+}
+
+
+def load_backend(spec: str) -> RetrievalBackend:
+    """
+    Create a backend from 'name[:key=value,...]' or 'module:Class[:key=value,...]'.
+
+    Args:
+        spec: Backend specification
+
+    Returns:
+        Backend instance
+    """
+    parts = spec.split(":")
+    if parts[0] in BACKENDS:
+        backend_class, option_parts = BACKENDS[parts[0]], parts[1:]
+    else:
+        module = importlib.import_module(parts[0])
+        backend_class, option_parts = getattr(module, parts[1]), parts[2:]
+
+    options = {}
+    for part in option_parts:
+        for pair in filter(None, part.split(",")):
+            key, _, value = pair.partition("=")
+            options[key] = value
+    return backend_class(**options)
+
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)) * 1000, 3)
+
+
+def measure(backend: RetrievalBackend, queries: List[Query], truth: List[List[int]], k: int, threads: List[int]) -> Dict:
+    """Latency, recall and concurrent throughput of one backend."""
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = backend.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found) & set(expected))
+
+    result = {
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        f"recall@{k}": round(hits / sum(len(t) for t in truth), 4),
+        "qps": {},
+    }
+
+    for count in threads:
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda q: backend.search(q, k), queries))
+            elapsed = time.perf_counter() - start
+        result["qps"][str(count)] = round(len(queries) / elapsed, 1)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, nargs="+", default=[4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--scoped", action="store_true", help="Restrict each query to one document")
+    parser.add_argument("--backend", action="append", dest="backends", help="Backend spec (repeatable)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    corpus = build_corpus(args.chunks, args.dimension, args.documents)
+    queries = build_queries(corpus, args.queries, args.scoped)
+
+    results = []
+    for spec in args.backends or ["numpy", "manager"]:
+        backend = load_backend(spec)
+        try:
+            start = time.perf_counter()
+            backend.build(corpus, queries)
+            build_seconds = time.perf_counter() - start
+
+            for k in args.k:
+                truth = ground_truth(corpus, queries, k)
+                case = {
+                    "backend": spec,
+                    "chunks": corpus.size,
+                    "k": k,
+                    "scoped": args.scoped,
+                    "build_seconds": round(build_seconds, 2),
+                    **measure(backend, queries, truth, k, args.threads),
+                }
+                results.append(case)
+                print(json.dumps(case), flush=True)
+        finally:
+            backend.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark snapshot export and import of the vector store.
+
+Builds a synthetic snapshot (random unit vectors and filler text), imports it
+into a fresh Chroma collection, exports it again and reports the timings.
+
+Usage:
+    python -m benchmarks.bench_snapshot --chunks 1000000 --dimension 1536
+"""
+import argparse
+import gzip
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.processing.vectorstore import (
+    VectorStoreManager,
+    SNAPSHOT_FORMAT,
+    SNAPSHOT_VERSION,
+    SNAPSHOT_MANIFEST_FILE,
+    SNAPSHOT_EMBEDDINGS_FILE,
+    SNAPSHOT_CHUNKS_FILE,
+)
+from .fakes import HashEmbeddings
+
+
+def write_synthetic_snapshot(
+    snapshot_dir: Path,
+    chunks: int,
+    dimension: int,
+    chunks_per_document: int = 500
+):
+    """Write a snapshot of random vectors without touching Chroma."""
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+
+    matrix = np.lib.format.open_memmap(
+        snapshot_dir / SNAPSHOT_EMBEDDINGS_FILE,
+        mode="w+",
+        dtype=np.float32,
+        shape=(chunks, dimension)
+    )
+    for begin in range(0, chunks, 50000):
+        end = min(begin + 50000, chunks)
+        block = rng.standard_normal((end - begin, dimension)).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        matrix[begin:end] = block
+    matrix.flush()
+    del matrix
+
+    document_ids = [i // chunks_per_document + 1 for i in range(chunks)]
+    columns = {
+        "ids": [f"chunk-{i}" for i in range(chunks)],
+        "document_ids": document_ids,
+        "texts": [f"Synthetic chunk {i} " + "lorem ipsum " * 80 for i in range(chunks)],
+        "metadatas": [
+            {"source": f"doc-{d}.pdf", "page": i % 50, "document_id": d}
+            for i, d in enumerate(document_ids)
+        ],
+    }
+    with gzip.open(snapshot_dir / SNAPSHOT_CHUNKS_FILE, "wt", encoding="utf-8") as f:
+        json.dump(columns, f)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "collection_name": "documents",
+        "count": chunks,
+        "dimension": dimension,
+        "dtype": "float32",
+    }
+    with open(snapshot_dir / SNAPSHOT_MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def directory_size(path: Path) -> int:
+    """Total size of all files under a directory in bytes."""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: temp dir)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="doc-sage-snapshot-"))
+    source_dir = workdir / "source"
+    export_dir = workdir / "export"
+    chroma_dir = workdir / "chroma"
+
+    try:
+        write_synthetic_snapshot(source_dir, args.chunks, args.dimension)
+
+        manager = VectorStoreManager(
+            persist_directory=str(chroma_dir),
+            embeddings=HashEmbeddings(dimension=args.dimension)
+        )
+
+        start = time.perf_counter()
+        imported = manager.import_snapshot(str(source_dir))
+        import_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        manifest = manager.export_snapshot(str(export_dir))
+        export_seconds = time.perf_counter() - start
+
+        results = {
+            "chunks": imported,
+            "dimension": args.dimension,
+            "import_seconds": round(import_seconds, 3),
+            "import_chunks_per_sec": round(imported / import_seconds, 1),
+            "export_seconds": round(export_seconds, 3),
+            "export_chunks_per_sec": round(manifest["count"] / export_seconds, 1),
+            "snapshot_bytes": directory_size(export_dir),
+            "chroma_bytes": directory_size(chroma_dir),
+        }
+        print(json.dumps(results, indent=2))
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
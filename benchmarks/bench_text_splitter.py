@@ -0,0 +1,79 @@
+"""
+Compare text splitter throughput on large Japanese and English corpora.
+
+Generates page-sized synthetic text, splits it with the current
+RecursiveCharacterTextSplitter and with ApproxTokenTextSplitter, and reports
+MB/s (UTF-8 input bytes) and chunk statistics for each.
+
+Usage:
+    python -m benchmarks.bench_text_splitter --megabytes 50
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from langchain.schema import Document
+
+from src.processing.text_splitter import get_text_splitter
+from .pdfgen import JAPANESE_SENTENCES, ENGLISH_SENTENCES
+
+
+def generate_pages(sentences: List[str], megabytes: float, page_bytes: int = 3000) -> List[Document]:
+    """Generate pages of random sentences totalling roughly the given size."""
+    rng = random.Random(0)
+    pages, total = [], 0
+    while total < megabytes * 1024 * 1024:
+        parts, size = [], 0
+        while size < page_bytes:
+            sentence = rng.choice(sentences)
+            parts.append(sentence + ("\n\n" if rng.random() < 0.1 else "\n" if rng.random() < 0.3 else " "))
+            size += len(sentence.encode("utf-8"))
+        text = "".join(parts)
+        pages.append(Document(page_content=text, metadata={"page": len(pages)}))
+        total += len(text.encode("utf-8"))
+    return pages
+
+
+def run(splitter, pages: List[Document]) -> Dict:
+    """Split pages and measure throughput."""
+    size = sum(len(p.page_content.encode("utf-8")) for p in pages)
+    start = time.perf_counter()
+    chunks = splitter.split_documents(pages)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "mb_per_sec": round(size / 1024 / 1024 / elapsed, 2),
+        "chunks": len(chunks),
+        "avg_chunk_chars": round(sum(len(c.page_content) for c in chunks) / max(len(chunks), 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=float, default=50)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    corpora = {
+        "japanese": generate_pages(JAPANESE_SENTENCES, args.megabytes),
+        "english": generate_pages(ENGLISH_SENTENCES, args.megabytes),
+    }
+
+    results = {}
+    for corpus, pages in corpora.items():
+        results[corpus] = {
+            "recursive": run(get_text_splitter(splitter="recursive"), pages),
+            "token": run(get_text_splitter(splitter="token"), pages),
+        }
+
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
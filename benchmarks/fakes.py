@@ -0,0 +1,62 @@
+"""Offline stand-ins used by the benchmarks."""
+import time
+from typing import Dict, List
+
+from langchain.schema.embeddings import Embeddings
+
+from .openai_stub import hash_vector
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic embeddings derived from a hash of the text."""
+
+    def __init__(self, dimension: int = 1536, model: str = "hash-embedding"):
+        """
+        Initialize hash embeddings.
+
+        Args:
+            dimension: Vector dimension
+            model: Model name reported in snapshots and metrics
+        """
+        self.dimension = dimension
+        self.model = model
+        self.calls = 0
+        self.texts_embedded = 0
+        self.seconds = 0.0
+
+    def _embed(self, text: str) -> List[float]:
+        return hash_vector(text, self.dimension).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents."""
+        start = time.perf_counter()
+        vectors = [self._embed(text) for text in texts]
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query."""
+        self.calls += 1
+        self.texts_embedded += 1
+        return self._embed(text)
+
+
+class LookupEmbeddings(HashEmbeddings):
+    """Returns preset vectors for known texts and hash vectors otherwise."""
+
+    def __init__(self, table: Dict[str, List[float]], dimension: int = 1536):
+        """
+        Initialize lookup embeddings.
+
+        Args:
+            table: Text -> vector
+            dimension: Vector dimension for texts not in the table
+        """
+        super().__init__(dimension=dimension)
+        self.table = table
+
+    def _embed(self, text: str) -> List[float]:
+        vector = self.table.get(text)
+        return vector if vector is not None else super()._embed(text)
@@ -0,0 +1,410 @@
+"""
+Local OpenAI-compatible stand-in server for load and latency testing.
+
+Implements POST /v1/embeddings and POST /v1/chat/completions (including
+``stream: true``) with deterministic hash-derived vectors and canned
+answers. Latency distributions, 500 and 429 injection, and request,
+token and concurrency limits are configurable, so the application can be
+load-tested end to end without network access or an API key.
+
+Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub
+
+Usage:
+    python -m benchmarks.openai_stub --port 8100 \\
+        --embedding-latency lognormal:80:0.4 --chat-latency uniform:300:900 \\
+        --error-rate 0.01 --rate-limit-rate 0.02 --max-rps 50 --max-concurrency 16
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ANSWER = "これはスタブサーバーの回答です。質問: {question}"
+
+
+def hash_vector(text: str, dimension: int) -> np.ndarray:
+    """Deterministic unit vector derived from a hash of the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector
+
+
+class LatencyModel:
+    """
+    Latency distribution in milliseconds.
+
+    Specs: 'fixed:MS', 'uniform:LOW:HIGH', 'normal:MEAN:STDDEV' or
+    'lognormal:MEDIAN:SIGMA'.
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *params = spec.split(":")
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self._rng = random.Random(spec)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Draw one latency in seconds."""
+        with self._lock:
+            if self.kind == "fixed":
+                ms = self.params[0]
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(*self.params)
+            elif self.kind == "normal":
+                ms = self._rng.gauss(*self.params)
+            else:
+                ms = self.params[0] * self._rng.lognormvariate(0.0, self.params[1])
+        return max(ms, 0.0) / 1000
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """Take tokens if available; never blocks."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < amount:
+                return False
+            self.tokens -= amount
+            return True
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stand-in server."""
+
+    dimension: int = 1536
+    answer: str = DEFAULT_ANSWER
+    embedding_latency: str = "fixed:0"
+    chat_latency: str = "fixed:0"
+    stream_chunk_chars: int = 8
+    stream_chunk_delay_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    max_rps: float = 0.0
+    max_tokens_per_minute: float = 0.0
+    max_concurrency: int = 0
+    seed: int = 0
+
+
+@dataclass
+class StubStats:
+    """Request counters, served on GET /stats."""
+
+    requests: Dict[str, int] = field(default_factory=dict)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    texts_embedded: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+def _count_tokens(item: Union[str, List[int]]) -> int:
+    # Token id lists are exact; text is estimated at 4 characters per token
+    return len(item) if isinstance(item, list) else max(1, len(item) // 4)
+
+
+class OpenAIStubServer:
+    """Threaded HTTP server emulating the OpenAI embeddings and chat APIs."""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the stand-in server.
+
+        Args:
+            config: Server behaviour (default: no latency, errors or limits)
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self.embedding_latency = LatencyModel(self.config.embedding_latency)
+        self.chat_latency = LatencyModel(self.config.chat_latency)
+        self.request_bucket = TokenBucket(self.config.max_rps) if self.config.max_rps else None
+        self.token_bucket = (
+            TokenBucket(self.config.max_tokens_per_minute / 60, self.config.max_tokens_per_minute)
+            if self.config.max_tokens_per_minute else None
+        )
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as OPENAI_BASE_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "OpenAIStubServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="openai-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread."""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _count(self, bucket: Dict[str, int], key: str):
+        with self._lock:
+            bucket[key] = bucket.get(key, 0) + 1
+
+    def _admit(self, tokens: int) -> Optional[tuple]:
+        """Return (status, message) if the request must be rejected."""
+        config = self.config
+        with self._lock:
+            roll = self._rng.random()
+        if roll < config.rate_limit_rate:
+            return 429, "Injected rate limit"
+        if roll < config.rate_limit_rate + config.error_rate:
+            return 500, "Injected server error"
+        if self.request_bucket is not None and not self.request_bucket.try_acquire():
+            return 429, "Rate limit reached for requests"
+        if self.token_bucket is not None and not self.token_bucket.try_acquire(tokens):
+            return 429, "Rate limit reached for tokens"
+        return None
+
+    def embed(self, body: Dict) -> Dict:
+        inputs = body.get("input", [])
+        # A single string or a single token id list is one input
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+
+        dimension = int(body.get("dimensions") or self.config.dimension)
+        data = []
+        for index, item in enumerate(inputs):
+            key = item if isinstance(item, str) else json.dumps(item)
+            vector = hash_vector(key, dimension)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        with self._lock:
+            self.stats.texts_embedded += len(inputs)
+
+        tokens = sum(_count_tokens(item) for item in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def answer(self, body: Dict) -> str:
+        question = ""
+        for message in reversed(body.get("messages", [])):
+            if message.get("role") == "user":
+                content = message.get("content") or ""
+                question = content.strip().splitlines()[-1] if content.strip() else ""
+                break
+        return self.config.answer.format(question=question[:80])
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("openai-stub: " + format % args)
+
+            def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._count(server.stats.statuses, str(status))
+
+            def _send_error(self, status: int, message: str):
+                error_type = "rate_limit_error" if status == 429 else "server_error"
+                headers = {"Retry-After": "1"} if status == 429 else None
+                self._send_json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    with server._lock:
+                        payload = json.loads(json.dumps(server.stats.__dict__))
+                    self._send_json(200, payload)
+                elif self.path.rstrip("/") == "/v1/models":
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send_error(404, f"Unknown path: {self.path}")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                path = self.path.split("?")[0].rstrip("/")
+                server._count(server.stats.requests, path)
+
+                with server._lock:
+                    server.stats.in_flight += 1
+                    in_flight = server.stats.in_flight
+                    server.stats.max_in_flight = max(server.stats.max_in_flight, in_flight)
+                try:
+                    if server.config.max_concurrency and in_flight > server.config.max_concurrency:
+                        self._send_error(429, "Too many concurrent requests")
+                    elif path == "/v1/embeddings":
+                        self._embeddings(body)
+                    elif path == "/v1/chat/completions":
+                        self._chat(body)
+                    else:
+                        self._send_error(404, f"Unknown path: {self.path}")
+                finally:
+                    with server._lock:
+                        server.stats.in_flight -= 1
+
+            def _embeddings(self, body: Dict):
+                inputs = body.get("input", [])
+                items = [inputs] if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)) else inputs
+                rejection = server._admit(sum(_count_tokens(item) for item in items))
+                if rejection:
+                    self._send_error(*rejection)
+                    return
+                time.sleep(server.embedding_latency.sample())
+                self._send_json(200, server.embed(body))
+
+            def _chat(self, body: Dict):
+                prompt_tokens = sum(_count_tokens(m.get("content") or "") for m in body.get("messages", []))
+                rejection = server._admit(prompt_tokens + int(body.get("max_tokens") or 0))
+                if rejection:
+                    self._send_error(*rejection)
+                    return
+                time.sleep(server.chat_latency.sample())
+
+                answer = server.answer(body)
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+                model = body.get("model", "stub-chat")
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": _count_tokens(answer),
+                    "total_tokens": prompt_tokens + _count_tokens(answer),
+                }
+
+                if body.get("stream"):
+                    self._stream(answer, completion_id, model)
+                    return
+
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+
+            def _stream(self, answer: str, completion_id: str, model: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def event(delta: Dict, finish_reason: Optional[str] = None):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                step = max(1, server.config.stream_chunk_chars)
+                event({"role": "assistant", "content": ""})
+                for begin in range(0, len(answer), step):
+                    time.sleep(server.config.stream_chunk_delay_ms / 1000)
+                    event({"content": answer[begin:begin + step]})
+                event({}, finish_reason="stop")
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                server._count(server.stats.statuses, "200")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--answer", default=DEFAULT_ANSWER, help="Canned answer; {question} is replaced")
+    parser.add_argument("--embedding-latency", default="fixed:0", help="e.g. fixed:50, uniform:20:80, lognormal:80:0.4")
+    parser.add_argument("--chat-latency", default="fixed:0", help="Latency before the first byte of a chat response")
+    parser.add_argument("--stream-chunk-chars", type=int, default=8)
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Requests per second before 429 (0 = unlimited)")
+    parser.add_argument("--max-tokens-per-minute", type=float, default=0.0, help="0 = unlimited")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="In-flight requests before 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = StubConfig(**{
+        name: getattr(args, name)
+        for name in StubConfig.__dataclass_fields__
+    })
+    server = OpenAIStubServer(config, host=args.host, port=args.port)
+    logger.info(f"OpenAI stand-in listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Served: {json.dumps(server.stats.__dict__)}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
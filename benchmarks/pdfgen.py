@@ -0,0 +1,118 @@
+"""Minimal dependency-free generator for synthetic text PDFs."""
+import random
+from pathlib import Path
+from typing import List
+
+# Built-in CJK font with a predefined UCS-2 CMap: covers Japanese and ASCII
+# without embedding font files, and pypdf extracts the text back as Unicode.
+FONT_NAME = "HeiseiKakuGo-W5"
+FONT_ENCODING = "UniJIS-UCS2-H"
+
+JAPANESE_SENTENCES = [
+    "本システムはPDFドキュメントに対する質問応答を提供します。",
+    "ベクトル検索により関連する段落を高速に取得できます。",
+    "設定値を変更した場合は、再インデックスが必要になることがあります。",
+    "詳細については、付録Aの運用手順を参照してください。",
+    "処理時間はドキュメントのページ数とチャンク数に比例します。",
+]
+
+ENGLISH_SENTENCES = [
+    "The system answers questions about uploaded PDF documents.",
+    "Vector search retrieves the most relevant passages in milliseconds.",
+    "Changing the chunking parameters may require a full re-index.",
+    "See Appendix A for the operating procedures and escalation paths.",
+    "Processing time grows with the number of pages and chunks.",
+]
+
+SENTENCES = {"ja": JAPANESE_SENTENCES, "en": ENGLISH_SENTENCES}
+
+
+def _encode_text(text: str) -> str:
+    return "<" + text.encode("utf-16-be").hex().upper() + ">"
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    parts = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+    for line in lines:
+        parts.append(f"{_encode_text(line)} Tj T*")
+    parts.append("ET")
+    return "\n".join(parts).encode("ascii")
+
+
+def write_pdf(path: Path, pages: List[List[str]]):
+    """
+    Write a PDF with one text line per entry on each page.
+
+    Args:
+        path: Output file
+        pages: Lines of text for each page
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    descendant = add((
+        f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /{FONT_NAME} "
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (Japan1) /Supplement 2 >> "
+        f"/FontDescriptor << /Type /FontDescriptor /FontName /{FONT_NAME} "
+        "/Flags 4 /FontBBox [0 -200 1000 900] /ItalicAngle 0 /Ascent 880 "
+        "/Descent -120 /CapHeight 700 /StemV 80 >> >>"
+    ).encode("ascii"))
+    font = add(
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /{FONT_NAME}-{FONT_ENCODING} "
+        f"/Encoding /{FONT_ENCODING} /DescendantFonts [{descendant} 0 R] >>".encode("ascii")
+    )
+
+    page_ids = []
+    for lines in pages:
+        stream = _page_stream(lines)
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>".encode("ascii")
+        ))
+
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii")
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("ascii")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("ascii")
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("ascii")
+
+    Path(path).write_bytes(bytes(output))
+
+
+def generate_pdf(path: Path, pages: int, language: str = "en", lines_per_page: int = 45, seed: int = 0):
+    """
+    Generate a synthetic PDF of random sentences.
+
+    Args:
+        path: Output file
+        pages: Number of pages
+        language: 'ja' or 'en'
+        lines_per_page: Text lines per page
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    sentences = SENTENCES[language]
+    content = [
+        [f"{page + 1}-{line + 1}. {rng.choice(sentences)}" for line in range(lines_per_page)]
+        for page in range(pages)
+    ]
+    write_pdf(path, content)
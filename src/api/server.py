@@ -0,0 +1,149 @@
+"""Async HTTP API for ingestion and question answering."""
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from ..config import Config
+from ..database.init_db import get_session
+from ..database import crud
+from ..loaders.upload_store import UploadTooLargeError
+from ..observability import metrics
+from ..scheduler import AdmissionTimeoutError
+from .service import DocSageService, ServiceBusyError
+
+logger = logging.getLogger(__name__)
+
+
+class AskRequest(BaseModel):
+    """Body of POST /ask."""
+
+    question: str = Field(..., min_length=1)
+    session_id: str = Field(..., min_length=1)
+    document_id: Optional[int] = None
+    stream: bool = False
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def create_app(service: Optional[DocSageService] = None) -> FastAPI:
+    """
+    Create the FastAPI application.
+
+    Args:
+        service: Service to use (default: a DocSageService created at startup)
+
+    Returns:
+        FastAPI application
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        Config.initialize()
+        Config.validate()
+        metrics.start_exporter()
+        app.state.service = service or DocSageService()
+        yield
+        await app.state.service.close()
+
+    app = FastAPI(title="Doc Sage API", lifespan=lifespan)
+
+    @app.exception_handler(ServiceBusyError)
+    async def busy_handler(request: Request, exc: ServiceBusyError):
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+    @app.exception_handler(AdmissionTimeoutError)
+    async def admission_handler(request: Request, exc: AdmissionTimeoutError):
+        # The LLM API stayed at its rate limit for the whole queue timeout
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/documents", status_code=202)
+    async def upload_document(
+        request: Request,
+        file: UploadFile = File(...),
+        parent_id: Optional[int] = Form(None)
+    ):
+        """
+        Upload a PDF and start ingesting it; poll /jobs/{job_id} for progress.
+
+        With parent_id the PDF is a new version of that document, and only its
+        changed chunks are embedded.
+        """
+        if not (file.filename or "").lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+        try:
+            job = await request.app.state.service.submit_ingest(file.file, file.filename, parent_id)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return job.as_dict()
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(request: Request, job_id: str):
+        job = request.app.state.service.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.as_dict()
+
+    @app.get("/documents/{document_id}")
+    async def get_document(document_id: int):
+        db = get_session()
+        try:
+            document = crud.get_document(db, document_id)
+            if document is None:
+                raise HTTPException(status_code=404, detail="Document not found")
+            return {
+                "id": document.id,
+                "filename": document.filename,
+                "status": document.status,
+                "version": document.version or 1,
+                "parent_id": document.parent_id,
+                "file_size": document.file_size,
+                "upload_date": document.upload_date.isoformat(),
+            }
+        finally:
+            db.close()
+
+    @app.post("/ask")
+    async def ask(request: Request, body: AskRequest):
+        """Answer a question; with stream=true the answer is sent as server-sent events."""
+        service: DocSageService = request.app.state.service
+
+        if not body.stream:
+            return await service.ask(body.question, body.session_id, body.document_id)
+
+        events = service.ask_stream(body.question, body.session_id, body.document_id)
+        # Fail with 503 before the response starts if no slot is free
+        first = await events.__anext__()
+
+        async def stream() -> AsyncIterator[str]:
+            event = first
+            try:
+                while True:
+                    yield _sse("token" if "token" in event else "answer", event)
+                    event = await events.__anext__()
+            except StopAsyncIteration:
+                pass
+            except Exception as e:
+                logger.error(f"Streaming answer failed: {e}")
+                yield _sse("error", {"detail": str(e)})
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/sessions/{session_id}/history")
+    async def history(request: Request, session_id: str, limit: int = 50):
+        return await request.app.state.service.history(session_id, limit=limit)
+
+    return app
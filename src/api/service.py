@@ -0,0 +1,432 @@
+"""Shared resources, job tracking and concurrency limits behind the HTTP API."""
+import os
+import json
+import uuid
+import asyncio
+import logging
+import functools
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from ..clients import get_client_registry
+from ..config import Config
+from ..database.init_db import get_session
+from ..database import crud
+from ..database.writer import ConversationWriter, get_conversation_writer
+from ..loaders.upload_store import StoredUpload, store_upload
+from ..observability import accounting
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceBusyError(Exception):
+    """Raised when a request waited too long for a concurrency slot."""
+
+
+@dataclass
+class IngestJob:
+    """Status of one background ingestion."""
+
+    id: str
+    document_id: int
+    filename: str
+    page_count: Optional[int] = None
+    status: str = "queued"  # queued, running, completed, failed
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "document_id": self.document_id,
+            "filename": self.filename,
+            "page_count": self.page_count,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class DocSageService:
+    """
+    Runs ingestion and question answering for the HTTP API.
+
+    One VectorStoreManager, one Chroma client and one chat model (with its
+    pooled HTTP client) are shared by all requests. Blocking work runs on a
+    bounded thread pool; semaphores cap concurrent questions and
+    ingestions, and requests that cannot get a slot within the queue
+    timeout fail with ServiceBusyError. Conversation memory is kept per
+    session and document in an LRU cache and rebuilt from the database
+    when evicted.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_asks: int = None,
+        max_concurrent_ingests: int = None,
+        queue_timeout: float = None,
+        upload_directory: str = None,
+        max_sessions: int = 256,
+        max_finished_jobs: int = 1000,
+        conversation_writer: Optional[ConversationWriter] = None
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            max_concurrent_asks: Questions answered at once (default from env: API_MAX_CONCURRENT_ASKS or 8)
+            max_concurrent_ingests: Documents ingested at once (default from env: API_MAX_CONCURRENT_INGESTS or 2)
+            queue_timeout: Seconds a request may wait for a slot (default from env: API_QUEUE_TIMEOUT or 30)
+            upload_directory: Where uploaded files are stored (default from env: UPLOAD_DIRECTORY)
+            max_sessions: Conversation memories kept in process
+            max_finished_jobs: Finished jobs kept for status queries
+            conversation_writer: Buffers conversation writes (default: get_conversation_writer())
+        """
+        if max_concurrent_asks is None:
+            max_concurrent_asks = int(os.getenv("API_MAX_CONCURRENT_ASKS", "8"))
+        if max_concurrent_ingests is None:
+            max_concurrent_ingests = int(os.getenv("API_MAX_CONCURRENT_INGESTS", "2"))
+        if queue_timeout is None:
+            queue_timeout = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+        if upload_directory is None:
+            upload_directory = os.getenv("UPLOAD_DIRECTORY", "/app/data/documents")
+
+        self.queue_timeout = queue_timeout
+        self.upload_directory = Path(upload_directory)
+        self.upload_directory.mkdir(parents=True, exist_ok=True)
+        self.max_sessions = max_sessions
+        self.max_finished_jobs = max_finished_jobs
+
+        # Ingestion threads never starve question answering and vice versa
+        self._ask_executor = ThreadPoolExecutor(max_concurrent_asks + 2, thread_name_prefix="doc-sage-ask")
+        self._ingest_executor = ThreadPoolExecutor(max_concurrent_ingests, thread_name_prefix="doc-sage-ingest")
+        self._ask_slots = asyncio.Semaphore(max_concurrent_asks)
+        self._ingest_slots = asyncio.Semaphore(max_concurrent_ingests)
+
+        self.jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._tasks: set = set()
+        self._sessions: "OrderedDict[Tuple[str, Optional[int]], Tuple[Any, asyncio.Lock]]" = OrderedDict()
+
+        self._conversations = conversation_writer or get_conversation_writer()
+        self._vectorstore_manager = None
+        self._vectorstore = None
+        self._llm = None
+
+        logger.info(
+            f"Initialized DocSageService with {max_concurrent_asks} ask and "
+            f"{max_concurrent_ingests} ingest slots"
+        )
+
+    # Shared clients, created on first use
+
+    @property
+    def vectorstore_manager(self):
+        if self._vectorstore_manager is None:
+            from ..processing.vectorstore import VectorStoreManager
+            self._vectorstore_manager = VectorStoreManager()
+        return self._vectorstore_manager
+
+    @property
+    def vectorstore(self):
+        if self._vectorstore is None:
+            self._vectorstore = self.vectorstore_manager.get_vectorstore()
+        return self._vectorstore
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from ..chains.qa_chain import create_chat_model
+            self._llm = create_chat_model()
+        return self._llm
+
+    # Helpers
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args, **kwargs):
+        """Run blocking work on a pool thread, keeping the caller's context."""
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    async def _acquire(self, slots: asyncio.Semaphore, what: str):
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ServiceBusyError(f"No {what} slot available within {self.queue_timeout:g}s")
+
+    def _spawn(self, coroutine):
+        # Keep a reference so the task is not garbage collected while running
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # Ingestion
+
+    def _save_upload(self, source: BinaryIO) -> StoredUpload:
+        return store_upload(source, directory=str(self.upload_directory))
+
+    def _create_document(self, file_path: str, filename: str, file_size: int, parent_id: Optional[int]) -> int:
+        db = get_session()
+        try:
+            return crud.create_document(
+                db=db,
+                filename=filename,
+                file_path=file_path,
+                file_type="pdf",
+                file_size=file_size,
+                status="processing",
+                parent_id=parent_id
+            ).id
+        finally:
+            db.close()
+
+    async def submit_ingest(self, source: BinaryIO, filename: str, parent_id: Optional[int] = None) -> IngestJob:
+        """
+        Store an uploaded PDF and queue it for ingestion.
+
+        Args:
+            source: Readable binary file object
+            filename: Original file name
+            parent_id: Document this upload is a new version of (optional);
+                only its changed chunks are embedded
+
+        Returns:
+            The queued IngestJob
+
+        Raises:
+            UploadTooLargeError: If the file exceeds UPLOAD_MAX_MB or UPLOAD_MAX_PAGES
+            ValueError: If the file is not a readable PDF or parent_id does not exist
+        """
+        stored = await self._run(self._ingest_executor, self._save_upload, source)
+        document_id = await self._run(
+            self._ingest_executor, self._create_document, stored.path, filename, stored.size, parent_id
+        )
+
+        job = IngestJob(
+            id=uuid.uuid4().hex,
+            document_id=document_id,
+            filename=filename,
+            page_count=stored.page_count
+        )
+        self.jobs[job.id] = job
+        self._spawn(self._ingest(job, stored, parent_id))
+
+        logger.info(f"Queued ingestion job {job.id} for document {document_id}")
+        return job
+
+    async def _ingest(self, job: IngestJob, stored: StoredUpload, parent_id: Optional[int]):
+        from ..ingest import ingest_document
+
+        async with self._ingest_slots:
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            try:
+                result = await self._run(
+                    self._ingest_executor,
+                    ingest_document,
+                    file_path=stored.path,
+                    filename=job.filename,
+                    file_size=stored.size,
+                    document_id=job.document_id,
+                    vectorstore_manager=self.vectorstore_manager,
+                    vectorstore=self.vectorstore,
+                    content_hash=stored.content_hash,
+                    page_count=stored.page_count,
+                    parent_id=parent_id
+                )
+                job.result = result.as_dict()
+                job.status = "completed"
+            except Exception as e:
+                logger.error(f"Ingestion job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = datetime.utcnow()
+                self._prune_jobs()
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished_at]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        """Get an ingestion job by ID."""
+        return self.jobs.get(job_id)
+
+    # Question answering
+
+    def _load_manager(self, session_id: str, document_id: Optional[int]):
+        from ..chains.qa_chain import QAChainManager
+
+        manager = QAChainManager(
+            self.vectorstore,
+            document_id=document_id,
+            session_id=session_id,
+            llm=self.llm,
+            search_filter={"document_id": document_id} if document_id is not None else None
+        )
+
+        # Include turns still waiting in the write buffer
+        self._conversations.flush()
+        db = get_session()
+        try:
+            # The latest turns, like the Streamlit session window
+            history = crud.get_conversations_page(
+                db, session_id, limit=Config.CHAT_WINDOW_TURNS, document_id=document_id
+            )
+            manager.memory_manager.load_from_history([
+                {"user": c.user_message, "assistant": c.assistant_message}
+                for c in history
+            ])
+        finally:
+            db.close()
+
+        return manager
+
+    async def _session(self, session_id: str, document_id: Optional[int]) -> Tuple[Any, asyncio.Lock]:
+        key = (session_id, document_id)
+        entry = self._sessions.get(key)
+        if entry is None:
+            manager = await self._run(self._ask_executor, self._load_manager, session_id, document_id)
+            # Another request may have loaded the same session meanwhile
+            entry = self._sessions.setdefault(key, (manager, asyncio.Lock()))
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return entry
+
+    def _save_conversation(
+        self,
+        session_id: str,
+        document_id: Optional[int],
+        question: str,
+        result: Dict
+    ):
+        from ..chains.qa_chain import source_refs
+
+        # Queued for the write-behind buffer; does not wait on the database
+        self._conversations.submit(
+            session_id=session_id,
+            user_message=question,
+            assistant_message=result["answer"],
+            document_id=document_id,
+            source_refs=source_refs(result["source_documents"])
+        )
+
+    async def ask(self, question: str, session_id: str, document_id: Optional[int] = None) -> Dict:
+        """
+        Answer a question within a session.
+
+        Args:
+            question: User's question
+            session_id: Conversation the question belongs to
+            document_id: Restrict retrieval to one document (optional)
+
+        Returns:
+            Dictionary with 'answer' and 'sources' keys
+
+        Raises:
+            ServiceBusyError: If no slot became free within the queue timeout
+        """
+        await self._acquire(self._ask_slots, "ask")
+        try:
+            manager, lock = await self._session(session_id, document_id)
+            # Questions in one session are answered in order
+            async with lock:
+                result = await self._run(self._ask_executor, manager.ask_with_sources, question)
+            self._save_conversation(session_id, document_id, question, result)
+        finally:
+            self._ask_slots.release()
+
+        return {"answer": result["answer"], "sources": result["sources"]}
+
+    async def ask_stream(
+        self,
+        question: str,
+        session_id: str,
+        document_id: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer a question within a session, streaming the answer.
+
+        Args:
+            question: User's question
+            session_id: Conversation the question belongs to
+            document_id: Restrict retrieval to one document (optional)
+
+        Yields:
+            {'token': str} events, then {'answer': str, 'sources': [...]}
+
+        Raises:
+            ServiceBusyError: If no slot became free within the queue timeout
+        """
+        from ..chains.qa_chain import format_sources
+
+        await self._acquire(self._ask_slots, "ask")
+        try:
+            manager, lock = await self._session(session_id, document_id)
+            async with lock:
+                async for event in manager.astream(question):
+                    if "token" in event:
+                        yield event
+                    else:
+                        result = event
+            self._save_conversation(session_id, document_id, question, result)
+            # Streamed usage is collected without flushing inside the event loop
+            await self._run(self._ask_executor, accounting.flush)
+        finally:
+            self._ask_slots.release()
+
+        yield {"answer": result["answer"], "sources": format_sources(result["source_documents"])}
+
+    async def history(self, session_id: str, limit: int = 50) -> List[Dict]:
+        """
+        Get the stored conversation of a session.
+
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of exchanges (the latest ones)
+
+        Returns:
+            List of exchanges, oldest first
+        """
+        def load():
+            self._conversations.flush()
+            db = get_session()
+            try:
+                return [
+                    {
+                        "id": c.id,
+                        "document_id": c.document_id,
+                        "user_message": c.user_message,
+                        "assistant_message": c.assistant_message,
+                        "source_refs": json.loads(c.source_refs) if c.source_refs else [],
+                        "created_at": c.created_at.isoformat(),
+                    }
+                    for c in crud.get_conversations_page(db, session_id, limit=limit)
+                ]
+            finally:
+                db.close()
+
+        return await self._run(self._ask_executor, load)
+
+    async def close(self):
+        """Wait for running ingestions and release the thread pools."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._ask_executor.shutdown(wait=True)
+        self._ingest_executor.shutdown(wait=True)
+        self._conversations.flush()
+        accounting.flush()
+        await get_client_registry().aclose()
@@ -0,0 +1,332 @@
+"""
+Bulk-ingest a directory tree of PDFs.
+
+Extraction and splitting run in a process pool while embedding and vector
+writes run in a thread pool, so the next files are parsed while earlier ones
+are embedded. Files whose Document is already 'completed' are skipped and
+every finished file is appended to a checkpoint, so an interrupted run picks
+up where it left off when started again with the same arguments. Vector IDs
+are derived from the chunks, so a file interrupted mid-write only embeds the
+chunks that were not stored yet.
+
+Usage:
+    python -m src.main ingest /data/pdfs --workers 4 --embed-workers 4
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import scheduler
+from .config import Config
+from .database.init_db import get_session
+from .database import crud
+from .observability import accounting
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCheckpoint:
+    """Append-only JSON-lines record of files a bulk run has finished."""
+
+    def __init__(self, path: str):
+        """
+        Open a checkpoint, loading the entries of earlier runs.
+
+        Args:
+            path: Checkpoint file; created on the first record
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self._file = None
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a partial last line
+                        logger.warning(f"Ignoring malformed checkpoint line in {self.path}")
+                        continue
+                    self.entries[entry["path"]] = entry
+
+    def status(self, file_path: str) -> Optional[str]:
+        """Status of the last record for a file ('completed', 'failed' or None)."""
+        entry = self.entries.get(file_path)
+        return entry["status"] if entry else None
+
+    def record(self, file_path: str, status: str, **detail):
+        """
+        Append a record and flush it to disk.
+
+        Args:
+            file_path: File the record is for
+            status: 'completed' or 'failed'
+            **detail: Extra fields stored with the record
+        """
+        entry = {"path": file_path, "status": status, **detail}
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a+", encoding="utf-8")
+            # Start on a fresh line after a partial line from a killed run
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[file_path] = entry
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ThroughputMeter:
+    """Tracks bulk ingestion progress and estimates the time remaining."""
+
+    def __init__(
+        self,
+        total_files: int,
+        total_bytes: int,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.chunks = 0
+        self._clock = clock
+        self._start = clock()
+
+    def update(self, file_bytes: int, chunks: int = 0):
+        """Count one finished (completed or failed) file."""
+        self.files += 1
+        self.bytes += file_bytes
+        self.chunks += chunks
+
+    def elapsed(self) -> float:
+        return self._clock() - self._start
+
+    def eta_seconds(self) -> Optional[float]:
+        """
+        Estimate the seconds remaining from the byte rate so far.
+
+        Bytes track work better than file counts when file sizes vary.
+
+        Returns:
+            Estimated seconds, or None before the first file finishes
+        """
+        elapsed = self.elapsed()
+        if self.bytes == 0 or elapsed <= 0:
+            return None
+        return (self.total_bytes - self.bytes) / (self.bytes / elapsed)
+
+    def format(self) -> str:
+        """One-line progress report."""
+        elapsed = max(self.elapsed(), 1e-9)
+        percent = 100.0 * self.files / self.total_files if self.total_files else 100.0
+        eta = self.eta_seconds()
+        eta_text = str(timedelta(seconds=round(eta))) if eta is not None else "-"
+        return (
+            f"[{self.files}/{self.total_files}] {percent:.1f}% | "
+            f"{self.files / elapsed:.2f} files/s, {self.chunks / elapsed:.1f} chunks/s, "
+            f"{self.bytes / elapsed / 1e6:.2f} MB/s | ETA {eta_text}"
+        )
+
+
+@dataclass
+class _BulkItem:
+    path: str
+    size: int
+    document_id: Optional[int] = None
+
+
+def default_checkpoint_path(root: str) -> str:
+    """Checkpoint file for a directory, kept next to the database."""
+    digest = hashlib.sha1(str(Path(root).resolve()).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(os.path.dirname(Config.DB_PATH) or ".", f"bulk-ingest-{digest}.jsonl")
+
+
+def _extract(file_path: str):
+    """Hash, load and split one PDF (runs in a worker process)."""
+    from .ingest import load_chunks
+    from .loaders.text_store import file_hash
+
+    content_hash = file_hash(file_path)
+    return load_chunks(file_path, content_hash=content_hash), content_hash
+
+
+def _index(item: _BulkItem, extracted, vectorstore_manager, vectorstore):
+    """Embed one document's chunks (runs in an embedding thread)."""
+    from .ingest import index_chunks
+
+    chunks, content_hash = extracted
+    with accounting.usage_scope(document_id=item.document_id), scheduler.priority(scheduler.BULK):
+        # Vectors an interrupted run already wrote for this document are kept
+        return index_chunks(
+            item.document_id,
+            chunks,
+            vectorstore_manager,
+            vectorstore=vectorstore,
+            document_hash=content_hash
+        )
+
+
+def ingest_directory(
+    root: str,
+    pattern: str = "*.pdf",
+    workers: Optional[int] = None,
+    embed_workers: int = 4,
+    checkpoint_path: Optional[str] = None,
+    retry_failed: bool = False,
+    vectorstore_manager=None,
+    report_interval: float = 5.0,
+    report: Callable[[str], None] = print
+) -> Dict:
+    """
+    Ingest every matching file under a directory.
+
+    Args:
+        root: Directory to walk recursively
+        pattern: Glob pattern of files to ingest
+        workers: Extraction processes (default: CPU count)
+        embed_workers: Embedding threads (concurrent embedding requests)
+        checkpoint_path: Checkpoint file (default: default_checkpoint_path(root))
+        retry_failed: Retry files that failed in an earlier run
+        vectorstore_manager: Manager to write with (default: a new VectorStoreManager)
+        report_interval: Seconds between progress reports
+        report: Called with each progress line
+
+    Returns:
+        Summary with file, chunk and skip counts, failed paths and elapsed seconds
+    """
+    from .processing.vectorstore import VectorStoreManager
+
+    workers = workers or os.cpu_count() or 1
+    checkpoint = IngestCheckpoint(checkpoint_path or default_checkpoint_path(root))
+    files = sorted(str(p.resolve()) for p in Path(root).rglob(pattern) if p.is_file())
+
+    db = get_session()
+    try:
+        existing = crud.get_documents_by_file_path(db, files)
+        summary = {
+            "files": len(files), "skipped": 0, "completed": 0, "chunks": 0,
+            "duplicates_skipped": 0, "failed": [],
+        }
+        todo: List[_BulkItem] = []
+        for path in files:
+            document = existing.get(path)
+            if checkpoint.status(path) == "completed" or (document and document.status == "completed"):
+                summary["skipped"] += 1
+                continue
+            if checkpoint.status(path) == "failed" and not retry_failed:
+                summary["skipped"] += 1
+                continue
+            todo.append(_BulkItem(
+                path=path,
+                size=os.path.getsize(path),
+                document_id=document.id if document else None
+            ))
+
+        report(f"{len(files)} files found, {summary['skipped']} skipped, {len(todo)} to ingest")
+        if not todo:
+            return summary
+
+        vectorstore_manager = vectorstore_manager or VectorStoreManager()
+        vectorstore = vectorstore_manager.get_vectorstore()
+        meter = ThroughputMeter(len(todo), sum(item.size for item in todo))
+
+        def start(item: _BulkItem):
+            if item.document_id is None:
+                document = crud.create_document(
+                    db=db,
+                    filename=os.path.relpath(item.path, root),
+                    file_path=item.path,
+                    file_type="pdf",
+                    file_size=item.size,
+                    status="processing"
+                )
+                item.document_id = document.id
+            else:
+                crud.update_document_status(db, item.document_id, "processing")
+
+        def fail(item: _BulkItem, error: Exception):
+            logger.error(f"Failed to ingest {item.path}: {error}")
+            crud.update_document_status(db, item.document_id, "failed")
+            checkpoint.record(item.path, "failed", document_id=item.document_id, error=str(error))
+            summary["failed"].append(item.path)
+            meter.update(item.size)
+
+        extract_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        index_pool = ThreadPoolExecutor(embed_workers, thread_name_prefix="bulk-embed")
+        pending: Dict[Future, Tuple[str, _BulkItem]] = {}
+        queue = iter(todo)
+        last_report = time.monotonic()
+        try:
+            while True:
+                # Keep the extractors busy, but stop reading ahead while
+                # extracted chunks are waiting for an embedding thread
+                stages = [stage for stage, _ in pending.values()]
+                while stages.count("extract") < 2 * workers and stages.count("index") < 2 * embed_workers:
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    start(item)
+                    pending[extract_pool.submit(_extract, item.path)] = ("extract", item)
+                    stages.append("extract")
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=report_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, item = pending.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        fail(item, e)
+                        continue
+
+                    if stage == "extract":
+                        future = index_pool.submit(_index, item, value, vectorstore_manager, vectorstore)
+                        pending[future] = ("index", item)
+                        continue
+
+                    crud.update_document_status(db, item.document_id, "completed")
+                    checkpoint.record(
+                        item.path, "completed",
+                        document_id=item.document_id, chunks=value.chunks
+                    )
+                    summary["completed"] += 1
+                    summary["chunks"] += value.chunks
+                    summary["duplicates_skipped"] += value.duplicates_skipped
+                    meter.update(item.size, value.chunks)
+
+                if time.monotonic() - last_report >= report_interval:
+                    report(meter.format())
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            report("Interrupted; run the same command again to resume")
+            raise
+        finally:
+            extract_pool.shutdown(wait=False, cancel_futures=True)
+            index_pool.shutdown(wait=False, cancel_futures=True)
+            checkpoint.close()
+
+        report(meter.format())
+        summary["seconds"] = round(meter.elapsed(), 2)
+        logger.info(f"Bulk ingest finished: {summary}")
+        return summary
+    finally:
+        db.close()
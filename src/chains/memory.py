@@ -10,19 +10,27 @@ logger = logging.getLogger(__name__)
 class ConversationMemoryManager:
     """Manages conversation memory for QA chains."""
 
-    def __init__(self, memory_key: str = "chat_history", return_messages: bool = True):
+    def __init__(
+        self,
+        memory_key: str = "chat_history",
+        return_messages: bool = True,
+        output_key: str = "answer"
+    ):
         """
         Initialize conversation memory manager.
 
         Args:
             memory_key: Key to store conversation history
             return_messages: Whether to return messages as objects (True) or strings (False)
+            output_key: Chain output saved as the AI message; needed when the
+                chain also returns source documents
         """
         self.memory_key = memory_key
         self.return_messages = return_messages
         self.memory = ConversationBufferMemory(
             memory_key=memory_key,
-            return_messages=return_messages
+            return_messages=return_messages,
+            output_key=output_key
         )
         logger.info(f"Initialized ConversationMemoryManager with key: {memory_key}")
 
@@ -103,17 +111,19 @@ class ConversationMemoryManager:
         logger.info(f"Loaded {len(history)} exchanges into memory")
 
 
-def create_memory(memory_key: str = "chat_history") -> ConversationBufferMemory:
+def create_memory(memory_key: str = "chat_history", output_key: str = "answer") -> ConversationBufferMemory:
     """
     Create a simple ConversationBufferMemory instance.
 
     Args:
         memory_key: Key to store conversation history
+        output_key: Chain output saved as the AI message
 
     Returns:
         ConversationBufferMemory instance
     """
     return ConversationBufferMemory(
         memory_key=memory_key,
-        return_messages=True
+        return_messages=True,
+        output_key=output_key
     )
\ No newline at end of file
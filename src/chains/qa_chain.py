@@ -1,14 +1,19 @@
 """Question-Answering chain implementation."""
 import os
+import json
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
 from langchain.chains import ConversationalRetrievalChain
 from langchain.prompts import PromptTemplate
 from langchain_community.vectorstores import Chroma
 
+from . import singleflight, summary
 from .memory import ConversationMemoryManager, create_memory
+from ..observability import accounting, metrics, profiling
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,137 @@ DEFAULT_QA_TEMPLATE = """以下のコンテキストを使用して、質問に
 回答:"""
 
 
+def create_chat_model(
+    model_name: str = "gpt-3.5-turbo",
+    temperature: float = 0,
+    max_tokens: Optional[int] = 500,
+    base_url: Optional[str] = None
+) -> ChatOpenAI:
+    """
+    Create an OpenAI chat model with usage accounting attached.
+
+    The model borrows its OpenAI client from the process-wide registry, so
+    every model shares one pool of kept-alive connections; one instance can
+    also be shared by many QAChainManagers.
+
+    Args:
+        model_name: OpenAI model name
+        temperature: Model temperature (0 = deterministic)
+        max_tokens: Maximum tokens in response (None for the model's limit)
+        base_url: OpenAI-compatible API base URL
+            (default from env: OPENAI_BASE_URL; empty uses the OpenAI API)
+
+    Returns:
+        ChatOpenAI instance
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+    if base_url is None:
+        base_url = os.getenv("OPENAI_BASE_URL", "")
+
+    callbacks = None
+    if accounting.is_enabled():
+        from ..observability.callbacks import UsageCallbackHandler
+        callbacks = [UsageCallbackHandler(model_name)]
+
+    from ..clients import get_client_registry
+
+    registry = get_client_registry()
+    client = registry.openai_client(api_key, base_url or None)
+    async_client = registry.async_openai_client(api_key, base_url or None)
+    return ChatOpenAI(
+        model_name=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        openai_api_key=api_key,
+        openai_api_base=base_url or None,
+        callbacks=callbacks,
+        client=client.chat.completions,
+        async_client=async_client.chat.completions
+    )
+
+
+def streaming_chat_model(llm: ChatOpenAI, callbacks: Optional[List] = None) -> ChatOpenAI:
+    """
+    Create a streaming variant of a chat model.
+
+    The variant uses the same model settings and borrows the same pooled
+    clients; llm.copy() cannot be used because it drops the fields excluded
+    from serialization (client, async_client, callbacks, tags, metadata).
+
+    Args:
+        llm: Chat model to stream with
+        callbacks: Handlers added after the model's own callbacks
+
+    Returns:
+        ChatOpenAI instance with streaming enabled
+    """
+    return ChatOpenAI(
+        model_name=llm.model_name,
+        temperature=llm.temperature,
+        max_tokens=llm.max_tokens,
+        model_kwargs=llm.model_kwargs,
+        openai_api_key=llm.openai_api_key,
+        openai_api_base=llm.openai_api_base,
+        max_retries=llm.max_retries,
+        request_timeout=llm.request_timeout,
+        tags=llm.tags,
+        metadata=llm.metadata,
+        callbacks=[*(llm.callbacks or []), *(callbacks or [])],
+        client=llm.client,
+        async_client=llm.async_client,
+        streaming=True
+    )
+
+
+def format_sources(source_documents: List) -> List[Dict]:
+    """
+    Format retrieved documents for display.
+
+    Args:
+        source_documents: Documents returned by the chain
+
+    Returns:
+        List of dicts with 'index', 'content' (first 200 characters) and 'metadata'
+    """
+    return [
+        {
+            "index": i,
+            "content": doc.page_content[:200] + "...",
+            "metadata": doc.metadata
+        }
+        for i, doc in enumerate(source_documents, 1)
+    ]
+
+
+def source_refs(source_documents: List) -> List[Dict]:
+    """
+    Reference retrieved documents by chunk ID for storage.
+
+    Conversations store these instead of copies of the source text; the text
+    is looked up from DocumentChunk when the history is displayed.
+
+    Args:
+        source_documents: Documents returned by the chain
+
+    Returns:
+        List of dicts with 'chunk_id', 'document_id' and 'page'
+    """
+    return [
+        {
+            "chunk_id": doc.metadata.get("chunk_id"),
+            "document_id": doc.metadata.get("document_id"),
+            "page": doc.metadata.get("page"),
+        }
+        for doc in source_documents
+    ]
+
+
 class QAChainManager:
     """Manages QA chain for document question-answering."""
 
@@ -34,7 +170,15 @@ class QAChainManager:
         model_name: str = "gpt-3.5-turbo",
         temperature: float = 0,
         max_tokens: int = 500,
-        k: int = 4
+        k: int = 4,
+        document_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        base_url: Optional[str] = None,
+        llm: Optional[ChatOpenAI] = None,
+        search_filter: Optional[Dict] = None,
+        adaptive: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        summary_routing: Optional[bool] = None
     ):
         """
         Initialize QA chain manager.
@@ -44,22 +188,44 @@ class QAChainManager:
             model_name: OpenAI model name
             temperature: Model temperature (0 = deterministic)
             max_tokens: Maximum tokens in response
-            k: Number of documents to retrieve
+            k: Number of documents to retrieve (the maximum when adaptive)
+            document_id: Document usage is attributed to (optional)
+            session_id: Chat session usage is attributed to (optional)
+            base_url: OpenAI-compatible API base URL
+                (default from env: OPENAI_BASE_URL; empty uses the OpenAI API)
+            llm: Shared chat model (default: created on first use)
+            search_filter: Chroma metadata filter for retrieval, e.g. {"document_id": 1}
+            adaptive: Send only the relevant chunks, between RETRIEVAL_MIN_K and k
+                (default from env: RETRIEVAL_ADAPTIVE, true)
+            coalesce: Share one answer between identical questions asked
+                concurrently (default from env: QA_COALESCE_ENABLED, true)
+            summary_routing: Answer overview questions about document_id from
+                its precomputed summaries, if it has any
+                (default from env: SUMMARY_ROUTING_ENABLED, true)
         """
         self.vectorstore = vectorstore
+        self.search_filter = search_filter
         self.k = k
-
-        # Initialize LLM
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if adaptive is None:
+            adaptive = os.getenv("RETRIEVAL_ADAPTIVE", "true").lower() == "true"
+        self.adaptive = adaptive
+        if coalesce is None:
+            coalesce = os.getenv("QA_COALESCE_ENABLED", "true").lower() == "true"
+        self.coalesce = coalesce
+        if summary_routing is None:
+            summary_routing = os.getenv("SUMMARY_ROUTING_ENABLED", "true").lower() == "true"
+        self.summary_routing = summary_routing
+        self.document_id = document_id
+        self.session_id = session_id
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+        # The LLM client is created on first use
+        if llm is None and not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OPENAI_API_KEY environment variable is not set")
-
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            openai_api_key=api_key
-        )
+        self._base_url = base_url if base_url is not None else os.getenv("OPENAI_BASE_URL", "")
+        self._llm: Optional[ChatOpenAI] = llm
 
         # Initialize memory manager
         self.memory_manager = ConversationMemoryManager()
@@ -68,6 +234,36 @@ class QAChainManager:
             f"Initialized QAChainManager with model: {model_name}, k: {k}"
         )
 
+    @property
+    def llm(self) -> ChatOpenAI:
+        """Chat model, created on first use."""
+        if self._llm is None:
+            self._llm = create_chat_model(
+                model_name=self.model_name,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                base_url=self._base_url
+            )
+        return self._llm
+
+    def _retriever(self):
+        if self.adaptive:
+            from .retriever import AdaptiveRetriever
+            return AdaptiveRetriever.from_env(self.vectorstore, max_k=self.k, search_filter=self.search_filter)
+
+        search_kwargs = {"k": self.k}
+        if self.search_filter:
+            search_kwargs["filter"] = self.search_filter
+        return self.vectorstore.as_retriever(search_kwargs=search_kwargs)
+
+    def _profile_tag(self) -> str:
+        """Name profiles of this manager's questions after the session or document."""
+        if self.session_id:
+            return f"session-{self.session_id}"
+        if self.document_id is not None:
+            return f"document-{self.document_id}"
+        return "unscoped"
+
     def create_chain(self) -> ConversationalRetrievalChain:
         """
         Create a conversational retrieval chain.
@@ -77,7 +273,7 @@ class QAChainManager:
         """
         chain = ConversationalRetrievalChain.from_llm(
             llm=self.llm,
-            retriever=self.vectorstore.as_retriever(search_kwargs={"k": self.k}),
+            retriever=self._retriever(),
             memory=self.memory_manager.memory,
             return_source_documents=True,
             verbose=False
@@ -94,20 +290,119 @@ class QAChainManager:
         """
         Ask a question and get an answer.
 
+        Identical questions asked concurrently about the same document, with
+        the same conversation so far, are answered once and the answer is
+        shared (see singleflight).
+
         Args:
             question: User's question
             chain: Existing chain (if None, creates new one)
 
         Returns:
-            Dictionary with 'answer' and 'source_documents' keys
+            Dictionary with 'answer', 'source_documents' and 'route'
+            ('summary' or 'retrieval') keys
         """
-        if chain is None:
-            chain = self.create_chain()
+        if chain is not None or not self.coalesce:
+            return self._answer(question, chain)
 
+        result, shared = singleflight.questions.do(
+            self._flight_key(question),
+            lambda: self._answer(question)
+        )
+        if shared:
+            # Only the leader's chain saved the exchange to its memory
+            self.memory_manager.add_exchange(question, result["answer"])
+            logger.info(f"Shared the answer of an identical question in flight: {question[:100]}")
+        return dict(result)
+
+    def _flight_key(self, question: str) -> Tuple:
+        """Key of questions that would get the same answer from this manager."""
+        history = hashlib.sha256("\n".join(
+            f"{message.type}:{message.content}" for message in self.memory_manager.get_messages()
+        ).encode("utf-8")).hexdigest()
+        # Sessions open their own Chroma client on the same collection
+        collection = getattr(getattr(self.vectorstore, "_collection", None), "name", None)
+        store = (
+            (getattr(self.vectorstore, "_persist_directory", None), collection)
+            if collection else id(self.vectorstore)
+        )
+        return (
+            store,
+            self.document_id,
+            json.dumps(self.search_filter, sort_keys=True),
+            self.model_name,
+            self.temperature,
+            self.max_tokens,
+            self.k,
+            self.adaptive,
+            history,
+            singleflight.normalize_question(question),
+        )
+
+    def _answer(self, question: str, chain: Optional[ConversationalRetrievalChain] = None) -> Dict:
+        """Answer from the summaries if the question is routed there, else by retrieval."""
+        summaries = self._overview_summaries(question)
+        if summaries:
+            result = self._ask_summaries(question, summaries)
+            if result is not None:
+                return result
+        return self._ask(question, chain or self.create_chain())
+
+    def _overview_summaries(self, question: str) -> List:
+        """
+        Route a question: the document's summaries for an overview question.
+
+        Returns:
+            DocumentSummary records to answer from, or [] to use retrieval
+        """
+        if not self.summary_routing or self.document_id is None:
+            return []
+        if not summary.is_overview_question(question):
+            return []
+
+        from ..database.init_db import get_session
+        from ..database import crud
+
+        db = get_session()
+        try:
+            return crud.get_document_summaries(db, self.document_id)
+        finally:
+            db.close()
+
+    def _ask_summaries(self, question: str, summaries: List) -> Optional[Dict]:
+        """
+        Answer a question with one LLM call over the precomputed summaries.
+
+        Returns:
+            Dictionary like ask(), or None if the summaries do not cover the
+            question and it must go to retrieval
+        """
+        logger.info(f"Answering from {len(summaries)} summaries: {question[:100]}...")
+        with metrics.timer("qa"), accounting.usage_scope(self.document_id, self.session_id):
+            answer = self.llm.invoke(summary.summary_prompt(question, summaries)).content.strip()
+
+        if summary.FALLBACK_MARKER in answer:
+            logger.info("Summaries do not cover the question; using retrieval")
+            return None
+
+        # The retrieval chain saves exchanges to memory itself; this path must too
+        self.memory_manager.add_exchange(question, answer)
+        metrics.inc("qa_summary_answers_total", 1, "Questions answered from precomputed summaries")
+        return {"answer": answer, "source_documents": [], "route": "summary"}
+
+    def _ask(self, question: str, chain: ConversationalRetrievalChain) -> Dict:
         logger.info(f"Processing question: {question[:100]}...")
 
         try:
-            result = chain({"question": question})
+            callbacks = None
+            if metrics.is_enabled():
+                from ..observability.callbacks import StageTimingCallbackHandler
+                callbacks = [StageTimingCallbackHandler()]
+
+            with metrics.timer("qa"), \
+                    accounting.usage_scope(self.document_id, self.session_id), \
+                    profiling.profile("qa", self._profile_tag()):
+                result = chain({"question": question}, callbacks=callbacks)
 
             answer = result["answer"]
             source_docs = result.get("source_documents", [])
@@ -116,7 +411,8 @@ class QAChainManager:
 
             return {
                 "answer": answer,
-                "source_documents": source_docs
+                "source_documents": source_docs,
+                "route": "retrieval"
             }
 
         except Exception as e:
@@ -139,20 +435,67 @@ class QAChainManager:
             Dictionary with 'answer', 'sources', and 'source_documents' keys
         """
         result = self.ask(question, chain)
+        result["sources"] = format_sources(result["source_documents"])
 
-        # Format sources
-        sources = []
-        for i, doc in enumerate(result["source_documents"], 1):
-            source_info = {
-                "index": i,
-                "content": doc.page_content[:200] + "...",
-                "metadata": doc.metadata
-            }
-            sources.append(source_info)
+        return result
+
+    async def astream(self, question: str) -> AsyncIterator[Dict]:
+        """
+        Ask a question and stream the answer as it is generated.
 
-        result["sources"] = sources
+        Only the answer is streamed; the question-condensing call runs on the
+        non-streaming model.
 
-        return result
+        Args:
+            question: User's question
+
+        Yields:
+            {'token': str} for each answer token, then a final dictionary
+            with 'answer' and 'source_documents' keys
+        """
+        from langchain.callbacks import AsyncIteratorCallbackHandler
+
+        # Overview questions are answered from the summaries in one piece
+        summaries = await asyncio.to_thread(self._overview_summaries, question)
+        if summaries:
+            result = await asyncio.to_thread(self._ask_summaries, question, summaries)
+            if result is not None:
+                yield {"token": result["answer"]}
+                yield result
+                return
+
+        handler = AsyncIteratorCallbackHandler()
+        streaming_llm = streaming_chat_model(self.llm, [handler])
+        chain = ConversationalRetrievalChain.from_llm(
+            llm=streaming_llm,
+            condense_question_llm=self.llm,
+            retriever=self._retriever(),
+            memory=self.memory_manager.memory,
+            return_source_documents=True,
+            verbose=False
+        )
+
+        logger.info(f"Streaming answer to question: {question[:100]}...")
+
+        # The task copies the current context, so usage is attributed to this scope
+        with accounting.usage_scope(self.document_id, self.session_id, flush_on_exit=False):
+            task = asyncio.create_task(chain.acall({"question": question}))
+        # Stop waiting for tokens if the chain fails before the answer starts
+        task.add_done_callback(lambda _: handler.done.set())
+
+        try:
+            with metrics.timer("qa"):
+                async for token in handler.aiter():
+                    yield {"token": token}
+                result = await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+        yield {
+            "answer": result["answer"],
+            "source_documents": result.get("source_documents", [])
+        }
 
     def get_memory(self) -> ConversationMemoryManager:
         """Get the conversation memory manager."""
@@ -180,15 +523,7 @@ def create_simple_qa_chain(
     Returns:
         ConversationalRetrievalChain instance
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is not set")
-
-    llm = ChatOpenAI(
-        model_name=model_name,
-        temperature=0,
-        openai_api_key=api_key
-    )
+    llm = create_chat_model(model_name=model_name, max_tokens=None)
 
     memory = create_memory()
 
@@ -0,0 +1,92 @@
+"""Retriever that sends only as many chunks as the question needs."""
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+
+from ..processing.relevance import select_relevant
+from ..observability import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRetriever(BaseRetriever):
+    """
+    Fetches a wide candidate set and keeps only the relevant chunks.
+
+    Candidates are re-scored locally (vector relevance blended with lexical
+    overlap, see select_relevant) and between min_k and max_k of them are
+    returned, so a question answered by one chunk does not pay for four in
+    the prompt.
+    """
+
+    vectorstore: Any
+    search_filter: Optional[Dict] = None
+    fetch_k: int = 12
+    min_k: int = 1
+    max_k: int = 4
+    threshold: float = 0.3
+    lexical_weight: float = 0.3
+    max_gap: float = 0.1
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_env(cls, vectorstore: Any, max_k: int = 4, search_filter: Optional[Dict] = None) -> "AdaptiveRetriever":
+        """
+        Create a retriever configured from environment variables.
+
+        Args:
+            vectorstore: Vector store to search
+            max_k: Maximum chunks (default: overridden by env RETRIEVAL_MAX_K if set)
+            search_filter: Chroma metadata filter (optional)
+
+        Returns:
+            AdaptiveRetriever instance
+        """
+        return cls(
+            vectorstore=vectorstore,
+            search_filter=search_filter,
+            fetch_k=int(os.getenv("RETRIEVAL_FETCH_K", "12")),
+            min_k=int(os.getenv("RETRIEVAL_MIN_K", "1")),
+            max_k=int(os.getenv("RETRIEVAL_MAX_K", str(max_k))),
+            threshold=float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.3")),
+            lexical_weight=float(os.getenv("RETRIEVAL_LEXICAL_WEIGHT", "0.3")),
+            max_gap=float(os.getenv("RETRIEVAL_MAX_GAP", "0.1"))
+        )
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates = self.vectorstore.similarity_search_with_relevance_scores(
+            query,
+            k=max(self.fetch_k, self.max_k),
+            filter=self.search_filter
+        )
+        kept = select_relevant(
+            query,
+            [(doc.page_content, score) for doc, score in candidates],
+            min_k=self.min_k,
+            max_k=self.max_k,
+            threshold=self.threshold,
+            lexical_weight=self.lexical_weight,
+            max_gap=self.max_gap
+        )
+
+        metrics.observe(
+            "retrieval_chunks_sent",
+            len(kept),
+            "Chunks sent to the LLM per question",
+            buckets=tuple(range(self.max_k + 1))
+        )
+        logger.info(
+            f"Sending {len(kept)} of {len(candidates)} candidate chunks "
+            f"(scores: {', '.join(f'{c.score:.2f}' for c in kept)})"
+        )
+        return [candidates[chunk.index][0] for chunk in kept]
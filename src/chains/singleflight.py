@@ -0,0 +1,132 @@
+"""Coalescing of identical questions that are answered concurrently."""
+import re
+import logging
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..observability import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Trailing punctuation that does not change what is asked
+_TRAILING = re.compile(r"[\s?？。.!！]+$")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different spellings share a key.
+
+    Full-width and half-width forms are unified (NFKC), case and runs of
+    whitespace are folded and trailing question marks and periods removed.
+
+    Args:
+        question: User's question
+
+    Returns:
+        Normalized question
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = _SPACE.sub(" ", text).strip()
+    return _TRAILING.sub("", text)
+
+
+class _Call:
+    """A computation in flight and the callers waiting for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs one computation per key at a time and shares its outcome.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it runs wait for it and receive the same
+    result or exception instead of running the function again. Nothing is
+    cached: once the computation finishes, the next caller runs it afresh.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        Initialize the group.
+
+        Args:
+            name: Label of the coalescing metrics
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func, or wait for the identical call already running.
+
+        Args:
+            key: Identifies calls that produce the same result
+            func: Computation to run
+
+        Returns:
+            (result, shared) where shared is True if another caller's
+            computation was reused
+
+        Raises:
+            Whatever func raised, for the leader and every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+        metrics.inc(
+            "singleflight_calls_total", 1,
+            "Calls by whether they ran or joined an identical call in flight",
+            group=self.name, outcome="leader" if leader else "coalesced"
+        )
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Coalescing counters.
+
+        Returns:
+            Dictionary with 'leaders' (calls that ran), 'coalesced' (calls
+            that joined one in flight) and 'coalescing_rate'
+        """
+        with self._lock:
+            total = self._leaders + self._coalesced
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "coalescing_rate": self._coalesced / total if total else 0.0,
+            }
+
+
+# Shared by every QAChainManager in the process
+questions = SingleFlight("qa")
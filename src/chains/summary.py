@@ -0,0 +1,220 @@
+"""Map-reduce document summaries and routing of overview questions to them."""
+import os
+import re
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_SUMMARY_TEMPLATE = """以下はドキュメントの{start_page}〜{end_page}ページの内容です。
+重要な事実・主張・数値を落とさずに、簡潔に要約してください。
+
+内容:
+{text}
+
+要約:"""
+
+COMBINE_SUMMARY_TEMPLATE = """以下はドキュメントの各部分の要約です。
+これらを統合して、全体の要約を作成してください。
+
+{summaries}
+
+要約:"""
+
+SUMMARY_ANSWER_TEMPLATE = """以下はドキュメントの要約です。この要約だけを使用して、質問に答えてください。
+要約から答えられない場合は、「{fallback}」とだけ答えてください。
+
+ドキュメント全体の要約:
+{document_summary}
+
+部分ごとの要約:
+{section_summaries}
+
+質問: {question}
+
+回答:"""
+
+# Reply that sends a question on to retrieval
+FALLBACK_MARKER = "NEED_DETAILS"
+
+# Questions about the document as a whole rather than a detail of it
+_OVERVIEW = re.compile(
+    r"要約|要点|概要|まとめ|全体像|あらすじ|何について|どんな内容|何が書かれ"
+    r"|summar|overview|tl;?dr|main points|key points|what is (this|the) (document|paper|file|pdf) about",
+    re.IGNORECASE
+)
+
+
+def is_overview_question(question: str) -> bool:
+    """
+    Whether a question asks for an overview of the document.
+
+    Args:
+        question: User's question
+
+    Returns:
+        True if the question should be answered from the summaries
+    """
+    return bool(_OVERVIEW.search(question))
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def group_pages(
+    chunks: List,
+    pages_per_group: int,
+    max_chars: int
+) -> List[Tuple[int, int, str]]:
+    """
+    Join chunk text into groups of consecutive pages.
+
+    A group ends after pages_per_group pages or before it would exceed
+    max_chars; a single page longer than max_chars is truncated.
+
+    Args:
+        chunks: Chunks with a 'page' metadata entry, in document order
+        pages_per_group: Maximum pages per group
+        max_chars: Maximum characters per group
+
+    Returns:
+        List of (start page, end page, text)
+    """
+    pages: Dict[int, List[str]] = {}
+    for chunk in chunks:
+        pages.setdefault(chunk.metadata.get("page") or 0, []).append(chunk.page_content)
+
+    groups = []
+    start, end, parts, size = None, None, [], 0
+    for page in sorted(pages):
+        text = "\n".join(pages[page])[:max_chars]
+        if parts and (page - start >= pages_per_group or size + len(text) > max_chars):
+            groups.append((start, end, "\n".join(parts)))
+            parts, size = [], 0
+        if not parts:
+            start = page
+        end = page
+        parts.append(text)
+        size += len(text)
+    if parts:
+        groups.append((start, end, "\n".join(parts)))
+    return groups
+
+
+def build_summary_tree(
+    chunks: List,
+    llm,
+    pages_per_group: int = None,
+    max_chars: int = None,
+    fan_in: int = None,
+    previous: Optional[Dict[str, str]] = None,
+    max_concurrency: int = 4
+) -> List[Dict]:
+    """
+    Summarize a document bottom-up: page groups, then summaries of summaries.
+
+    Page groups are summarized in parallel (map); every fan_in consecutive
+    summaries are then combined (reduce) until a single document summary
+    remains. Each summary is keyed by a hash of its input, so summaries of
+    unchanged page groups of a previous version are reused.
+
+    Args:
+        chunks: Chunks of the document with 'page' metadata, in document order
+        llm: Chat model
+        pages_per_group: Pages per page group summary
+            (default from env: SUMMARY_PAGES_PER_GROUP, 10)
+        max_chars: Maximum characters sent per map call
+            (default from env: SUMMARY_MAX_CHARS, 8000)
+        fan_in: Summaries combined per reduce call
+            (default from env: SUMMARY_FAN_IN, 8)
+        previous: Summary text by source hash, from a previous version
+        max_concurrency: Parallel LLM calls
+
+    Returns:
+        Dicts with 'level', 'start_page', 'end_page', 'content' and
+        'source_hash'; the last one is the document summary
+    """
+    pages_per_group = pages_per_group or int(os.getenv("SUMMARY_PAGES_PER_GROUP", "10"))
+    max_chars = max_chars or int(os.getenv("SUMMARY_MAX_CHARS", "8000"))
+    fan_in = max(2, fan_in or int(os.getenv("SUMMARY_FAN_IN", "8")))
+    previous = previous or {}
+
+    def summarize(nodes: List[Dict], prompts: List[str]) -> List[Dict]:
+        missing = [i for i, node in enumerate(nodes) if node["source_hash"] not in previous]
+        if missing:
+            replies = llm.batch([prompts[i] for i in missing], config={"max_concurrency": max_concurrency})
+            for i, reply in zip(missing, replies):
+                nodes[i]["content"] = reply.content.strip()
+        for i, node in enumerate(nodes):
+            if i not in missing:
+                node["content"] = previous[node["source_hash"]]
+        logger.info(f"Summarized {len(missing)} sections, reused {len(nodes) - len(missing)}")
+        return nodes
+
+    groups = group_pages(chunks, pages_per_group, max_chars)
+    if not groups:
+        return []
+    level = summarize(
+        [
+            {"level": 0, "start_page": start, "end_page": end, "source_hash": _hash(text)}
+            for start, end, text in groups
+        ],
+        [
+            PAGE_SUMMARY_TEMPLATE.format(start_page=start + 1, end_page=end + 1, text=text)
+            for start, end, text in groups
+        ]
+    )
+
+    tree = list(level)
+    while len(level) > 1:
+        batches = [level[i:i + fan_in] for i in range(0, len(level), fan_in)]
+        texts = [
+            "\n\n".join(
+                f"[{node['start_page'] + 1}〜{node['end_page'] + 1}ページ]\n{node['content']}"
+                for node in batch
+            )
+            for batch in batches
+        ]
+        level = summarize(
+            [
+                {
+                    "level": batch[0]["level"] + 1,
+                    "start_page": batch[0]["start_page"],
+                    "end_page": batch[-1]["end_page"],
+                    "source_hash": _hash(text),
+                }
+                for batch, text in zip(batches, texts)
+            ],
+            [COMBINE_SUMMARY_TEMPLATE.format(summaries=text) for text in texts]
+        )
+        tree.extend(level)
+    return tree
+
+
+def summary_prompt(question: str, summaries: List, max_sections: int = 20) -> str:
+    """
+    Build the prompt that answers a question from a summary tree.
+
+    Args:
+        question: User's question
+        summaries: DocumentSummary records ordered by level; the last is the
+            document summary
+        max_sections: Page group summaries included at most
+
+    Returns:
+        Prompt text
+    """
+    document = summaries[-1]
+    sections = [s for s in summaries if s.level == 0 and s is not document][:max_sections]
+    section_text = "\n\n".join(
+        f"[{s.start_page + 1}〜{s.end_page + 1}ページ]\n{s.content}" for s in sections
+    ) or "（なし）"
+    return SUMMARY_ANSWER_TEMPLATE.format(
+        fallback=FALLBACK_MARKER,
+        document_summary=document.content,
+        section_summaries=section_text,
+        question=question
+    )
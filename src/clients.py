@@ -0,0 +1,310 @@
+"""Process-wide registry of pooled API clients."""
+import os
+import atexit
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from .observability import metrics
+from .scheduler import AdmissionScheduler, estimate_tokens, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """
+    Shares HTTP connection pools between every chat model and embeddings.
+
+    Each ChatOpenAI or OpenAIEmbeddings would otherwise build its own OpenAI
+    client and with it its own connection pool, so every Streamlit session
+    starts with cold TLS connections. The registry owns one httpx.Client
+    (thread-safe, so sessions' threads can share it) and one OpenAI client
+    per API key and base URL on top of it; models borrow those instead.
+    Streaming and other async calls get the same from one httpx.AsyncClient
+    and AsyncOpenAI clients on top of it.
+
+    Requests and newly opened connections are counted, so connection reuse
+    can be verified with stats() or the llm_http_* metrics.
+
+    Every chat and embedding request waits for admission by its API's
+    AdmissionScheduler before it is sent, and 429 responses pause that
+    scheduler (see scheduler).
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        timeout: float = None,
+        connect_timeout: float = None,
+        max_retries: int = None,
+        schedulers: Optional[Dict[str, AdmissionScheduler]] = None
+    ):
+        """
+        Initialize the registry; clients are created on first use.
+
+        Args:
+            pool_size: Maximum open connections per host
+                (default from env: LLM_POOL_SIZE, 20)
+            timeout: Seconds to wait for a response
+                (default from env: LLM_TIMEOUT, 60)
+            connect_timeout: Seconds to wait for a connection
+                (default from env: LLM_CONNECT_TIMEOUT, 10)
+            max_retries: Retries of failed API requests
+                (default from env: LLM_MAX_RETRIES, 2)
+            schedulers: Scheduler per API kind ('chat', 'embedding')
+                (default: the process-wide get_scheduler() instances)
+        """
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", "20"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+        self.connect_timeout = connect_timeout or float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.max_retries = (
+            max_retries if max_retries is not None
+            else int(os.getenv("LLM_MAX_RETRIES", "2"))
+        )
+
+        self._schedulers = schedulers
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._async_http_client = None
+        self._openai_clients: Dict[Tuple[str, str], object] = {}
+        self._async_openai_clients: Dict[Tuple[str, str], object] = {}
+        self._requests = 0
+        self._connections_opened = 0
+
+    def _timeout(self):
+        import httpx
+
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def http_client(self):
+        """
+        Get the shared pooled HTTP client.
+
+        Returns:
+            httpx.Client keeping up to pool_size connections alive
+        """
+        if self._http_client is None:
+            import httpx
+
+            with self._lock:
+                if self._http_client is None:
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size
+                        ),
+                        timeout=self._timeout(),
+                        event_hooks={"request": [self._on_request], "response": [self._on_response]}
+                    )
+                    logger.info(f"Created pooled HTTP client with {self.pool_size} connections")
+        return self._http_client
+
+    def async_http_client(self):
+        """
+        Get the shared pooled async HTTP client.
+
+        Its connections belong to the event loop they were opened on, so it
+        is meant for one long-running loop such as the API server's.
+
+        Returns:
+            httpx.AsyncClient keeping up to pool_size connections alive
+        """
+        if self._async_http_client is None:
+            import httpx
+
+            with self._lock:
+                if self._async_http_client is None:
+                    self._async_http_client = httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size
+                        ),
+                        timeout=self._timeout(),
+                        event_hooks={"request": [self._on_async_request], "response": [self._on_async_response]}
+                    )
+                    logger.info(f"Created pooled async HTTP client with {self.pool_size} connections")
+        return self._async_http_client
+
+    def openai_client(self, api_key: str, base_url: Optional[str] = None):
+        """
+        Get the shared OpenAI client for an API key and base URL.
+
+        Args:
+            api_key: OpenAI API key
+            base_url: OpenAI-compatible API base URL (None for the OpenAI API)
+
+        Returns:
+            openai.OpenAI instance using the pooled HTTP client
+        """
+        key = (api_key, base_url or "")
+        client = self._openai_clients.get(key)
+        if client is None:
+            import openai
+
+            http_client = self.http_client()
+            with self._lock:
+                client = self._openai_clients.get(key)
+                if client is None:
+                    client = openai.OpenAI(
+                        api_key=api_key,
+                        base_url=base_url or None,
+                        timeout=self._timeout(),
+                        max_retries=self.max_retries,
+                        http_client=http_client
+                    )
+                    self._openai_clients[key] = client
+        return client
+
+    def async_openai_client(self, api_key: str, base_url: Optional[str] = None):
+        """
+        Get the shared async OpenAI client for an API key and base URL.
+
+        Args:
+            api_key: OpenAI API key
+            base_url: OpenAI-compatible API base URL (None for the OpenAI API)
+
+        Returns:
+            openai.AsyncOpenAI instance using the pooled async HTTP client
+        """
+        key = (api_key, base_url or "")
+        client = self._async_openai_clients.get(key)
+        if client is None:
+            import openai
+
+            http_client = self.async_http_client()
+            with self._lock:
+                client = self._async_openai_clients.get(key)
+                if client is None:
+                    client = openai.AsyncOpenAI(
+                        api_key=api_key,
+                        base_url=base_url or None,
+                        timeout=self._timeout(),
+                        max_retries=self.max_retries,
+                        http_client=http_client
+                    )
+                    self._async_openai_clients[key] = client
+        return client
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Connection reuse counters.
+
+        Returns:
+            Dictionary with 'requests', 'connections_opened' and
+            'connections_reused' (requests sent on an existing connection)
+        """
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "connections_opened": self._connections_opened,
+                "connections_reused": self._requests - self._connections_opened,
+            }
+
+    def close(self):
+        """Close the pooled connections (async ones only by aclose())."""
+        with self._lock:
+            http_client = self._http_client
+            self._http_client = None
+            self._openai_clients.clear()
+        if http_client is not None:
+            http_client.close()
+
+    async def aclose(self):
+        """Close the pooled async connections; call on the loop that used them."""
+        with self._lock:
+            http_client = self._async_http_client
+            self._async_http_client = None
+            self._async_openai_clients.clear()
+        if http_client is not None:
+            await http_client.aclose()
+
+    def scheduler(self, kind: str) -> AdmissionScheduler:
+        """Admission scheduler of an API kind ('chat' or 'embedding')."""
+        if self._schedulers is not None:
+            return self._schedulers[kind]
+        return get_scheduler(kind)
+
+    def _on_request(self, request):
+        kind = _api_kind(request)
+        if kind is not None:
+            scheduler = self.scheduler(kind)
+            tokens = estimate_tokens(kind, request.content) if scheduler.counts_tokens else 0
+            scheduler.acquire(tokens)
+
+        self._count_request()
+        # The connection pool reports TCP connects through the trace extension
+        request.extensions["trace"] = self._trace
+
+    async def _on_async_request(self, request):
+        kind = _api_kind(request)
+        if kind is not None:
+            scheduler = self.scheduler(kind)
+            tokens = estimate_tokens(kind, request.content) if scheduler.counts_tokens else 0
+            # Waiting for admission blocks; the worker thread gets a copy of
+            # the context, so the caller's priority() still applies
+            await asyncio.to_thread(scheduler.acquire, tokens)
+
+        self._count_request()
+        request.extensions["trace"] = self._async_trace
+
+    async def _on_async_response(self, response):
+        self._on_response(response)
+
+    def _count_request(self):
+        with self._lock:
+            self._requests += 1
+        metrics.inc("llm_http_requests_total", 1, "Requests sent to the LLM and embedding APIs")
+
+    def _on_response(self, response):
+        kind = _api_kind(response.request)
+        if kind is not None and response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("retry-after", "1"))
+            except ValueError:
+                retry_after = 1.0
+            self.scheduler(kind).rate_limited(retry_after)
+
+    def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+            metrics.inc(
+                "llm_http_connections_opened_total", 1,
+                "Connections opened to the LLM and embedding APIs"
+            )
+
+    async def _async_trace(self, event_name: str, info: Dict):
+        self._trace(event_name, info)
+
+
+def _api_kind(request) -> Optional[str]:
+    """API kind a request is admitted under, or None if it is not scheduled."""
+    path = request.url.path.rstrip("/")
+    if path.endswith("/chat/completions"):
+        return "chat"
+    if path.endswith("/embeddings"):
+        return "embedding"
+    return None
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """
+    Get the process-wide client registry.
+
+    Its connections are closed when the interpreter exits.
+
+    Returns:
+        Shared ClientRegistry instance
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+                atexit.register(_registry.close)
+    return _registry
@@ -2,34 +2,186 @@
 import os
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 
 class Config:
     """Application configuration."""
 
     # OpenAI
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: str = ""
+    LLM_POOL_SIZE: int = 20
+    LLM_TIMEOUT: float = 60.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_MAX_RETRIES: int = 2
+
+    # API admission control (0 = no limit)
+    LLM_REQUESTS_PER_MINUTE: float = 0
+    LLM_TOKENS_PER_MINUTE: float = 0
+    EMBEDDING_REQUESTS_PER_MINUTE: float = 0
+    EMBEDDING_TOKENS_PER_MINUTE: float = 0
+    LLM_QUEUE_TIMEOUT: float = 120.0
 
     # Embedding
-    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
-    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    TEXT_SPLITTER: str = "recursive"
+    CHUNK_SIZE_TOKENS: int = 300
+    CHUNK_OVERLAP_TOKENS: int = 60
+
+    # Deduplication
+    DEDUP_ENABLED: bool = True
+    DEDUP_MAX_DISTANCE: int = 3
+
+    # Retrieval
+    RETRIEVAL_ADAPTIVE: bool = True
+    RETRIEVAL_FETCH_K: int = 12
+    RETRIEVAL_MIN_K: int = 1
+    RETRIEVAL_SCORE_THRESHOLD: float = 0.3
+    RETRIEVAL_LEXICAL_WEIGHT: float = 0.3
+    RETRIEVAL_MAX_GAP: float = 0.1
+    QA_COALESCE_ENABLED: bool = True
+
+    # Summaries for overview questions
+    SUMMARY_ENABLED: bool = False
+    SUMMARY_ROUTING_ENABLED: bool = True
+    SUMMARY_MODEL: str = "gpt-3.5-turbo"
+    SUMMARY_MAX_TOKENS: int = 500
+    SUMMARY_PAGES_PER_GROUP: int = 10
+    SUMMARY_MAX_CHARS: int = 8000
+    SUMMARY_FAN_IN: int = 8
+
+    # Caches
+    TEXT_STORE_DIRECTORY: str = "/app/data/extracted"
+    EMBEDDING_CACHE_DIR: str = ""
 
     # Vector Store
-    CHROMA_PERSIST_DIRECTORY: str = os.getenv(
-        "CHROMA_PERSIST_DIRECTORY",
-        "/app/data/vectorstore"
-    )
+    CHROMA_PERSIST_DIRECTORY: str = "/app/data/vectorstore"
+    VECTOR_WRITE_BATCH_SIZE: int = 500
 
     # Database
-    DB_PATH: str = os.getenv("DB_PATH", "/app/data/doc-sage.db")
+    DB_PATH: str = "/app/data/doc-sage.db"
+    DB_COMPRESSION: str = "auto"
+
+    # Conversation write buffer
+    CONVERSATION_BUFFER_ENABLED: bool = True
+    CONVERSATION_FLUSH_SIZE: int = 50
+    CONVERSATION_FLUSH_INTERVAL: float = 1.0
+
+    # Chat history in the UI
+    CHAT_WINDOW_TURNS: int = 10
+    CHAT_PAGE_TURNS: int = 10
+
+    # Uploads
+    UPLOAD_DIRECTORY: str = "/app/data/documents"
+    UPLOAD_MAX_MB: float = 200.0
+    UPLOAD_MAX_PAGES: int = 0
+
+    # HTTP API
+    API_HOST: str = "127.0.0.1"
+    API_PORT: int = 8000
+    API_MAX_CONCURRENT_ASKS: int = 8
+    API_MAX_CONCURRENT_INGESTS: int = 2
+    API_QUEUE_TIMEOUT: float = 30.0
 
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: str = "INFO"
+
+    # Metrics
+    USAGE_ACCOUNTING_ENABLED: bool = True
+    METRICS_ENABLED: bool = False
+    METRICS_PORT: int = 0
+    METRICS_FILE: str = ""
+
+    # Profiling
+    PROFILE_ENABLED: bool = False
+    PROFILE_DIR: str = "/app/data/profiles"
+
+    _initialized: bool = False
+
+    @classmethod
+    def load(cls):
+        """Read configuration values from environment variables."""
+        cls.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+        cls.OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+        cls.LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+        cls.LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+        cls.LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        cls.LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        cls.LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+        cls.LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+        cls.EMBEDDING_REQUESTS_PER_MINUTE = float(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "0"))
+        cls.EMBEDDING_TOKENS_PER_MINUTE = float(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "0"))
+        cls.LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+        cls.EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+        cls.CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+        cls.CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+        cls.TEXT_SPLITTER = os.getenv("TEXT_SPLITTER", "recursive")
+        cls.CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "300"))
+        cls.CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+        cls.DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+        cls.RETRIEVAL_ADAPTIVE = os.getenv("RETRIEVAL_ADAPTIVE", "true").lower() == "true"
+        cls.RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "12"))
+        cls.RETRIEVAL_MIN_K = int(os.getenv("RETRIEVAL_MIN_K", "1"))
+        cls.RETRIEVAL_SCORE_THRESHOLD = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.3"))
+        cls.RETRIEVAL_LEXICAL_WEIGHT = float(os.getenv("RETRIEVAL_LEXICAL_WEIGHT", "0.3"))
+        cls.RETRIEVAL_MAX_GAP = float(os.getenv("RETRIEVAL_MAX_GAP", "0.1"))
+        cls.QA_COALESCE_ENABLED = os.getenv("QA_COALESCE_ENABLED", "true").lower() == "true"
+        cls.SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+        cls.SUMMARY_ROUTING_ENABLED = os.getenv("SUMMARY_ROUTING_ENABLED", "true").lower() == "true"
+        cls.SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-3.5-turbo")
+        cls.SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "500"))
+        cls.SUMMARY_PAGES_PER_GROUP = int(os.getenv("SUMMARY_PAGES_PER_GROUP", "10"))
+        cls.SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "8000"))
+        cls.SUMMARY_FAN_IN = int(os.getenv("SUMMARY_FAN_IN", "8"))
+        cls.DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+        cls.TEXT_STORE_DIRECTORY = os.getenv("TEXT_STORE_DIRECTORY", "/app/data/extracted")
+        cls.EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+        cls.CHROMA_PERSIST_DIRECTORY = os.getenv(
+            "CHROMA_PERSIST_DIRECTORY",
+            "/app/data/vectorstore"
+        )
+        cls.VECTOR_WRITE_BATCH_SIZE = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "500"))
+        cls.DB_PATH = os.getenv("DB_PATH", "/app/data/doc-sage.db")
+        cls.DB_COMPRESSION = os.getenv("DB_COMPRESSION", "auto")
+        cls.CONVERSATION_BUFFER_ENABLED = os.getenv("CONVERSATION_BUFFER_ENABLED", "true").lower() == "true"
+        cls.CONVERSATION_FLUSH_SIZE = int(os.getenv("CONVERSATION_FLUSH_SIZE", "50"))
+        cls.CONVERSATION_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "1.0"))
+        cls.CHAT_WINDOW_TURNS = int(os.getenv("CHAT_WINDOW_TURNS", "10"))
+        cls.CHAT_PAGE_TURNS = int(os.getenv("CHAT_PAGE_TURNS", "10"))
+        cls.UPLOAD_DIRECTORY = os.getenv("UPLOAD_DIRECTORY", "/app/data/documents")
+        cls.UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "200"))
+        cls.UPLOAD_MAX_PAGES = int(os.getenv("UPLOAD_MAX_PAGES", "0"))
+        cls.API_HOST = os.getenv("API_HOST", "127.0.0.1")
+        cls.API_PORT = int(os.getenv("API_PORT", "8000"))
+        cls.API_MAX_CONCURRENT_ASKS = int(os.getenv("API_MAX_CONCURRENT_ASKS", "8"))
+        cls.API_MAX_CONCURRENT_INGESTS = int(os.getenv("API_MAX_CONCURRENT_INGESTS", "2"))
+        cls.API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+        cls.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+        cls.USAGE_ACCOUNTING_ENABLED = os.getenv("USAGE_ACCOUNTING_ENABLED", "true").lower() == "true"
+        cls.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+        cls.METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+        cls.METRICS_FILE = os.getenv("METRICS_FILE", "")
+        cls.PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+        cls.PROFILE_DIR = os.getenv("PROFILE_DIR", "/app/data/profiles")
+
+    @classmethod
+    def initialize(cls):
+        """
+        Load the .env file, read configuration and set up logging.
+
+        Safe to call on every Streamlit rerun; only the first call does any work.
+        """
+        if cls._initialized:
+            return
+
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        cls.load()
+        cls.setup_logging()
+        cls._initialized = True
 
     @classmethod
     def setup_logging(cls):
@@ -51,5 +203,5 @@ class Config:
         Path(cls.DB_PATH).parent.mkdir(parents=True, exist_ok=True)
 
 
-# Initialize logging
-Config.setup_logging()
\ No newline at end of file
+# Read process environment (cheap); .env loading is deferred to initialize()
+Config.load()
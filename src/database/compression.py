@@ -0,0 +1,261 @@
+"""
+Transparent compression of large text columns.
+
+Values are stored as a BLOB whose first byte names the format, followed by
+the payload:
+
+    0x00  UTF-8 text, uncompressed (short or incompressible values)
+    0x01  zlib-compressed UTF-8 text
+    0x02  zstd-compressed UTF-8 text (requires the zstandard package)
+
+Rows written before compression was added hold plain TEXT and are read
+unchanged, so the columns can be migrated in place (see compress_database).
+"""
+import os
+import zlib
+import logging
+import importlib.util
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import LargeBinary, text
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+
+FORMAT_RAW = 0
+FORMAT_ZLIB = 1
+FORMAT_ZSTD = 2
+
+CODEC_FORMATS = {"none": FORMAT_RAW, "zlib": FORMAT_ZLIB, "zstd": FORMAT_ZSTD}
+
+# Shorter values gain less than the header costs
+MIN_COMPRESS_BYTES = 128
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_zstd_compressor = None
+_zstd_decompressor = None
+
+
+def zstd_available() -> bool:
+    """Whether the zstandard package is installed."""
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def default_codec() -> str:
+    """
+    Get the codec new values are written with.
+
+    Returns:
+        'none', 'zlib' or 'zstd' (default from env: DB_COMPRESSION, 'auto':
+        zstd if installed, otherwise zlib)
+
+    Raises:
+        ValueError: If DB_COMPRESSION is not a known codec, or is 'zstd'
+            without the zstandard package
+    """
+    codec = os.getenv("DB_COMPRESSION", "auto").lower()
+    if codec == "auto":
+        return "zstd" if zstd_available() else "zlib"
+    if codec not in CODEC_FORMATS:
+        raise ValueError(f"Unknown DB_COMPRESSION: {codec} (expected auto, none, zlib or zstd)")
+    if codec == "zstd" and not zstd_available():
+        raise ValueError("DB_COMPRESSION=zstd requires the zstandard package")
+    return codec
+
+
+def _zstd():
+    global _zstd_compressor, _zstd_decompressor
+    if _zstd_compressor is None:
+        import zstandard
+
+        _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    return _zstd_compressor, _zstd_decompressor
+
+
+def compress_text(value: str, codec: Optional[str] = None) -> bytes:
+    """
+    Encode text for a compressed column.
+
+    Values that are short or do not shrink are stored uncompressed.
+
+    Args:
+        value: Text to store
+        codec: 'none', 'zlib' or 'zstd' (default: default_codec())
+
+    Returns:
+        Format byte followed by the payload
+    """
+    codec = codec or default_codec()
+    raw = value.encode("utf-8")
+    if codec == "none" or len(raw) < MIN_COMPRESS_BYTES:
+        return bytes([FORMAT_RAW]) + raw
+
+    if codec == "zstd":
+        payload = _zstd()[0].compress(raw)
+    else:
+        payload = zlib.compress(raw, ZLIB_LEVEL)
+    if len(payload) >= len(raw):
+        return bytes([FORMAT_RAW]) + raw
+    return bytes([CODEC_FORMATS[codec]]) + payload
+
+
+def decompress_text(value: Union[str, bytes]) -> str:
+    """
+    Decode a value read from a compressed column.
+
+    Args:
+        value: Stored bytes, or text of a row written before compression
+
+    Returns:
+        The original text
+
+    Raises:
+        ValueError: If the format byte is unknown
+    """
+    if isinstance(value, str):
+        return value
+
+    value = bytes(value)
+    if not value:
+        return ""
+    format_byte, payload = value[0], value[1:]
+    if format_byte == FORMAT_RAW:
+        return payload.decode("utf-8")
+    if format_byte == FORMAT_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if format_byte == FORMAT_ZSTD:
+        return _zstd()[1].decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown compressed text format: {format_byte}")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored compressed.
+
+    Values are compressed when written and decompressed when the column is
+    loaded; combine with deferred() to decompress only on attribute access.
+    Compressed values cannot be compared in SQL (LIKE, equality).
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, codec: Optional[str] = None):
+        """
+        Args:
+            codec: Codec for new values (default: default_codec() on first write)
+        """
+        super().__init__()
+        self.codec = codec
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, self.codec)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+    @property
+    def python_type(self):
+        return str
+
+
+def compressed_columns(metadata) -> List[Tuple[str, List[str]]]:
+    """
+    Tables with CompressedText columns.
+
+    Args:
+        metadata: SQLAlchemy MetaData
+
+    Returns:
+        (table name, column names) pairs
+    """
+    tables = []
+    for table in metadata.sorted_tables:
+        columns = [c.name for c in table.columns if isinstance(c.type, CompressedText)]
+        if columns:
+            tables.append((table.name, columns))
+    return tables
+
+
+def compress_database(
+    db_path: str = None,
+    codec: Optional[str] = None,
+    batch_size: int = 1000,
+    vacuum: bool = True
+) -> Dict:
+    """
+    Rewrite existing rows of compressed columns with a codec.
+
+    Plain-text rows from before compression, and rows written with another
+    codec, are re-encoded; each batch is committed on its own, so the
+    migration can be interrupted and run again. SQLite only returns the
+    freed pages to the file system on VACUUM.
+
+    Args:
+        db_path: Path to SQLite database file (default from env: DB_PATH)
+        codec: Target codec; 'none' decompresses (default: default_codec())
+        batch_size: Rows per transaction
+        vacuum: Run VACUUM afterwards to shrink the file
+
+    Returns:
+        Summary with rows scanned, values rewritten and file sizes in bytes
+    """
+    from .init_db import get_database_url, get_session
+    from .models import Base
+
+    codec = codec or default_codec()
+    if codec not in CODEC_FORMATS:
+        raise ValueError(f"Unknown codec: {codec} (expected none, zlib or zstd)")
+    db = get_session(db_path)
+    path = get_database_url(db_path)[len("sqlite:///"):]
+    summary = {"codec": codec, "rows": 0, "rewritten": 0, "bytes_before": os.path.getsize(path)}
+    try:
+        for table, columns in compressed_columns(Base.metadata):
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            assignments = ", ".join(f'"{c}" = :{c}' for c in columns)
+            last_id = 0
+            while True:
+                rows = db.execute(
+                    text(f'SELECT id, {column_list} FROM "{table}" WHERE id > :last ORDER BY id LIMIT :limit'),
+                    {"last": last_id, "limit": batch_size}
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                summary["rows"] += len(rows)
+
+                updates = []
+                for row in rows:
+                    values = {
+                        c: compress_text(decompress_text(v), codec) if v is not None else None
+                        for c, v in zip(columns, row[1:])
+                    }
+                    # Rows already in the target encoding are left alone
+                    stored = [bytes(v) if isinstance(v, (bytes, memoryview)) else v for v in row[1:]]
+                    if list(values.values()) != stored:
+                        updates.append({"id": row[0], **values})
+
+                if updates:
+                    db.execute(text(f'UPDATE "{table}" SET {assignments} WHERE id = :id'), updates)
+                    db.commit()
+                    summary["rewritten"] += len(updates)
+            logger.info(f"Compressed {table}: {summary['rewritten']} rows rewritten so far")
+
+        if vacuum:
+            db.commit()
+            with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.exec_driver_sql("VACUUM")
+    finally:
+        db.close()
+
+    summary["bytes_after"] = os.path.getsize(path)
+    logger.info(f"Database compression finished: {summary}")
+    return summary
@@ -1,10 +1,12 @@
 """CRUD operations for database models."""
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, undefer
 
-from .models import Document, Conversation, DocumentChunk
+from .models import Document, Conversation, DocumentChunk, DocumentSummary, UsageStat
+from ..observability import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,13 +15,15 @@ logger = logging.getLogger(__name__)
 # Document CRUD
 # ============================================
 
+@metrics.timed("db_write")
 def create_document(
     db: Session,
     filename: str,
     file_path: str,
     file_type: str,
     file_size: int = None,
-    status: str = "processing"
+    status: str = "processing",
+    parent_id: int = None
 ) -> Document:
     """
     Create a new document record.
@@ -31,16 +35,26 @@ def create_document(
         file_type: Type of file (e.g., 'pdf')
         file_size: Size of file in bytes
         status: Processing status
+        parent_id: Previous version of this document (optional)
 
     Returns:
         Created Document instance
     """
+    version = 1
+    if parent_id is not None:
+        parent = get_document(db, parent_id)
+        if parent is None:
+            raise ValueError(f"Document {parent_id} not found")
+        version = (parent.version or 1) + 1
+
     document = Document(
         filename=filename,
         file_path=file_path,
         file_type=file_type,
         file_size=file_size,
-        status=status
+        status=status,
+        parent_id=parent_id,
+        version=version
     )
     db.add(document)
     db.commit()
@@ -81,6 +95,55 @@ def get_documents(
     return query.offset(skip).limit(limit).all()
 
 
+def get_latest_version(db: Session, filename: str) -> Optional[Document]:
+    """
+    Get the current completed version of a document by file name.
+
+    Args:
+        db: Database session
+        filename: Name of the file
+
+    Returns:
+        Most recent completed Document with that name, or None
+    """
+    return (
+        db.query(Document)
+        .filter(Document.filename == filename, Document.status == "completed")
+        .order_by(Document.id.desc())
+        .first()
+    )
+
+
+def get_documents_by_file_path(
+    db: Session,
+    file_paths: List[str],
+    batch_size: int = 500
+) -> Dict[str, Document]:
+    """
+    Get the latest document for each file path.
+
+    Args:
+        db: Database session
+        file_paths: File paths to look up
+        batch_size: Number of paths per query
+
+    Returns:
+        Dictionary of file path to its most recently created Document
+    """
+    documents: Dict[str, Document] = {}
+    for begin in range(0, len(file_paths), batch_size):
+        batch = file_paths[begin:begin + batch_size]
+        query = (
+            db.query(Document)
+            .filter(Document.file_path.in_(batch))
+            .order_by(Document.id.asc())
+        )
+        for document in query:
+            documents[document.file_path] = document
+    return documents
+
+
+@metrics.timed("db_write")
 def update_document_status(
     db: Session,
     document_id: int,
@@ -107,6 +170,7 @@ def update_document_status(
     return document
 
 
+@metrics.timed("db_write")
 def delete_document(db: Session, document_id: int) -> bool:
     """
     Delete a document.
@@ -132,6 +196,7 @@ def delete_document(db: Session, document_id: int) -> bool:
 # Conversation CRUD
 # ============================================
 
+@metrics.timed("db_write")
 def create_conversation(
     db: Session,
     session_id: str,
@@ -166,6 +231,27 @@ def create_conversation(
     return conversation
 
 
+@metrics.timed("db_write")
+def create_conversations(db: Session, conversations: List[Dict]) -> int:
+    """
+    Create several conversation records in one transaction.
+
+    Args:
+        db: Database session
+        conversations: Dicts with 'session_id', 'user_message',
+            'assistant_message' and optionally 'document_id', 'source_refs'
+            (JSON) and 'created_at'
+
+    Returns:
+        Number of records created
+    """
+    db.add_all([Conversation(**conversation) for conversation in conversations])
+    db.commit()
+
+    logger.info(f"Created {len(conversations)} conversations")
+    return len(conversations)
+
+
 def get_conversations_by_session(
     db: Session,
     session_id: str,
@@ -191,6 +277,81 @@ def get_conversations_by_session(
     )
 
 
+def get_conversations_page(
+    db: Session,
+    session_id: str,
+    before: Optional[datetime] = None,
+    limit: int = 10,
+    document_id: Optional[int] = None,
+    before_id: Optional[int] = None
+) -> List[Conversation]:
+    """
+    Get the most recent conversation records of a session, one page at a time.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+        before: Only records created before this time (the oldest record
+            already shown); None for the latest page
+        limit: Maximum number of records to return
+        document_id: Only records about this document (None for all)
+        before_id: ID of the oldest record already shown; records created
+            at exactly `before` with a smaller ID are then included too
+
+    Returns:
+        List of Conversation instances ordered by creation time (oldest first)
+    """
+    query = db.query(Conversation).filter(Conversation.session_id == session_id)
+    if document_id is not None:
+        query = query.filter(Conversation.document_id == document_id)
+    if before is not None and before_id is not None:
+        # Keyset on (created_at, id), the page order, so ties are not skipped
+        query = query.filter(or_(
+            Conversation.created_at < before,
+            and_(Conversation.created_at == before, Conversation.id < before_id)
+        ))
+    elif before is not None:
+        query = query.filter(Conversation.created_at < before)
+
+    page = (
+        query.order_by(Conversation.created_at.desc(), Conversation.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return list(reversed(page))
+
+
+def get_conversation_id(
+    db: Session,
+    session_id: str,
+    created_at: datetime,
+    user_message: str
+) -> Optional[int]:
+    """
+    Find the ID of a stored turn that was shown before it was written.
+
+    Args:
+        db: Database session
+        session_id: Session identifier
+        created_at: Time the turn was submitted with
+        user_message: User message of the turn
+
+    Returns:
+        Conversation ID or None if the turn is not stored
+    """
+    row = (
+        db.query(Conversation.id)
+        .filter(
+            Conversation.session_id == session_id,
+            Conversation.created_at == created_at,
+            Conversation.user_message == user_message
+        )
+        .order_by(Conversation.id.desc())
+        .first()
+    )
+    return row[0] if row else None
+
+
 def get_conversations_by_document(
     db: Session,
     document_id: int,
@@ -216,6 +377,7 @@ def get_conversations_by_document(
     )
 
 
+@metrics.timed("db_write")
 def delete_conversations_by_session(db: Session, session_id: str) -> int:
     """
     Delete all conversations for a session.
@@ -242,6 +404,7 @@ def delete_conversations_by_session(db: Session, session_id: str) -> int:
 # DocumentChunk CRUD
 # ============================================
 
+@metrics.timed("db_write")
 def create_document_chunk(
     db: Session,
     document_id: int,
@@ -297,6 +460,90 @@ def get_document_chunks(
     )
 
 
+def get_chunks_by_vector_ids(
+    db: Session,
+    vector_ids: List[str]
+) -> Dict[str, DocumentChunk]:
+    """
+    Get chunk records by their vector IDs.
+
+    Args:
+        db: Database session
+        vector_ids: Chroma vector IDs
+
+    Returns:
+        Dictionary of vector ID to DocumentChunk (unknown IDs are left out)
+    """
+    if not vector_ids:
+        return {}
+    chunks = (
+        db.query(DocumentChunk)
+        .options(undefer(DocumentChunk.content))
+        .filter(DocumentChunk.vector_id.in_(vector_ids))
+        .all()
+    )
+    return {chunk.vector_id: chunk for chunk in chunks}
+
+
+@metrics.timed("db_write")
+def replace_document_chunks(
+    db: Session,
+    document_id: int,
+    chunks: List[Dict]
+) -> int:
+    """
+    Replace all chunk records of a document in one transaction.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        chunks: Dicts with 'chunk_index', 'content', 'content_hash' and 'vector_id'
+
+    Returns:
+        Number of records created
+    """
+    db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete()
+    db.add_all([DocumentChunk(document_id=document_id, **chunk) for chunk in chunks])
+    db.commit()
+
+    logger.info(f"Stored {len(chunks)} chunks for document {document_id}")
+    return len(chunks)
+
+
+@metrics.timed("db_write")
+def append_document_chunks(
+    db: Session,
+    document_id: int,
+    chunks: List[Dict]
+) -> int:
+    """
+    Add chunk records after a document's existing ones.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        chunks: Dicts with 'content', 'content_hash' and 'vector_id'
+
+    Returns:
+        Number of records created
+    """
+    last = (
+        db.query(func.max(DocumentChunk.chunk_index))
+        .filter(DocumentChunk.document_id == document_id)
+        .scalar()
+    )
+    start = -1 if last is None else last
+    db.add_all([
+        DocumentChunk(document_id=document_id, chunk_index=start + 1 + i, **chunk)
+        for i, chunk in enumerate(chunks)
+    ])
+    db.commit()
+
+    logger.info(f"Appended {len(chunks)} chunks to document {document_id}")
+    return len(chunks)
+
+
+@metrics.timed("db_write")
 def delete_document_chunks(db: Session, document_id: int) -> int:
     """
     Delete all chunks for a document.
@@ -316,4 +563,214 @@ def delete_document_chunks(db: Session, document_id: int) -> int:
     db.commit()
 
     logger.info(f"Deleted {count} chunks for document {document_id}")
-    return count
\ No newline at end of file
+    return count
+
+
+# ============================================
+# DocumentSummary CRUD
+# ============================================
+
+@metrics.timed("db_write")
+def replace_document_summaries(
+    db: Session,
+    document_id: int,
+    summaries: List[Dict]
+) -> int:
+    """
+    Replace all summary records of a document in one transaction.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        summaries: Dicts with 'level', 'start_page', 'end_page', 'content'
+            and 'source_hash'
+
+    Returns:
+        Number of records created
+    """
+    db.query(DocumentSummary).filter(DocumentSummary.document_id == document_id).delete()
+    db.add_all([DocumentSummary(document_id=document_id, **summary) for summary in summaries])
+    db.commit()
+
+    logger.info(f"Stored {len(summaries)} summaries for document {document_id}")
+    return len(summaries)
+
+
+def get_document_summaries(db: Session, document_id: int) -> List[DocumentSummary]:
+    """
+    Get the summary tree of a document.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+
+    Returns:
+        List of DocumentSummary instances ordered by level and page; the last
+        one is the document summary
+    """
+    return (
+        db.query(DocumentSummary)
+        .filter(DocumentSummary.document_id == document_id)
+        .order_by(DocumentSummary.level, DocumentSummary.start_page)
+        .all()
+    )
+
+
+# ============================================
+# UsageStat CRUD
+# ============================================
+
+@metrics.timed("db_write")
+def record_usage(
+    db: Session,
+    kind: str,
+    model: str,
+    document_id: int = None,
+    session_id: str = None,
+    calls: int = 0,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_hits: int = 0,
+    errors: int = 0,
+    latency_ms: float = 0.0,
+    commit: bool = True
+) -> UsageStat:
+    """
+    Add usage to the aggregate row for a model, document and session.
+
+    Args:
+        db: Database session
+        kind: 'chat' or 'embedding'
+        model: Model name
+        document_id: Document the calls were made for (optional)
+        session_id: Chat session the calls were made for (optional)
+        calls: Number of API calls
+        input_tokens: Prompt or embedded tokens
+        output_tokens: Completion tokens
+        cache_hits: Results served from a cache
+        errors: Failed calls
+        latency_ms: Total call latency in milliseconds
+        commit: Commit the session (False to batch several updates)
+
+    Returns:
+        Updated UsageStat instance
+    """
+    stat = (
+        db.query(UsageStat)
+        .filter(
+            UsageStat.kind == kind,
+            UsageStat.model == model,
+            UsageStat.document_id.is_(document_id) if document_id is None else UsageStat.document_id == document_id,
+            UsageStat.session_id.is_(session_id) if session_id is None else UsageStat.session_id == session_id
+        )
+        .first()
+    )
+
+    if stat is None:
+        stat = UsageStat(
+            kind=kind,
+            model=model,
+            document_id=document_id,
+            session_id=session_id,
+            calls=0,
+            input_tokens=0,
+            output_tokens=0,
+            cache_hits=0,
+            errors=0,
+            latency_ms=0.0
+        )
+        db.add(stat)
+
+    stat.calls += calls
+    stat.input_tokens += input_tokens
+    stat.output_tokens += output_tokens
+    stat.cache_hits += cache_hits
+    stat.errors += errors
+    stat.latency_ms += latency_ms
+
+    if commit:
+        db.commit()
+        db.refresh(stat)
+    else:
+        db.flush()
+
+    return stat
+
+
+def get_usage_stats(
+    db: Session,
+    document_id: int = None,
+    session_id: str = None,
+    kind: str = None
+) -> List[UsageStat]:
+    """
+    Get aggregate usage rows.
+
+    Args:
+        db: Database session
+        document_id: Filter by document (optional)
+        session_id: Filter by chat session (optional)
+        kind: Filter by 'chat' or 'embedding' (optional)
+
+    Returns:
+        List of UsageStat instances
+    """
+    query = db.query(UsageStat)
+
+    if document_id is not None:
+        query = query.filter(UsageStat.document_id == document_id)
+    if session_id is not None:
+        query = query.filter(UsageStat.session_id == session_id)
+    if kind is not None:
+        query = query.filter(UsageStat.kind == kind)
+
+    return query.order_by(UsageStat.kind.asc(), UsageStat.model.asc()).all()
+
+
+def get_usage_totals(
+    db: Session,
+    document_id: int = None,
+    session_id: str = None
+) -> Dict[str, Dict]:
+    """
+    Get usage totals per kind and model.
+
+    Args:
+        db: Database session
+        document_id: Filter by document (optional)
+        session_id: Filter by chat session (optional)
+
+    Returns:
+        Dictionary keyed by 'kind/model' with summed counters and
+        the average latency per call in milliseconds
+    """
+    query = db.query(
+        UsageStat.kind,
+        UsageStat.model,
+        func.sum(UsageStat.calls),
+        func.sum(UsageStat.input_tokens),
+        func.sum(UsageStat.output_tokens),
+        func.sum(UsageStat.cache_hits),
+        func.sum(UsageStat.errors),
+        func.sum(UsageStat.latency_ms)
+    )
+
+    if document_id is not None:
+        query = query.filter(UsageStat.document_id == document_id)
+    if session_id is not None:
+        query = query.filter(UsageStat.session_id == session_id)
+
+    totals = {}
+    for kind, model, calls, input_tokens, output_tokens, cache_hits, errors, latency_ms in (
+        query.group_by(UsageStat.kind, UsageStat.model).all()
+    ):
+        totals[f"{kind}/{model}"] = {
+            "calls": calls,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_hits": cache_hits,
+            "errors": errors,
+            "avg_latency_ms": round(latency_ms / calls, 1) if calls else 0.0
+        }
+
+    return totals
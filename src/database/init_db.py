@@ -1,14 +1,21 @@
 """Database initialization."""
 import os
 import logging
+import threading
+from typing import Dict
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from .models import Base
 
 logger = logging.getLogger(__name__)
 
+# One sessionmaker (and engine) per database URL, created on first use
+_session_factories: Dict[str, sessionmaker] = {}
+_session_factories_lock = threading.Lock()
+
 
 def get_database_url(db_path: str = None) -> str:
     """
@@ -29,6 +36,46 @@ def get_database_url(db_path: str = None) -> str:
     return f"sqlite:///{db_path}"
 
 
+def add_missing_columns(engine: Engine) -> int:
+    """
+    Add model columns that are missing from existing tables.
+
+    create_all() only creates missing tables, so columns and indexes added
+    to a model later are added here. Only nullable columns without
+    server-side constraints are supported, which is what new columns must be.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Number of columns added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = 0
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                ))
+                logger.info(f"Added column {table.name}.{column.name}")
+                added += 1
+
+            # Indexes declared on existing or just added columns
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+    return added
+
+
 def init_database(db_path: str = None) -> sessionmaker:
     """
     Initialize database and create all tables.
@@ -50,6 +97,7 @@ def init_database(db_path: str = None) -> sessionmaker:
 
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
     logger.info("Database tables created successfully")
 
     # Create sessionmaker
@@ -58,6 +106,29 @@ def init_database(db_path: str = None) -> sessionmaker:
     return SessionLocal
 
 
+def get_session_factory(db_path: str = None) -> sessionmaker:
+    """
+    Get the shared sessionmaker for a database, initializing it on first use.
+
+    Args:
+        db_path: Path to SQLite database file (default from env: DB_PATH)
+
+    Returns:
+        SQLAlchemy sessionmaker instance
+    """
+    database_url = get_database_url(db_path)
+
+    SessionLocal = _session_factories.get(database_url)
+    if SessionLocal is None:
+        with _session_factories_lock:
+            SessionLocal = _session_factories.get(database_url)
+            if SessionLocal is None:
+                SessionLocal = init_database(db_path)
+                _session_factories[database_url] = SessionLocal
+
+    return SessionLocal
+
+
 def get_session(db_path: str = None) -> Session:
     """
     Get a database session.
@@ -68,5 +139,5 @@ def get_session(db_path: str = None) -> Session:
     Returns:
         SQLAlchemy Session instance
     """
-    SessionLocal = init_database(db_path)
-    return SessionLocal()
\ No newline at end of file
+    SessionLocal = get_session_factory(db_path)
+    return SessionLocal()
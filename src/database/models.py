@@ -1,8 +1,10 @@
 """SQLAlchemy database models."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+
+from .compression import CompressedText
 
 Base = declarative_base()
 
@@ -18,11 +20,16 @@ class Document(Base):
     file_type = Column(String(50), nullable=False)
     upload_date = Column(DateTime, default=datetime.utcnow)
     file_size = Column(Integer)
-    status = Column(String(50), default="processing")  # processing, completed, failed
+    status = Column(String(50), default="processing")  # processing, completed, failed, superseded
+    # Previous version of the same document; its vectors move to the new version
+    parent_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
+    version = Column(Integer, default=1)
 
     # Relationships
+    parent = relationship("Document", remote_side=[id])
     conversations = relationship("Conversation", back_populates="document")
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
+    summaries = relationship("DocumentSummary", back_populates="document", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Document(id={self.id}, filename='{self.filename}', status='{self.status}')>"
@@ -32,12 +39,16 @@ class Conversation(Base):
     """Conversation history table."""
 
     __tablename__ = "conversations"
+    # Pages of a session's history are read newest first
+    __table_args__ = (Index("ix_conversations_session_created", "session_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(255), nullable=False, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
-    user_message = Column(Text, nullable=False)
-    assistant_message = Column(Text, nullable=False)
+    user_message = Column(CompressedText, nullable=False)
+    assistant_message = Column(CompressedText, nullable=False)
+    # JSON list of {"chunk_id", "document_id", "page"}; chunk text stays in document_chunks
+    source_refs = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -55,11 +66,58 @@ class DocumentChunk(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
     chunk_index = Column(Integer, nullable=False)
-    content = Column(Text, nullable=False)
-    vector_id = Column(String(255))  # Chroma document ID
+    # Loaded (and decompressed) on first access; version diffs only need the hashes
+    content = deferred(Column(CompressedText, nullable=False))
+    content_hash = Column(String(64), index=True)  # SHA-256 of the normalized content
+    vector_id = Column(String(255), index=True)  # Chroma document ID
 
     # Relationships
     document = relationship("Document", back_populates="chunks")
 
     def __repr__(self):
-        return f"<DocumentChunk(id={self.id}, document_id={self.document_id}, chunk_index={self.chunk_index})>"
\ No newline at end of file
+        return f"<DocumentChunk(id={self.id}, document_id={self.document_id}, chunk_index={self.chunk_index})>"
+
+
+class DocumentSummary(Base):
+    """Precomputed map-reduce summaries of a document."""
+
+    __tablename__ = "document_summaries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    # 0 = page group; each higher level summarizes the level below. The single
+    # summary on the highest level is the document summary
+    level = Column(Integer, nullable=False)
+    start_page = Column(Integer)
+    end_page = Column(Integer)
+    content = Column(CompressedText, nullable=False)
+    source_hash = Column(String(64), index=True)  # SHA-256 of the summarized text
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    document = relationship("Document", back_populates="summaries")
+
+    def __repr__(self):
+        return f"<DocumentSummary(id={self.id}, document_id={self.document_id}, level={self.level})>"
+
+
+class UsageStat(Base):
+    """Aggregated LLM and embedding usage per model, document and session."""
+
+    __tablename__ = "usage_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(20), nullable=False)  # chat, embedding
+    model = Column(String(100), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
+    session_id = Column(String(255), nullable=True, index=True)
+    calls = Column(Integer, default=0, nullable=False)
+    input_tokens = Column(Integer, default=0, nullable=False)
+    output_tokens = Column(Integer, default=0, nullable=False)
+    cache_hits = Column(Integer, default=0, nullable=False)
+    errors = Column(Integer, default=0, nullable=False)
+    latency_ms = Column(Float, default=0.0, nullable=False)  # Sum over all calls
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UsageStat(kind='{self.kind}', model='{self.model}', document_id={self.document_id}, calls={self.calls})>"
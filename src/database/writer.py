@@ -0,0 +1,233 @@
+"""Write-behind buffer for conversation records."""
+import os
+import json
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from .init_db import get_session
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriter:
+    """
+    Queues conversation turns in memory and writes them in batches.
+
+    A background thread flushes the queue when it reaches batch_size turns
+    and at least every flush_interval seconds, so the answer path does not
+    wait on the database and concurrent sessions share one commit instead of
+    contending for SQLite's write lock. Turns keep the time they were
+    submitted as created_at.
+
+    Turns are written synchronously when buffering is disabled, after close()
+    and while max_pending turns are already waiting (e.g. the database is
+    failing), so memory stays bounded. A batch that fails max_retries flushes
+    in a row is written turn by turn; turns that still fail are logged and
+    kept in dead_letters instead of being retried forever.
+    """
+
+    def __init__(
+        self,
+        db_path: str = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_pending: int = 10000,
+        max_retries: int = 5,
+        enabled: bool = None
+    ):
+        """
+        Initialize the writer; the background thread starts on first use.
+
+        Args:
+            db_path: Path to SQLite database file (default from env: DB_PATH)
+            batch_size: Turns that trigger a flush
+                (default from env: CONVERSATION_FLUSH_SIZE, 50)
+            flush_interval: Maximum seconds a turn waits before it is written
+                (default from env: CONVERSATION_FLUSH_INTERVAL, 1.0)
+            max_pending: Queued turns beyond which writes become synchronous
+            max_retries: Failed flushes in a row before the queued turns are
+                written one by one and failing turns are set aside
+            enabled: Buffer writes (default from env: CONVERSATION_BUFFER_ENABLED, true)
+        """
+        if enabled is None:
+            enabled = os.getenv("CONVERSATION_BUFFER_ENABLED", "true").lower() == "true"
+        self.db_path = db_path
+        self.batch_size = batch_size or int(os.getenv("CONVERSATION_FLUSH_SIZE", "50"))
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "1.0"))
+        )
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.enabled = enabled
+        # Turns that could not be written, most recent last
+        self.dead_letters: Deque[Dict] = deque(maxlen=max_pending)
+
+        self._pending: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        # Serializes flushes so batches are committed in submission order
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._failures = 0
+
+    def pending(self) -> int:
+        """Number of turns waiting to be written."""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(
+        self,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        document_id: int = None,
+        source_refs: Optional[List[Dict]] = None,
+        created_at: Optional[datetime] = None
+    ):
+        """
+        Queue a conversation turn for writing.
+
+        Args:
+            session_id: Session identifier
+            user_message: User's message
+            assistant_message: Assistant's response
+            document_id: Associated document ID (optional)
+            source_refs: References to the chunks the answer used (optional)
+            created_at: Time of the turn (default: now)
+        """
+        conversation = {
+            "session_id": session_id,
+            "document_id": document_id,
+            "user_message": user_message,
+            "assistant_message": assistant_message,
+            "source_refs": json.dumps(source_refs, ensure_ascii=False) if source_refs else None,
+            "created_at": created_at or datetime.utcnow(),
+        }
+
+        with self._lock:
+            buffered = self.enabled and not self._closed and len(self._pending) < self.max_pending
+            if buffered:
+                self._pending.append(conversation)
+                full = len(self._pending) >= self.batch_size
+                self._ensure_thread()
+
+        if not buffered:
+            self.write_sync(conversation)
+        elif full:
+            self._wakeup.set()
+
+    def write_sync(self, conversation: Dict):
+        """Write one conversation turn immediately."""
+        db = get_session(self.db_path)
+        try:
+            crud.create_conversations(db, [conversation])
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """
+        Write all queued turns in one transaction.
+
+        Returns:
+            Number of turns written; 0 if the write failed, in which case the
+            turns are queued again for the next flush (up to max_retries
+            times, then written one by one)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            db = get_session(self.db_path)
+            try:
+                written = crud.create_conversations(db, batch)
+                self._failures = 0
+                return written
+            except Exception as e:
+                db.rollback()
+                self._failures += 1
+                if self._failures > self.max_retries:
+                    logger.error(f"Failed to write {len(batch)} conversations {self._failures} times: {e}")
+                else:
+                    logger.warning(f"Failed to write {len(batch)} conversations, will retry: {e}")
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    return 0
+            finally:
+                db.close()
+
+            self._failures = 0
+            return self._write_each(batch)
+
+    def _write_each(self, batch: List[Dict]) -> int:
+        """Write turns one by one, setting aside those that fail."""
+        written = 0
+        for conversation in batch:
+            try:
+                self.write_sync(conversation)
+                written += 1
+            except Exception as e:
+                logger.error(
+                    f"Dropped conversation turn of session {conversation['session_id']} "
+                    f"after repeated failures: {e}"
+                )
+                self.dead_letters.append(conversation)
+        return written
+
+    def close(self):
+        """Stop the background thread and write everything still queued."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _ensure_thread(self):
+        # Called with self._lock held
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name="conversation-writer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self.pending():
+                self.flush()
+
+
+_writer: Optional[ConversationWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_conversation_writer() -> ConversationWriter:
+    """
+    Get the process-wide conversation writer.
+
+    It is flushed when the interpreter exits.
+
+    Returns:
+        Shared ConversationWriter instance
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ConversationWriter()
+                atexit.register(_writer.close)
+    return _writer
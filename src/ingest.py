@@ -0,0 +1,568 @@
+"""
+Document ingestion pipeline shared by the Streamlit app and the HTTP API.
+
+Loads and splits a PDF, drops duplicate chunks, embeds the rest into the
+vector store and tracks the document's status in the database.
+"""
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from . import scheduler
+from .config import Config
+from .database.init_db import get_session
+from .database import crud
+from .loaders.pdf_loader import PDFDocumentLoader
+from .loaders.text_store import ExtractedTextStore, file_hash
+from .processing.dedup import ChunkDeduplicator, CorpusLookup, content_hash as chunk_hash
+from .processing.vectorstore import CHUNK_ID_KEY, VectorStoreManager
+from .observability import accounting, metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+# Called with a stage name ('loading', 'indexing', 'summarizing', 'completed')
+# and details
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass
+class IngestResult:
+    """Outcome of ingesting one document."""
+
+    document_id: int
+    # Chunks indexed for the document, including reused ones
+    chunks: int
+    duplicates_skipped: int = 0
+    index_bytes_saved: int = 0
+    # Chunks whose vectors were carried over from the previous version
+    chunks_reused: int = 0
+    # Chunks of the previous version that are gone from this one
+    chunks_removed: int = 0
+    # Summaries stored for overview questions (0 when summarizing is off)
+    summaries: int = 0
+    vectorstore: Any = field(default=None, repr=False)
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of the document's chunks that did not need embedding."""
+        return self.chunks_reused / self.chunks if self.chunks else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "document_id": self.document_id,
+            "chunks": self.chunks,
+            "duplicates_skipped": self.duplicates_skipped,
+            "index_bytes_saved": self.index_bytes_saved,
+            "chunks_reused": self.chunks_reused,
+            "chunks_removed": self.chunks_removed,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+            "summaries": self.summaries,
+        }
+
+
+def load_chunks(
+    file_path: str,
+    text_splitter=None,
+    content_hash: Optional[str] = None
+) -> List[Document]:
+    """
+    Extract and split a PDF, reusing stored page text when available.
+
+    Args:
+        file_path: Path to the PDF file
+        text_splitter: Splitter to use (default: get_text_splitter())
+        content_hash: SHA-256 of the file if already known (skips hashing it again)
+
+    Returns:
+        List of chunk Documents (not yet deduplicated)
+    """
+    loader = PDFDocumentLoader(
+        text_store=ExtractedTextStore(),
+        text_splitter=text_splitter
+    )
+    return loader.load_and_split(file_path, content_hash)
+
+
+def record_chunks(document_id: int, chunks: List[Tuple[Document, str]]) -> int:
+    """
+    Store a document's chunk records, replacing any earlier ones.
+
+    Args:
+        document_id: Document the chunks belong to
+        chunks: (chunk, vector ID) pairs in document order
+
+    Returns:
+        Number of records stored
+    """
+    db = get_session()
+    try:
+        return crud.replace_document_chunks(db, document_id, [
+            {
+                "chunk_index": index,
+                "content": chunk.page_content,
+                "content_hash": chunk_hash(chunk.page_content),
+                "vector_id": vector_id,
+            }
+            for index, (chunk, vector_id) in enumerate(chunks)
+        ])
+    finally:
+        db.close()
+
+
+def release_version(
+    previous_id: int,
+    replaced_source: str,
+    document_id: int,
+    vectorstore_manager: VectorStoreManager,
+    vectorstore=None
+) -> int:
+    """
+    Delete a replaced version's vectors without breaking documents sharing them.
+
+    Shared vectors move to the documents listed in their duplicate sources,
+    which get chunk records for them.
+
+    Args:
+        previous_id: Replaced version
+        replaced_source: File of the replaced version
+        document_id: New version (never treated as a sharing document)
+        vectorstore_manager: Vector store manager
+        vectorstore: Existing vector store (if None, loads from disk)
+
+    Returns:
+        Number of chunks moved to other documents
+    """
+    db = get_session()
+    try:
+        def owners(paths: List[str]) -> Dict[str, int]:
+            documents = crud.get_documents_by_file_path(db, [p for p in paths if p != replaced_source])
+            return {
+                path: document.id
+                for path, document in documents.items()
+                if document.id not in (previous_id, document_id)
+            }
+
+        rehomed = vectorstore_manager.release_document(previous_id, owners, vectorstore)
+        for owner, chunks in rehomed.items():
+            crud.append_document_chunks(db, owner, [
+                {
+                    "content": chunk.page_content,
+                    "content_hash": chunk_hash(chunk.page_content),
+                    "vector_id": vector_id,
+                }
+                for vector_id, chunk in chunks
+            ])
+    finally:
+        db.close()
+    return sum(len(chunks) for chunks in rehomed.values())
+
+
+def _embed_chunks(
+    document_id: int,
+    document_hash: str,
+    chunks: List[Document],
+    vectorstore_manager: VectorStoreManager,
+    vectorstore=None,
+    corpus_lookup: Optional[CorpusLookup] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    before_write: Optional[Callable[[List[Tuple[Document, str]]], None]] = None,
+    vector_ids: Optional[List[str]] = None
+) -> Tuple[IngestResult, List[Tuple[Document, str]]]:
+    """Deduplicate and embed chunks; returns the result and (chunk, vector ID) pairs."""
+    # IDs follow the split document, so a retry gets the same IDs
+    if vector_ids is None:
+        vector_ids = vectorstore_manager.chunk_ids(document_id, document_hash, chunks)
+    for chunk, vector_id in zip(chunks, vector_ids):
+        chunk.metadata["document_id"] = document_id
+        # Lets answers reference the chunk instead of copying its text
+        chunk.metadata[CHUNK_ID_KEY] = vector_id
+
+    # Drop in-document duplicates; duplicates of stored chunks reuse their embedding
+    deduplicator = None
+    to_embed = chunks
+    shared: Dict[str, List[Tuple[str, Document]]] = {}
+    if Config.DEDUP_ENABLED:
+        own = set(vector_ids)
+
+        def lookup(fingerprints):
+            # Vectors an interrupted run wrote for these chunks are not duplicates
+            return [
+                (vector_id, fp) for vector_id, fp in corpus_lookup(fingerprints)
+                if vector_id not in own
+            ]
+
+        deduplicator = ChunkDeduplicator(corpus_lookup=lookup if corpus_lookup else None)
+        with metrics.timer("dedup"):
+            to_embed = deduplicator.deduplicate(chunks)
+        shared = {
+            vector_id: [(chunk.metadata[CHUNK_ID_KEY], chunk) for chunk in matches]
+            for vector_id, matches in deduplicator.corpus_matches.items()
+        }
+
+    # Every chunk of the document gets a vector, except in-document duplicates
+    keep = {id(chunk) for chunk in to_embed}
+    keep.update(id(chunk) for pairs in shared.values() for _, chunk in pairs)
+    stored = [(chunk, chunk.metadata[CHUNK_ID_KEY]) for chunk in chunks if id(chunk) in keep]
+
+    result = IngestResult(document_id=document_id, chunks=len(stored))
+    if deduplicator is not None:
+        result.duplicates_skipped = deduplicator.stats.embedding_calls_saved
+        result.index_bytes_saved = deduplicator.stats.index_bytes_saved()
+    if on_progress is not None:
+        on_progress("indexing", result.as_dict())
+
+    if before_write is not None:
+        before_write(stored)
+
+    vectorstore = vectorstore or vectorstore_manager.get_vectorstore()
+    missing = vectorstore_manager.copy_embeddings(shared, vectorstore)
+    to_embed = list(to_embed) + [chunk for _, chunk in missing]
+    if to_embed:
+        vectorstore_manager.upsert_documents(
+            to_embed,
+            [chunk.metadata[CHUNK_ID_KEY] for chunk in to_embed],
+            vectorstore
+        )
+
+    result.vectorstore = vectorstore
+    return result, stored
+
+
+def index_chunks(
+    document_id: int,
+    chunks: List[Document],
+    vectorstore_manager: VectorStoreManager,
+    vectorstore=None,
+    on_progress: Optional[ProgressCallback] = None,
+    document_hash: Optional[str] = None
+) -> IngestResult:
+    """
+    Deduplicate chunks, embed them into the vector store and record them.
+
+    Chunk records with their vector IDs are stored before the vectors are
+    written, and vectors already in the collection are not embedded again,
+    so calling this again after a crash finishes the interrupted write.
+    Vectors of the document that are no longer among its chunks are
+    deleted afterwards.
+
+    Args:
+        document_id: Document the chunks belong to
+        chunks: Chunks from load_chunks()
+        vectorstore_manager: Manager to write with
+        vectorstore: Open vector store to add chunks to (default: create or load one)
+        on_progress: Called with 'indexing' before embedding starts
+        document_hash: SHA-256 of the document's file, part of the vector IDs
+            (default: the chunks' source file is hashed)
+
+    Returns:
+        IngestResult with the vector store the chunks were written to
+    """
+    if document_hash is None:
+        document_hash = _source_hash(chunks)
+
+    result, stored = _embed_chunks(
+        document_id,
+        document_hash,
+        chunks,
+        vectorstore_manager,
+        vectorstore=vectorstore,
+        corpus_lookup=vectorstore_manager.find_fingerprints,
+        on_progress=on_progress,
+        before_write=lambda pairs: record_chunks(document_id, pairs)
+    )
+    vectorstore_manager.delete_stale_chunks(
+        document_id,
+        [vector_id for _, vector_id in stored],
+        result.vectorstore
+    )
+    return result
+
+
+def _source_hash(chunks: List[Document]) -> str:
+    """SHA-256 of the file the chunks were split from ('' if unknown)."""
+    source = chunks[0].metadata.get("source") if chunks else None
+    if source and os.path.exists(source):
+        return file_hash(source)
+    return ""
+
+
+def index_new_version(
+    document_id: int,
+    previous_id: int,
+    chunks: List[Document],
+    vectorstore_manager: VectorStoreManager,
+    vectorstore=None,
+    on_progress: Optional[ProgressCallback] = None,
+    document_hash: Optional[str] = None
+) -> IngestResult:
+    """
+    Index a new version of a document, embedding only what changed.
+
+    Chunks are matched to the previous version's DocumentChunk rows by
+    content hash. Unchanged chunks keep their vectors (only their metadata
+    is updated), added or changed chunks are embedded, and the previous
+    version's remaining vectors are deleted. Nothing of the previous version
+    is touched until the new chunks are embedded.
+
+    Args:
+        document_id: The new version's Document
+        previous_id: The Document it replaces
+        chunks: Chunks of the new version from load_chunks()
+        vectorstore_manager: Manager to write with
+        vectorstore: Open vector store (default: load one)
+        on_progress: Called with 'indexing' before embedding starts
+        document_hash: SHA-256 of the new version's file, part of the new
+            vector IDs (default: the chunks' source file is hashed)
+
+    Returns:
+        IngestResult with reuse counts
+    """
+    db = get_session()
+    try:
+        previous = crud.get_document(db, previous_id)
+        if previous is None:
+            raise ValueError(f"Document {previous_id} not found")
+        previous_source = previous.file_path
+        previous_rows = crud.get_document_chunks(db, previous_id)
+    finally:
+        db.close()
+
+    vectorstore = vectorstore or vectorstore_manager.get_vectorstore()
+    if document_hash is None:
+        document_hash = _source_hash(chunks)
+
+    # Vector IDs of the previous version by chunk hash (a text may repeat)
+    available: Dict[str, List[str]] = {}
+    for row in previous_rows:
+        if row.content_hash and row.vector_id:
+            available.setdefault(row.content_hash, []).append(row.vector_id)
+
+    reused: Dict[str, Document] = {}
+    order = {}
+    added = []
+    added_ids = []
+    new_ids = vectorstore_manager.chunk_ids(document_id, document_hash, chunks)
+    for position, (chunk, new_id) in enumerate(zip(chunks, new_ids)):
+        chunk.metadata["document_id"] = document_id
+        order[id(chunk)] = position
+        vector_ids = available.get(chunk_hash(chunk.page_content))
+        if vector_ids:
+            reused[vector_ids.pop(0)] = chunk
+        else:
+            added.append(chunk)
+            added_ids.append(new_id)
+
+    # Vectors about to be deleted must not absorb new chunks as duplicates
+    removed = {vector_id for vector_ids in available.values() for vector_id in vector_ids}
+
+    def corpus_lookup(fingerprints):
+        return [
+            (vector_id, fp)
+            for vector_id, fp in vectorstore_manager.find_fingerprints(fingerprints)
+            if vector_id not in removed
+        ]
+
+    def progress(stage: str, detail: Dict[str, Any]):
+        # Report the whole version, not just the chunks being embedded
+        if on_progress is not None:
+            total = detail["chunks"] + len(reused)
+            on_progress(stage, {
+                **detail,
+                "chunks": total,
+                "chunks_reused": len(reused),
+                "chunks_removed": len(removed),
+                "reuse_ratio": round(len(reused) / total, 4) if total else 0.0,
+            })
+
+    if not previous_rows:
+        # Indexed before chunks were recorded: nothing to match against
+        release_version(previous_id, previous_source, document_id, vectorstore_manager, vectorstore)
+
+    result, stored = _embed_chunks(
+        document_id,
+        document_hash,
+        added,
+        vectorstore_manager,
+        vectorstore=vectorstore,
+        corpus_lookup=corpus_lookup,
+        on_progress=progress,
+        vector_ids=added_ids
+    )
+    vectorstore_manager.reassign_chunks(reused, vectorstore, replaced_source=previous_source)
+    release_version(previous_id, previous_source, document_id, vectorstore_manager, vectorstore)
+
+    stored.extend((chunk, vector_id) for vector_id, chunk in reused.items())
+    stored.sort(key=lambda pair: order[id(pair[0])])
+    record_chunks(document_id, stored)
+
+    db = get_session()
+    try:
+        crud.delete_document_chunks(db, previous_id)
+    finally:
+        db.close()
+
+    result.chunks += len(reused)
+    result.chunks_reused = len(reused)
+    result.chunks_removed = len(removed)
+    logger.info(
+        f"Indexed version {document_id} of document {previous_id}: "
+        f"{len(reused)} chunks reused, {len(stored) - len(reused)} embedded, "
+        f"{result.chunks_removed} removed (reuse {result.reuse_ratio:.0%})"
+    )
+    return result
+
+
+def summarize_document(
+    document_id: int,
+    chunks: List[Document],
+    previous_id: Optional[int] = None,
+    llm=None
+) -> int:
+    """
+    Build and store the map-reduce summary tree of a document.
+
+    Args:
+        document_id: Document the chunks belong to
+        chunks: All chunks of the document, in document order
+        previous_id: Previous version whose unchanged summaries are reused
+        llm: Chat model (default: SUMMARY_MODEL without a token limit)
+
+    Returns:
+        Number of summaries stored
+    """
+    from .chains.qa_chain import create_chat_model
+    from .chains.summary import build_summary_tree
+
+    db = get_session()
+    try:
+        previous = {}
+        if previous_id is not None:
+            previous = {s.source_hash: s.content for s in crud.get_document_summaries(db, previous_id)}
+
+        llm = llm or create_chat_model(
+            model_name=os.getenv("SUMMARY_MODEL", "gpt-3.5-turbo"),
+            max_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "500"))
+        )
+        with metrics.timer("summarize"):
+            summaries = build_summary_tree(chunks, llm, previous=previous)
+        return crud.replace_document_summaries(db, document_id, summaries)
+    finally:
+        db.close()
+
+
+def ingest_document(
+    file_path: str,
+    filename: str = None,
+    file_size: int = None,
+    document_id: Optional[int] = None,
+    vectorstore_manager: Optional[VectorStoreManager] = None,
+    vectorstore=None,
+    on_progress: Optional[ProgressCallback] = None,
+    content_hash: Optional[str] = None,
+    page_count: Optional[int] = None,
+    parent_id: Optional[int] = None,
+    summarize: Optional[bool] = None
+) -> IngestResult:
+    """
+    Ingest a PDF into the vector store.
+
+    With parent_id, the PDF is ingested as a new version of that document:
+    only changed chunks are embedded and the parent is marked 'superseded'.
+
+    With summarize, a summary tree for overview questions is built after
+    indexing. Summaries are optional: if summarizing fails, the document is
+    still completed and questions are answered by retrieval.
+
+    Args:
+        file_path: Path to the PDF file
+        filename: Original file name (default: the file path)
+        file_size: Size of the file in bytes
+        document_id: Existing Document row to ingest into (default: create one)
+        vectorstore_manager: Manager to use (default: a new VectorStoreManager)
+        vectorstore: Open vector store to add chunks to (default: create or load one)
+        on_progress: Called when a stage starts or the document is completed
+        content_hash: SHA-256 of the file if already known, e.g. from store_upload()
+        page_count: Page count if already known; passed to on_progress('loading')
+        parent_id: Previous version of this document (optional)
+        summarize: Build summaries (default from env: SUMMARY_ENABLED, false)
+
+    Returns:
+        IngestResult; the document is marked 'completed'
+
+    Raises:
+        Exception: Any loading or indexing error; the document is marked 'failed'
+    """
+    progress = on_progress or (lambda stage, detail: None)
+    vectorstore_manager = vectorstore_manager or VectorStoreManager()
+    if summarize is None:
+        summarize = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+
+    db = get_session()
+    try:
+        if document_id is None:
+            document = crud.create_document(
+                db=db,
+                filename=filename or file_path,
+                file_path=file_path,
+                file_type="pdf",
+                file_size=file_size,
+                status="processing",
+                parent_id=parent_id
+            )
+            document_id = document.id
+        else:
+            crud.update_document_status(db, document_id, "processing")
+
+        try:
+            # Attribute embedding usage (and any profile) to this document;
+            # its embedding calls yield to interactive questions
+            with accounting.usage_scope(document_id=document_id), \
+                    scheduler.priority(scheduler.INGEST), \
+                    profiling.profile("ingest", f"document-{document_id}"):
+                progress("loading", {"document_id": document_id, "page_count": page_count})
+                # Part of the vector IDs; load_chunks() would hash the file anyway
+                content_hash = content_hash or file_hash(file_path)
+                chunks = load_chunks(file_path, content_hash=content_hash)
+                if parent_id is not None:
+                    result = index_new_version(
+                        document_id,
+                        parent_id,
+                        chunks,
+                        vectorstore_manager,
+                        vectorstore=vectorstore,
+                        on_progress=progress,
+                        document_hash=content_hash
+                    )
+                else:
+                    result = index_chunks(
+                        document_id,
+                        chunks,
+                        vectorstore_manager,
+                        vectorstore=vectorstore,
+                        on_progress=progress,
+                        document_hash=content_hash
+                    )
+
+                if summarize:
+                    progress("summarizing", {"document_id": document_id})
+                    try:
+                        result.summaries = summarize_document(document_id, chunks, previous_id=parent_id)
+                    except Exception as e:
+                        logger.warning(f"Failed to summarize document {document_id}: {e}")
+        except Exception:
+            crud.update_document_status(db, document_id, "failed")
+            raise
+
+        crud.update_document_status(db, document_id, "completed")
+        if parent_id is not None:
+            crud.update_document_status(db, parent_id, "superseded")
+    finally:
+        db.close()
+
+    progress("completed", result.as_dict())
+    logger.info(f"Ingested document {document_id}: {result.chunks} chunks")
+    return result
@@ -1,13 +1,15 @@
 """PDF document loader implementation."""
 import logging
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.schema import Document
 
 from .base_loader import BaseDocumentLoader
+from .text_store import ExtractedTextStore, file_hash
 from ..processing.text_splitter import get_text_splitter
+from ..observability import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,16 +17,28 @@ logger = logging.getLogger(__name__)
 class PDFDocumentLoader(BaseDocumentLoader):
     """PDF document loader using PyPDFLoader."""
 
-    def __init__(self):
-        """Initialize PDF loader."""
-        self.text_splitter = get_text_splitter()
+    def __init__(
+        self,
+        text_store: Optional[ExtractedTextStore] = None,
+        text_splitter=None
+    ):
+        """
+        Initialize PDF loader.
+
+        Args:
+            text_store: Reuses previously extracted page text (optional)
+            text_splitter: Splitter to use (default: get_text_splitter())
+        """
+        self.text_splitter = text_splitter or get_text_splitter()
+        self.text_store = text_store
 
-    def load(self, file_path: str) -> List[Document]:
+    def load(self, file_path: str, content_hash: Optional[str] = None) -> List[Document]:
         """
         Load a PDF document.
 
         Args:
             file_path: Path to the PDF file
+            content_hash: SHA-256 of the file if already known (skips hashing it again)
 
         Returns:
             List of Document objects, one per page
@@ -38,21 +52,37 @@ class PDFDocumentLoader(BaseDocumentLoader):
             raise FileNotFoundError(f"PDF file not found: {file_path}")
 
         try:
+            key = None
+            if self.text_store is not None:
+                with metrics.timer("text_store_read"):
+                    key = content_hash or file_hash(str(path))
+                    documents = self.text_store.get(key, source=str(path))
+                if documents is not None:
+                    logger.info(f"Loaded {len(documents)} pages of {path.name} from text store")
+                    return documents
+
             logger.info(f"Loading PDF: {file_path}")
-            loader = PyPDFLoader(str(path))
-            documents = loader.load()
+            with metrics.timer("pdf_load"):
+                loader = PyPDFLoader(str(path))
+                documents = loader.load()
+            metrics.inc("pages_loaded_total", len(documents), "PDF pages parsed")
             logger.info(f"Loaded {len(documents)} pages from {path.name}")
+
+            if self.text_store is not None:
+                self.text_store.put(key, documents)
+
             return documents
         except Exception as e:
             logger.error(f"Failed to load PDF {file_path}: {e}")
             raise
 
-    def load_and_split(self, file_path: str) -> List[Document]:
+    def load_and_split(self, file_path: str, content_hash: Optional[str] = None) -> List[Document]:
         """
         Load a PDF and split it into chunks.
 
         Args:
             file_path: Path to the PDF file
+            content_hash: SHA-256 of the file if already known (skips hashing it again)
 
         Returns:
             List of Document objects split into chunks
@@ -62,9 +92,11 @@ class PDFDocumentLoader(BaseDocumentLoader):
             Exception: If PDF loading or splitting fails
         """
         try:
-            documents = self.load(file_path)
-            chunks = self.text_splitter.split_documents(documents)
+            documents = self.load(file_path, content_hash)
+            with metrics.timer("split"):
+                chunks = self.text_splitter.split_documents(documents)
             logger.info(f"Split {len(documents)} pages into {len(chunks)} chunks")
+
             return chunks
         except Exception as e:
             logger.error(f"Failed to load and split PDF {file_path}: {e}")
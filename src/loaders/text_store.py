@@ -0,0 +1,138 @@
+"""Compressed store of extracted page text keyed by file hash."""
+import os
+import gzip
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+TEXT_STORE_VERSION = 1
+
+
+def file_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 of a file's contents.
+
+    Args:
+        file_path: Path to the file
+        block_size: Bytes read per iteration
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractedTextStore:
+    """
+    Persists the per-page text extracted from a file.
+
+    Entries are gzip-compressed JSON files named after the SHA-256 of the
+    source file, so re-chunking a document never needs to parse it again
+    and identical uploads share one entry.
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        Initialize extracted text store.
+
+        Args:
+            directory: Store directory (default from env: TEXT_STORE_DIRECTORY)
+        """
+        if directory is None:
+            directory = os.getenv("TEXT_STORE_DIRECTORY", "/app/data/extracted")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    def contains(self, key: str) -> bool:
+        """Check whether text for a file hash is stored."""
+        return self._path(key).exists()
+
+    def get(self, key: str, source: str = None) -> Optional[List[Document]]:
+        """
+        Load the stored pages for a file hash.
+
+        Args:
+            key: File hash
+            source: Overrides the 'source' metadata of every page (optional)
+
+        Returns:
+            List of page Documents, or None if nothing is stored
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+
+        if entry.get("version") != TEXT_STORE_VERSION:
+            logger.warning(f"Ignoring extracted text with unsupported version: {path}")
+            return None
+
+        pages = []
+        for page in entry["pages"]:
+            metadata = page["metadata"]
+            if source is not None:
+                metadata["source"] = source
+            pages.append(Document(page_content=page["page_content"], metadata=metadata))
+
+        logger.debug(f"Loaded {len(pages)} pages from text store: {key[:12]}")
+        return pages
+
+    def put(self, key: str, pages: List[Document]):
+        """
+        Store the pages extracted from a file.
+
+        Args:
+            key: File hash
+            pages: Page Documents as returned by the loader
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "version": TEXT_STORE_VERSION,
+            "pages": [
+                {"page_content": page.page_content, "metadata": page.metadata}
+                for page in pages
+            ]
+        }
+
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        logger.debug(f"Stored {len(pages)} pages in text store: {key[:12]}")
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete the stored pages for a file hash.
+
+        Args:
+            key: File hash
+
+        Returns:
+            True if deleted, False if not found
+        """
+        path = self._path(key)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
@@ -0,0 +1,122 @@
+"""Content-addressed storage for uploaded files."""
+import os
+import uuid
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from ..observability import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size or page limit."""
+
+
+@dataclass
+class StoredUpload:
+    """A stored upload and what was learned while copying it."""
+
+    path: str
+    content_hash: str
+    size: int
+    page_count: Optional[int] = None
+    # False when identical content was already stored
+    created: bool = True
+
+
+def _page_count(path: Path) -> int:
+    """Count PDF pages from the cross-reference table and page tree only."""
+    from pypdf import PdfReader
+
+    try:
+        return len(PdfReader(str(path)).pages)
+    except Exception as e:
+        raise ValueError(f"Not a readable PDF: {e}") from e
+
+
+def store_upload(
+    source: BinaryIO,
+    directory: str = None,
+    max_bytes: int = None,
+    max_pages: int = None,
+    count_pages: bool = True,
+    block_size: int = 1024 * 1024
+) -> StoredUpload:
+    """
+    Copy an upload to disk in blocks, hashing it in the same pass.
+
+    Files are stored as <directory>/<hash[:2]>/<sha256>.pdf, so uploads with
+    the same name never overwrite each other and identical uploads share one
+    file. The SHA-256 is the key of the extracted text store, so ingestion
+    can reuse it instead of reading the file again.
+
+    Args:
+        source: Readable binary file object
+        directory: Storage directory (default from env: UPLOAD_DIRECTORY)
+        max_bytes: Maximum size in bytes (default from env: UPLOAD_MAX_MB; 0 for no limit)
+        max_pages: Maximum page count (default from env: UPLOAD_MAX_PAGES; 0 for no limit)
+        count_pages: Read the page count from the stored PDF
+        block_size: Bytes copied per iteration
+
+    Returns:
+        StoredUpload with the path, hash, size and page count
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_bytes or max_pages
+        ValueError: If the page count cannot be read
+    """
+    if directory is None:
+        directory = os.getenv("UPLOAD_DIRECTORY", "/app/data/documents")
+    if max_bytes is None:
+        max_bytes = int(float(os.getenv("UPLOAD_MAX_MB", "200")) * 1024 * 1024)
+    if max_pages is None:
+        max_pages = int(os.getenv("UPLOAD_MAX_PAGES", "0"))
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f".upload-{uuid.uuid4().hex}.tmp"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with metrics.timer("upload_write"):
+            with open(tmp_path, "wb") as f:
+                for block in iter(lambda: source.read(block_size), b""):
+                    size += len(block)
+                    if max_bytes and size > max_bytes:
+                        raise UploadTooLargeError(
+                            f"File exceeds the upload limit of {max_bytes / 1024 / 1024:.0f}MB"
+                        )
+                    digest.update(block)
+                    f.write(block)
+
+        page_count = _page_count(tmp_path) if count_pages else None
+        if max_pages and page_count is not None and page_count > max_pages:
+            raise UploadTooLargeError(
+                f"File has {page_count} pages; the upload limit is {max_pages}"
+            )
+
+        content_hash = digest.hexdigest()
+        path = directory / content_hash[:2] / f"{content_hash}.pdf"
+        created = not path.exists()
+        if created:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    logger.info(
+        f"Stored upload {path.name}: {size} bytes, {page_count} pages, new: {created}"
+    )
+    return StoredUpload(
+        path=str(path),
+        content_hash=content_hash,
+        size=size,
+        page_count=page_count,
+        created=created
+    )
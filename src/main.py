@@ -0,0 +1,95 @@
+"""
+Command-line entry point for Doc Sage services.
+
+Usage:
+    python -m src.main serve --host 0.0.0.0 --port 8000
+    python -m src.main ingest /data/pdfs --workers 4 --embed-workers 4
+    python -m src.main compress-db --codec zlib
+"""
+import argparse
+import os
+
+
+def serve(args: argparse.Namespace):
+    """Run the HTTP API."""
+    import uvicorn
+
+    from .api.server import create_app
+
+    uvicorn.run(
+        create_app(),
+        host=args.host,
+        port=args.port,
+        log_level=os.getenv("LOG_LEVEL", "INFO").lower()
+    )
+
+
+def ingest(args: argparse.Namespace):
+    """Bulk-ingest a directory tree of PDFs."""
+    from .config import Config
+    from .bulk_ingest import ingest_directory
+
+    Config.initialize()
+    Config.validate()
+    summary = ingest_directory(
+        args.directory,
+        pattern=args.pattern,
+        workers=args.workers,
+        embed_workers=args.embed_workers,
+        checkpoint_path=args.checkpoint,
+        retry_failed=args.retry_failed,
+        report_interval=args.report_interval
+    )
+    print(summary)
+
+
+def compress_db(args: argparse.Namespace):
+    """Compress existing text columns of the database."""
+    from .config import Config
+    from .database.compression import compress_database
+
+    Config.initialize()
+    summary = compress_database(
+        db_path=args.db_path,
+        codec=args.codec,
+        batch_size=args.batch_size,
+        vacuum=not args.no_vacuum
+    )
+    print(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doc Sage services")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP API")
+    serve_parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    serve_parser.set_defaults(func=serve)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Bulk-ingest a directory of PDFs")
+    ingest_parser.add_argument("directory")
+    ingest_parser.add_argument("--pattern", default="*.pdf")
+    ingest_parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    ingest_parser.add_argument("--embed-workers", type=int, default=4, help="Concurrent embedding threads")
+    ingest_parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: next to the database)")
+    ingest_parser.add_argument("--retry-failed", action="store_true")
+    ingest_parser.add_argument("--report-interval", type=float, default=5.0)
+    ingest_parser.set_defaults(func=ingest)
+
+    compress_parser = subparsers.add_parser("compress-db", help="Compress existing text columns of the database")
+    compress_parser.add_argument("--db-path", default=None, help="SQLite database (default: DB_PATH)")
+    compress_parser.add_argument(
+        "--codec", choices=["none", "zlib", "zstd"], default=None,
+        help="Target codec; none decompresses (default: DB_COMPRESSION)"
+    )
+    compress_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+    compress_parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM (the file does not shrink)")
+    compress_parser.set_defaults(func=compress_db)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Token, latency and cache-hit accounting for LLM and embedding calls."""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+CHAT = "chat"
+EMBEDDING = "embedding"
+
+
+@dataclass(frozen=True)
+class UsageScope:
+    """The document and chat session calls are attributed to."""
+
+    document_id: Optional[int] = None
+    session_id: Optional[str] = None
+
+
+@dataclass
+class UsageCounts:
+    """Aggregated usage of one model within one scope."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    latency_ms: float = 0.0
+
+    def add(self, other: "UsageCounts"):
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_hits += other.cache_hits
+        self.errors += other.errors
+        self.latency_ms += other.latency_ms
+
+
+UsageKey = Tuple[str, str, Optional[int], Optional[str]]
+
+
+class UsageAccumulator:
+    """Thread-safe in-memory aggregation of usage until it is flushed."""
+
+    def __init__(self):
+        self._totals: Dict[UsageKey, UsageCounts] = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, model: str, scope: UsageScope, counts: UsageCounts):
+        key = (kind, model, scope.document_id, scope.session_id)
+        with self._lock:
+            self._totals.setdefault(key, UsageCounts()).add(counts)
+
+    def drain(self) -> Dict[UsageKey, UsageCounts]:
+        """Return and clear the aggregated usage."""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+        return totals
+
+
+accumulator = UsageAccumulator()
+
+_current_scope: ContextVar[UsageScope] = ContextVar("usage_scope", default=UsageScope())
+
+
+def is_enabled() -> bool:
+    """Whether usage accounting is enabled (env: USAGE_ACCOUNTING_ENABLED, default true)."""
+    return os.getenv("USAGE_ACCOUNTING_ENABLED", "true").lower() == "true"
+
+
+def current_scope() -> UsageScope:
+    """The scope calls made in this context are attributed to."""
+    return _current_scope.get()
+
+
+@contextmanager
+def usage_scope(
+    document_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+    flush_on_exit: bool = True
+) -> Iterator[UsageScope]:
+    """
+    Attribute the calls made inside the block to a document and/or session.
+
+    Unset values are inherited from an enclosing scope. Leaving the outermost
+    scope persists the aggregated usage.
+
+    Args:
+        document_id: Document ID (optional)
+        session_id: Chat session ID (optional)
+        flush_on_exit: Persist usage when the outermost scope exits
+
+    Yields:
+        The active scope
+    """
+    parent = _current_scope.get()
+    scope = UsageScope(
+        document_id=document_id if document_id is not None else parent.document_id,
+        session_id=session_id if session_id is not None else parent.session_id
+    )
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        if flush_on_exit and parent == UsageScope():
+            try:
+                flush()
+            except Exception as e:
+                # Accounting must never fail the request it describes
+                logger.warning(f"Failed to persist usage statistics: {e}")
+
+
+def record(
+    kind: str,
+    model: str,
+    calls: int = 1,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_hits: int = 0,
+    errors: int = 0,
+    latency_ms: float = 0.0
+):
+    """
+    Record usage in the current scope.
+
+    Args:
+        kind: 'chat' or 'embedding'
+        model: Model name
+        calls: Number of API calls
+        input_tokens: Prompt or embedded tokens
+        output_tokens: Completion tokens
+        cache_hits: Results served from a cache instead of the API
+        errors: Failed calls
+        latency_ms: Total call latency in milliseconds
+    """
+    accumulator.add(
+        kind,
+        model,
+        current_scope(),
+        UsageCounts(calls, input_tokens, output_tokens, cache_hits, errors, latency_ms)
+    )
+
+
+def flush(db_path: str = None) -> int:
+    """
+    Persist the aggregated usage to the database.
+
+    Args:
+        db_path: Path to SQLite database file (default from env: DB_PATH)
+
+    Returns:
+        Number of usage rows updated
+    """
+    totals = accumulator.drain()
+    if not totals:
+        return 0
+
+    from ..database.init_db import get_session
+    from ..database import crud
+
+    db = get_session(db_path)
+    try:
+        for (kind, model, document_id, session_id), counts in totals.items():
+            crud.record_usage(
+                db,
+                kind=kind,
+                model=model,
+                document_id=document_id,
+                session_id=session_id,
+                calls=counts.calls,
+                input_tokens=counts.input_tokens,
+                output_tokens=counts.output_tokens,
+                cache_hits=counts.cache_hits,
+                errors=counts.errors,
+                latency_ms=counts.latency_ms,
+                commit=False
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Keep the usage so the next flush can retry
+        for (kind, model, document_id, session_id), counts in totals.items():
+            accumulator.add(kind, model, UsageScope(document_id, session_id), counts)
+        raise
+    finally:
+        db.close()
+
+    logger.debug(f"Persisted {len(totals)} usage rows")
+    return len(totals)
+
+
+_encodings: Dict[str, object] = {}
+
+
+def count_tokens(texts: List[str], model: str) -> int:
+    """
+    Count the tokens the API bills for a list of texts.
+
+    Args:
+        texts: Input texts
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        Total token count
+    """
+    encoding = _encodings.get(model)
+    if encoding is None:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _encodings[model] = encoding
+
+    return sum(len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=()))
@@ -0,0 +1,100 @@
+"""LangChain callback handlers feeding metrics and usage accounting."""
+import time
+import logging
+from typing import Any, Dict
+from uuid import UUID
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+from . import accounting, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimingCallbackHandler(BaseCallbackHandler):
+    """
+    Times the retriever and LLM runs inside a chain.
+
+    Retriever runs are recorded as the 'retrieval' stage and chat/LLM runs as
+    the 'llm' stage, so a ConversationalRetrievalChain call is broken down
+    into question condensing, retrieval and answer generation.
+    """
+
+    def __init__(self):
+        self._started: Dict[UUID, float] = {}
+
+    def _start(self, run_id: UUID):
+        self._started[run_id] = time.perf_counter()
+
+    def _finish(self, stage: str, run_id: UUID, failed: bool = False):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            metrics.observe_stage(stage, time.perf_counter() - start, failed=failed)
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any):
+        self._finish("retrieval", run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish("retrieval", run_id, failed=True)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._finish("llm", run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish("llm", run_id, failed=True)
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Records chat model calls, tokens and latency for usage accounting.
+
+    Calls are attributed to the accounting scope active when they finish.
+    """
+
+    def __init__(self, model_name: str):
+        """
+        Initialize usage callback handler.
+
+        Args:
+            model_name: Model name used when the response does not report one
+        """
+        self.model_name = model_name
+        self._started: Dict[UUID, float] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+
+    def _latency_ms(self, run_id: UUID) -> float:
+        start = self._started.pop(run_id, None)
+        return (time.perf_counter() - start) * 1000 if start is not None else 0.0
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        llm_output = response.llm_output or {}
+        token_usage = llm_output.get("token_usage") or {}
+        accounting.record(
+            accounting.CHAT,
+            llm_output.get("model_name") or self.model_name,
+            input_tokens=token_usage.get("prompt_tokens", 0),
+            output_tokens=token_usage.get("completion_tokens", 0),
+            latency_ms=self._latency_ms(run_id)
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        accounting.record(
+            accounting.CHAT,
+            self.model_name,
+            errors=1,
+            latency_ms=self._latency_ms(run_id)
+        )
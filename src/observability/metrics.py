@@ -0,0 +1,330 @@
+"""Per-stage timing metrics with Prometheus text-format export."""
+import os
+import time
+import logging
+import threading
+import functools
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+METRIC_PREFIX = "doc_sage"
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    """Cumulative histogram for one label set."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels):
+        """Increase a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        help_text: str = "",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        **labels
+    ):
+        """Record a histogram observation."""
+        key = _label_key(labels)
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help_text))
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        """Remove all recorded values."""
+        with self._lock:
+            self._help.clear()
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._help):
+                kind, help_text = self._help[name]
+                full_name = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {full_name} {help_text or name}")
+                lines.append(f"# TYPE {full_name} {kind}")
+
+                if kind == "counter":
+                    for key, value in sorted(self._counters.get(name, {}).items()):
+                        lines.append(f"{full_name}{_format_labels(key)} {value:g}")
+                    continue
+
+                for key, histogram in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        le = 'le="%g"' % bound
+                        lines.append(f"{full_name}_bucket{_format_labels(key, le)} {count}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{full_name}_bucket{_format_labels(key, le)} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def configure(enabled: Optional[bool] = None):
+    """
+    Enable or disable metric collection.
+
+    Args:
+        enabled: New state (default from env: METRICS_ENABLED)
+    """
+    global _enabled
+    if enabled is None:
+        enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Whether metrics are being collected."""
+    return _enabled
+
+
+class _NullTimer:
+    """Timer used while metrics are disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    """Records the duration of a stage and counts its failures."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe_stage(self.stage, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+def observe_stage(stage: str, seconds: float, failed: bool = False):
+    """
+    Record the duration of a pipeline stage.
+
+    Args:
+        stage: Stage name, e.g. 'pdf_load'
+        seconds: Duration in seconds
+        failed: Whether the stage raised
+    """
+    if not _enabled:
+        return
+    registry.observe("stage_duration_seconds", seconds, "Duration of pipeline stages", stage=stage)
+    registry.inc("stage_total", 1, "Pipeline stage executions", stage=stage, status="error" if failed else "ok")
+
+
+def timer(stage: str):
+    """
+    Context manager timing a pipeline stage.
+
+    Usage:
+        with metrics.timer("pdf_load"):
+            ...
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+
+def timed(stage: str):
+    """Decorator timing every call of a function as a pipeline stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def inc(name: str, value: float = 1.0, help_text: str = "", **labels):
+    """Increase a counter if metrics are enabled."""
+    if _enabled:
+        registry.inc(name, value, help_text, **labels)
+
+
+def observe(
+    name: str,
+    value: float,
+    help_text: str = "",
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    **labels
+):
+    """Record a histogram observation if metrics are enabled."""
+    if _enabled:
+        registry.observe(name, value, help_text, buckets, **labels)
+
+
+def _make_handler():
+    # http.server is only imported once an exporter is actually started
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format % args)
+
+    return MetricsHandler
+
+
+def _write_file_periodically(path: Path, interval: float):
+    tmp_path = path.with_suffix(".tmp")
+    while True:
+        try:
+            tmp_path.write_text(registry.render(), encoding="utf-8")
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics file {path}: {e}")
+        time.sleep(interval)
+
+
+def start_exporter(
+    port: Optional[int] = None,
+    file_path: Optional[str] = None,
+    host: Optional[str] = None
+) -> bool:
+    """
+    Start exporting metrics, once per process.
+
+    Serves /metrics over HTTP when a port is set and/or rewrites a .prom file
+    periodically when a path is set (for node_exporter's textfile collector).
+
+    Args:
+        port: HTTP port (default from env: METRICS_PORT; unset disables)
+        file_path: Output file (default from env: METRICS_FILE; unset disables)
+        host: Interface to bind the HTTP server to (default from env: METRICS_HOST or '127.0.0.1')
+
+    Returns:
+        True if an exporter was started by this call
+    """
+    global _exporter_started
+
+    configure()
+    if not _enabled:
+        return False
+
+    with _exporter_lock:
+        if _exporter_started:
+            return False
+
+        if port is None and os.getenv("METRICS_PORT"):
+            port = int(os.getenv("METRICS_PORT"))
+        if file_path is None:
+            file_path = os.getenv("METRICS_FILE") or None
+        if host is None:
+            host = os.getenv("METRICS_HOST", "127.0.0.1")
+
+        if port:
+            from http.server import ThreadingHTTPServer
+
+            server = ThreadingHTTPServer((host, port), _make_handler())
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+        if file_path:
+            interval = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+            path = Path(file_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            threading.Thread(
+                target=_write_file_periodically,
+                args=(path, interval),
+                name="metrics-file",
+                daemon=True
+            ).start()
+            logger.info(f"Writing metrics to {file_path} every {interval:g}s")
+
+        _exporter_started = True
+        return True
@@ -0,0 +1,219 @@
+"""Opt-in profiling of ingestion and question answering."""
+import io
+import os
+import re
+import sys
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_MODES = ("cprofile", "tracemalloc", "sampling")
+
+_local = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_warned_modes = set()
+
+
+def _settings() -> dict:
+    """
+    Read profiling settings from the environment on every call.
+
+    Nothing else is parsed while profiling is disabled, and unknown modes
+    are skipped with a warning: a bad setting never fails the profiled call.
+    """
+    if os.getenv("PROFILE_ENABLED", "false").lower() != "true":
+        return {"enabled": False}
+
+    modes = [m.strip() for m in os.getenv("PROFILE_MODES", "cprofile").split(",") if m.strip()]
+    unknown = set(modes) - set(PROFILE_MODES)
+    if unknown:
+        modes = [m for m in modes if m in PROFILE_MODES]
+        if unknown - _warned_modes:
+            _warned_modes.update(unknown)
+            logger.warning(
+                f"Ignoring unknown profile modes: {', '.join(sorted(unknown))} "
+                f"(expected {', '.join(PROFILE_MODES)})"
+            )
+
+    return {
+        "enabled": bool(modes),
+        "modes": modes,
+        "rate": float(os.getenv("PROFILE_RATE", "1.0")),
+        "directory": Path(os.getenv("PROFILE_DIR", "/app/data/profiles")),
+        "interval": float(os.getenv("PROFILE_SAMPLING_INTERVAL_MS", "10")) / 1000,
+        "top": int(os.getenv("PROFILE_TOP", "30")),
+    }
+
+
+def _output_prefix(directory: Path, name: str, tag: str) -> Path:
+    safe_tag = re.sub(r"[^A-Za-z0-9_.-]", "_", tag)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{name}-{safe_tag}-{timestamp}"
+
+
+class StackSampler:
+    """
+    Statistical profiler sampling one thread's stack at a fixed interval.
+
+    Much cheaper than cProfile on long runs; writes stacks in the collapsed
+    format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _start_tracemalloc():
+    import tracemalloc
+
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc(path: Path, top: int):
+    import tracemalloc
+
+    global _tracemalloc_users
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"current: {current / 1024 / 1024:.1f} MiB, peak: {peak / 1024 / 1024:.1f} MiB\n\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            f.write(f"{stat}\n")
+
+
+@contextmanager
+def profile(name: str, tag: str) -> Iterator[Optional[List[Path]]]:
+    """
+    Profile the block if enabled by the environment.
+
+    Settings (read on every call):
+        PROFILE_ENABLED: 'true' to profile
+        PROFILE_MODES: Comma-separated 'cprofile', 'tracemalloc', 'sampling'
+        PROFILE_RATE: Fraction of calls to profile (0.0-1.0)
+        PROFILE_SAMPLING_INTERVAL_MS: Stack sampling interval
+        PROFILE_DIR: Output directory
+        PROFILE_TOP: Entries written to the text reports
+
+    Output files are named '<name>-<tag>-<timestamp>' with the extensions
+    .prof (pstats dump), .txt (top functions by cumulative time),
+    .tracemalloc.txt (top allocations) and .collapsed (sampled stacks).
+    Nested profiles in the same thread are not profiled again.
+
+    Args:
+        name: What is profiled, e.g. 'ingest' or 'qa'
+        tag: Identifies the request, e.g. 'document-12' or 'session-<id>'
+
+    Yields:
+        List the output paths are appended to after the block, or None if not profiled
+    """
+    settings = _settings()
+    if (
+        not settings["enabled"]
+        or getattr(_local, "active", False)
+        or random.random() >= settings["rate"]
+    ):
+        yield None
+        return
+
+    modes = settings["modes"]
+    prefix = _output_prefix(settings["directory"], name, tag)
+    outputs: List[Path] = []
+
+    profiler = sampler = None
+    if "tracemalloc" in modes:
+        _start_tracemalloc()
+    if "sampling" in modes:
+        sampler = StackSampler(threading.get_ident(), settings["interval"])
+        sampler.start()
+    if "cprofile" in modes:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    _local.active = True
+    start = time.perf_counter()
+    try:
+        yield outputs
+    finally:
+        _local.active = False
+        elapsed = time.perf_counter() - start
+
+        try:
+            if profiler is not None:
+                import pstats
+
+                profiler.disable()
+                outputs.append(Path(f"{prefix}.prof"))
+                profiler.dump_stats(str(outputs[-1]))
+
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(settings["top"])
+                outputs.append(Path(f"{prefix}.txt"))
+                outputs[-1].write_text(report.getvalue(), encoding="utf-8")
+
+            if sampler is not None:
+                sampler.stop()
+                outputs.append(Path(f"{prefix}.collapsed"))
+                sampler.write(outputs[-1])
+
+            if "tracemalloc" in modes:
+                outputs.append(Path(f"{prefix}.tracemalloc.txt"))
+                _stop_tracemalloc(outputs[-1], settings["top"])
+
+            logger.info(f"Profiled {name} ({tag}) for {elapsed:.1f}s: {', '.join(p.name for p in outputs)}")
+        except Exception as e:
+            # Profiling must never fail the request it observes
+            logger.warning(f"Failed to write profile for {name} ({tag}): {e}")
@@ -0,0 +1,273 @@
+"""Exact and near-duplicate chunk detection before embedding."""
+import os
+import re
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+# Chunk metadata keys written by the deduplicator
+CONTENT_HASH_KEY = "content_hash"
+SIMHASH_KEY = "simhash"
+DUPLICATE_SOURCES_KEY = "duplicate_sources"
+BAND_KEYS = [f"simhash_b{i}" for i in range(SIMHASH_BANDS)]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class Fingerprint:
+    """Content fingerprint of a chunk."""
+
+    content_hash: str
+    simhash: int
+
+    @property
+    def bands(self) -> List[int]:
+        """Split the SimHash into equally sized bands for candidate lookup."""
+        mask = (1 << BAND_BITS) - 1
+        return [(self.simhash >> (i * BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+@dataclass
+class DedupStats:
+    """Savings reported by a deduplication run."""
+
+    total_chunks: int = 0
+    kept_chunks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    corpus_duplicates: int = 0
+    chars_skipped: int = 0
+
+    @property
+    def embedding_calls_saved(self) -> int:
+        """Number of texts that no longer need to be embedded."""
+        return self.total_chunks - self.kept_chunks
+
+    def index_bytes_saved(self, dimension: int = 1536) -> int:
+        """Estimated vector store bytes saved (float32 vectors plus text).
+
+        Duplicates of stored chunks are still stored (with a copied
+        embedding), so only in-document duplicates save space.
+        """
+        dropped = self.embedding_calls_saved - self.corpus_duplicates
+        return dropped * dimension * 4 + self.chars_skipped
+
+    def as_dict(self) -> Dict:
+        """Stats as a plain dictionary for logging and display."""
+        return {
+            "total_chunks": self.total_chunks,
+            "kept_chunks": self.kept_chunks,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "corpus_duplicates": self.corpus_duplicates,
+            "embedding_calls_saved": self.embedding_calls_saved,
+            "index_bytes_saved": self.index_bytes_saved(),
+        }
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so layout differences do not defeat exact matching."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str, shingle_size: int = 4) -> int:
+    """
+    Compute a 64-bit SimHash over character shingles.
+
+    Character shingles work for Japanese as well as English text, which has
+    no reliable word boundaries to tokenize on.
+
+    Args:
+        text: Text to fingerprint
+        shingle_size: Number of characters per shingle
+
+    Returns:
+        SimHash as an unsigned 64-bit integer
+    """
+    normalized = normalize_text(text).lower()
+    if len(normalized) <= shingle_size:
+        shingles = [normalized]
+    else:
+        shingles = [normalized[i:i + shingle_size] for i in range(len(normalized) - shingle_size + 1)]
+
+    digests = b"".join(
+        hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles
+    )
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(shingles), SIMHASH_BITS)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+
+    value = 0
+    for bit in np.flatnonzero(votes > 0):
+        value |= 1 << (SIMHASH_BITS - 1 - int(bit))
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two SimHashes."""
+    return bin(a ^ b).count("1")
+
+
+def fingerprint(text: str, shingle_size: int = 4) -> Fingerprint:
+    """Compute both the exact and the near-duplicate fingerprint of a text."""
+    return Fingerprint(content_hash=content_hash(text), simhash=simhash(text, shingle_size))
+
+
+def fingerprint_metadata(fp: Fingerprint) -> Dict:
+    """Chunk metadata that lets later ingests find this chunk as a duplicate."""
+    metadata = {CONTENT_HASH_KEY: fp.content_hash, SIMHASH_KEY: f"{fp.simhash:016x}"}
+    metadata.update(zip(BAND_KEYS, fp.bands))
+    return metadata
+
+
+# (vector_id, fingerprint) pairs of already indexed chunks
+CorpusLookup = Callable[[List[Fingerprint]], Iterable[Tuple[str, Fingerprint]]]
+
+
+class ChunkDeduplicator:
+    """
+    Drops duplicate chunks before they are embedded.
+
+    Exact duplicates are found by content hash and near duplicates by SimHash
+    Hamming distance, both within the current document and, when a corpus
+    lookup is given, against chunks already stored in the vector store.
+    Kept chunks record the pages of their in-document duplicates in the
+    ``duplicate_sources`` metadata. Duplicates of stored chunks are not
+    returned but collected in ``corpus_matches``: they belong to this
+    document, so the caller stores them as vectors of their own that reuse
+    the stored chunk's embedding, keeping retrieval scoped to a document
+    complete.
+    """
+
+    def __init__(
+        self,
+        corpus_lookup: Optional[CorpusLookup] = None,
+        max_distance: int = None,
+        shingle_size: int = 4
+    ):
+        """
+        Initialize chunk deduplicator.
+
+        Args:
+            corpus_lookup: Returns stored chunks matching any of the given fingerprints (optional)
+            max_distance: Maximum SimHash Hamming distance for a near duplicate
+                (default from env: DEDUP_MAX_DISTANCE or 3; at most SIMHASH_BANDS - 1)
+            shingle_size: Number of characters per SimHash shingle
+        """
+        if max_distance is None:
+            max_distance = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+        if max_distance >= SIMHASH_BANDS:
+            raise ValueError(f"max_distance must be less than {SIMHASH_BANDS}")
+
+        self.corpus_lookup = corpus_lookup
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.stats = DedupStats()
+        # Stored vector ID -> chunks of this document that duplicate it
+        self.corpus_matches: Dict[str, List[Document]] = {}
+
+        # key -> fingerprint, and lookup tables by content hash and by band value
+        self._fingerprints: Dict[str, Fingerprint] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._by_band: List[Dict[int, List[str]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def _index(self, key: str, fp: Fingerprint):
+        self._fingerprints[key] = fp
+        self._by_hash.setdefault(fp.content_hash, key)
+        for band, value in zip(self._by_band, fp.bands):
+            band.setdefault(value, []).append(key)
+
+    def _find(self, fp: Fingerprint) -> Tuple[Optional[str], bool]:
+        """Return (matching key, exact) for a fingerprint, or (None, False)."""
+        key = self._by_hash.get(fp.content_hash)
+        if key is not None:
+            return key, True
+
+        # A distance below SIMHASH_BANDS leaves at least one band identical
+        for band, value in zip(self._by_band, fp.bands):
+            for candidate in band.get(value, []):
+                if hamming_distance(fp.simhash, self._fingerprints[candidate].simhash) <= self.max_distance:
+                    return candidate, False
+
+        return None, False
+
+    def deduplicate(self, chunks: List[Document]) -> List[Document]:
+        """
+        Remove duplicate chunks.
+
+        Args:
+            chunks: Chunks in document order
+
+        Returns:
+            Chunks to embed, with fingerprint metadata added (duplicates of
+            stored chunks are in corpus_matches instead)
+        """
+        fingerprints = [fingerprint(c.page_content, self.shingle_size) for c in chunks]
+
+        if self.corpus_lookup is not None and fingerprints:
+            for vector_id, fp in self.corpus_lookup(fingerprints):
+                self._index(f"corpus:{vector_id}", fp)
+
+        kept: List[Document] = []
+        kept_by_key: Dict[str, Document] = {}
+
+        for chunk, fp in zip(chunks, fingerprints):
+            self.stats.total_chunks += 1
+            key, exact = self._find(fp)
+
+            if key is None:
+                chunk.metadata.update(fingerprint_metadata(fp))
+                new_key = f"chunk:{len(self._fingerprints)}"
+                self._index(new_key, fp)
+                kept_by_key[new_key] = chunk
+                kept.append(chunk)
+                self.stats.kept_chunks += 1
+                continue
+
+            if exact:
+                self.stats.exact_duplicates += 1
+            else:
+                self.stats.near_duplicates += 1
+
+            if key.startswith("corpus:"):
+                # Findable by later documents like any stored chunk
+                chunk.metadata.update(fingerprint_metadata(fp))
+                self.stats.corpus_duplicates += 1
+                self.corpus_matches.setdefault(key[len("corpus:"):], []).append(chunk)
+                continue
+
+            self.stats.chars_skipped += len(chunk.page_content)
+            source = {
+                "source": chunk.metadata.get("source"),
+                "page": chunk.metadata.get("page"),
+            }
+            canonical = kept_by_key[key]
+            sources = json.loads(canonical.metadata.get(DUPLICATE_SOURCES_KEY, "[]"))
+            if source not in sources:
+                sources.append(source)
+            canonical.metadata[DUPLICATE_SOURCES_KEY] = json.dumps(sources, ensure_ascii=False)
+
+        logger.info(
+            f"Deduplicated {self.stats.total_chunks} chunks: kept {self.stats.kept_chunks}, "
+            f"exact {self.stats.exact_duplicates}, near {self.stats.near_duplicates}, "
+            f"corpus {self.stats.corpus_duplicates}"
+        )
+        return kept
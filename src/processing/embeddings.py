@@ -1,20 +1,145 @@
 """Embedding generation utilities."""
 import os
+import math
+import time
 import logging
+import threading
+from typing import List, Optional
+
 from langchain_openai import OpenAIEmbeddings
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.schema.embeddings import Embeddings
+from langchain.storage import LocalFileStore
+
+from ..clients import get_client_registry
+from ..observability import accounting, metrics
 
 logger = logging.getLogger(__name__)
 
 
-def get_embeddings(model: str = None) -> OpenAIEmbeddings:
+class TimedEmbeddings(Embeddings):
+    """Records embedding calls as the 'embed' and 'embed_query' stages."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with metrics.timer("embed"):
+            vectors = self.embeddings.embed_documents(texts)
+        metrics.inc("embedded_texts_total", len(texts), "Texts sent for embedding")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with metrics.timer("embed_query"):
+            return self.embeddings.embed_query(text)
+
+
+class AccountedEmbeddings(Embeddings):
+    """
+    Records embedding API calls, tokens and latency for usage accounting.
+
+    Sits directly on the API client, beneath any cache, so only texts that
+    were actually sent to the API are counted.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+        self._local = threading.local()
+
+    def texts_sent(self) -> int:
+        """Texts this thread has sent to the API so far."""
+        return getattr(self._local, "texts_sent", 0)
+
+    def _embed(self, texts: List[str], embed):
+        start = time.perf_counter()
+        try:
+            result = embed()
+        except Exception:
+            accounting.record(
+                accounting.EMBEDDING,
+                self.model,
+                errors=1,
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
+            raise
+
+        # The client sends one request per chunk_size texts
+        batch_size = getattr(self.embeddings, "chunk_size", None) or len(texts)
+        self._local.texts_sent = self.texts_sent() + len(texts)
+        accounting.record(
+            accounting.EMBEDDING,
+            self.model,
+            calls=math.ceil(len(texts) / batch_size),
+            input_tokens=accounting.count_tokens(texts, self.model),
+            latency_ms=(time.perf_counter() - start) * 1000
+        )
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return self.embeddings.embed_documents(texts)
+        return self._embed(texts, lambda: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], lambda: self.embeddings.embed_query(text))
+
+
+class CacheHitCounter(Embeddings):
+    """Records the texts a cache answered without reaching the API."""
+
+    def __init__(self, embeddings: Embeddings, api: AccountedEmbeddings):
+        self.embeddings = embeddings
+        self.api = api
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        sent_before = self.api.texts_sent()
+        vectors = self.embeddings.embed_documents(texts)
+        hits = len(texts) - (self.api.texts_sent() - sent_before)
+        if hits:
+            accounting.record(accounting.EMBEDDING, self.api.model, calls=0, cache_hits=hits)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+def embedding_model_name(embeddings: Embeddings) -> Optional[str]:
+    """
+    Get the model name behind any accounting, cache or timing wrappers.
+
+    Args:
+        embeddings: Embeddings, possibly wrapped
+
+    Returns:
+        Model name, or None if the embeddings do not report one
+    """
+    while embeddings is not None:
+        model = getattr(embeddings, "model", None)
+        if isinstance(model, str):
+            return model
+        embeddings = getattr(embeddings, "embeddings", None) or getattr(embeddings, "underlying_embeddings", None)
+    return None
+
+
+def get_embeddings(
+    model: str = None,
+    cache_dir: str = None,
+    base_url: str = None
+) -> Embeddings:
     """
     Get OpenAI embeddings model.
 
     Args:
         model: Model name (default from env: EMBEDDING_MODEL or 'text-embedding-3-small')
+        cache_dir: Directory caching document embeddings by text hash
+            (default from env: EMBEDDING_CACHE_DIR; empty disables the cache)
+        base_url: OpenAI-compatible API base URL, e.g. a local stand-in
+            (default from env: OPENAI_BASE_URL; empty uses the OpenAI API)
 
     Returns:
-        Configured OpenAIEmbeddings instance
+        Configured OpenAIEmbeddings instance, wrapped for usage accounting,
+        in a cache and in TimedEmbeddings when those are enabled
 
     Raises:
         ValueError: If OPENAI_API_KEY is not set
@@ -26,8 +151,43 @@ def get_embeddings(model: str = None) -> OpenAIEmbeddings:
     if model is None:
         model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 
+    if cache_dir is None:
+        cache_dir = os.getenv("EMBEDDING_CACHE_DIR", "")
+
+    if base_url is None:
+        base_url = os.getenv("OPENAI_BASE_URL", "")
+
     logger.info(f"Initializing embeddings with model: {model}")
-    return OpenAIEmbeddings(
+    if base_url:
+        logger.info(f"Using OpenAI-compatible API at: {base_url}")
+    # Borrow the shared pooled client instead of opening new connections
+    registry = get_client_registry()
+    client = registry.openai_client(api_key, base_url or None)
+    async_client = registry.async_openai_client(api_key, base_url or None)
+    embeddings = OpenAIEmbeddings(
         model=model,
-        openai_api_key=api_key
-    )
\ No newline at end of file
+        openai_api_key=api_key,
+        openai_api_base=base_url or None,
+        client=client.embeddings,
+        async_client=async_client.embeddings
+    )
+
+    api = None
+    if accounting.is_enabled():
+        embeddings = api = AccountedEmbeddings(embeddings, model)
+
+    if cache_dir:
+        # Namespaced by model so switching models never returns stale vectors
+        logger.info(f"Caching document embeddings in: {cache_dir}")
+        embeddings = CacheBackedEmbeddings.from_bytes_store(
+            embeddings,
+            LocalFileStore(cache_dir),
+            namespace=model
+        )
+        if api is not None:
+            embeddings = CacheHitCounter(embeddings, api)
+
+    if metrics.is_enabled():
+        embeddings = TimedEmbeddings(embeddings)
+
+    return embeddings
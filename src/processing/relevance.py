@@ -0,0 +1,100 @@
+"""Local re-scoring of retrieval candidates to choose how many to send."""
+import re
+import logging
+from dataclasses import dataclass
+from typing import List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Latin words and digits, or runs of Japanese characters
+_WORD = re.compile(r"[a-z0-9]+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+")
+
+
+def query_terms(text: str) -> Set[str]:
+    """
+    Split text into terms for lexical matching.
+
+    Latin text is split into words of two or more characters. Japanese has
+    no word boundaries, so its runs are split into character bigrams.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Set of terms
+    """
+    lowered = text.lower()
+    terms = {word for word in _WORD.findall(lowered) if len(word) > 1}
+    for run in _CJK.findall(lowered):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def lexical_overlap(terms: Set[str], text: str) -> float:
+    """Share of the query terms that occur in the text (0.0 to 1.0)."""
+    if not terms:
+        return 0.0
+    return len(terms & query_terms(text)) / len(terms)
+
+
+@dataclass
+class ScoredChunk:
+    """A retrieval candidate with its local relevance scores."""
+
+    # Position in the candidate list
+    index: int
+    vector_score: float
+    lexical_score: float
+    score: float
+
+
+def select_relevant(
+    query: str,
+    candidates: List[Tuple[str, float]],
+    min_k: int = 1,
+    max_k: int = 4,
+    threshold: float = 0.3,
+    lexical_weight: float = 0.3,
+    max_gap: float = 0.1
+) -> List[ScoredChunk]:
+    """
+    Choose the candidates worth sending to the LLM.
+
+    Each candidate's vector relevance is blended with its lexical overlap
+    with the query. The best min_k candidates are always kept; further
+    candidates are kept, up to max_k, while their score is at least the
+    threshold and does not drop by more than max_gap from the previous one.
+    A large drop separates the chunks that answer the question from those
+    that merely share its topic.
+
+    Args:
+        query: User's question
+        candidates: (text, vector relevance in 0.0 to 1.0) pairs
+        min_k: Chunks always kept (if available)
+        max_k: Maximum chunks kept
+        threshold: Minimum blended score beyond the first min_k
+        lexical_weight: Weight of the lexical overlap in the blended score
+        max_gap: Largest allowed score drop between consecutive chunks
+
+    Returns:
+        Kept candidates, best first
+    """
+    terms = query_terms(query)
+    scored = []
+    for index, (text, vector_score) in enumerate(candidates):
+        vector_score = min(max(vector_score, 0.0), 1.0)
+        lexical_score = lexical_overlap(terms, text)
+        score = (1 - lexical_weight) * vector_score + lexical_weight * lexical_score
+        scored.append(ScoredChunk(index, vector_score, lexical_score, score))
+    scored.sort(key=lambda chunk: chunk.score, reverse=True)
+
+    kept = scored[:min_k]
+    for chunk in scored[min_k:max_k]:
+        if chunk.score < threshold or (kept and kept[-1].score - chunk.score > max_gap):
+            break
+        kept.append(chunk)
+    return kept
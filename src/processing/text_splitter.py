@@ -1,22 +1,248 @@
 """Text splitting utilities for document processing."""
 import os
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 
+# Break points tried from strongest to weakest when ending a chunk
+DEFAULT_BREAK_SEPARATORS = [
+    "\n\n", "\n", "。", "．", "！", "？", ". ", "! ", "? ", "、", "，", ", ", " "
+]
+
+# Break points used to align the start of an overlapping chunk
+DEFAULT_START_SEPARATORS = ["\n", "。", "．", ". ", " "]
+
+
+class ApproxTokenTextSplitter:
+    """
+    Single-pass text splitter that sizes chunks in approximate tokens.
+
+    Token counts are estimated per character: ASCII costs 1/4 token, other
+    alphabetic scripts 1/2 and CJK and everything above U+3000 one token,
+    which tracks OpenAI tokenizers far better than character counts for
+    mixed Japanese and English text. Each page is scanned once with numpy;
+    chunk ends snap back to the nearest paragraph, line, sentence or word
+    break. Chunks record their ``start_index``/``end_index`` character
+    offsets into the page text.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 300,
+        chunk_overlap: int = 60,
+        ascii_cost: float = 0.25,
+        alphabetic_cost: float = 0.5,
+        break_separators: Optional[List[str]] = None,
+        start_separators: Optional[List[str]] = None
+    ):
+        """
+        Initialize approximate-token text splitter.
+
+        Args:
+            chunk_size: Maximum chunk size in approximate tokens
+            chunk_overlap: Overlap between consecutive chunks in approximate tokens
+            ascii_cost: Tokens per ASCII character
+            alphabetic_cost: Tokens per non-ASCII character below U+3000
+            break_separators: Separators a chunk may end on, strongest first
+            start_separators: Separators an overlapping chunk may start after
+
+        Raises:
+            ValueError: If chunk_overlap is not smaller than chunk_size
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})"
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.ascii_cost = ascii_cost
+        self.alphabetic_cost = alphabetic_cost
+        self.break_separators = break_separators or DEFAULT_BREAK_SEPARATORS
+        self.start_separators = start_separators or DEFAULT_START_SEPARATORS
+
+    def token_positions(self, text: str) -> np.ndarray:
+        """
+        Cumulative approximate token count before each character.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Array of length len(text) + 1; element i is the cost of text[:i]
+        """
+        code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        cost = np.where(
+            code_points < 0x80,
+            self.ascii_cost,
+            np.where(code_points < 0x3000, self.alphabetic_cost, 1.0)
+        )
+        positions = np.empty(len(code_points) + 1, dtype=np.float64)
+        positions[0] = 0.0
+        np.cumsum(cost, out=positions[1:])
+        return positions
+
+    def count_tokens(self, text: str) -> float:
+        """Approximate token count of a text."""
+        return float(self.token_positions(text)[-1])
+
+    def _find_end(self, text: str, start: int, limit: int) -> int:
+        """Move a chunk end back to the strongest break in its second half."""
+        floor = start + (limit - start) // 2
+        for separator in self.break_separators:
+            index = text.rfind(separator, floor, limit)
+            if index != -1:
+                return index + len(separator)
+        return limit
+
+    def _find_start(self, text: str, start: int, end: int) -> int:
+        """Move an overlap start forward to just after the nearest break."""
+        best = end
+        for separator in self.start_separators:
+            index = text.find(separator, start, best)
+            if index != -1:
+                best = index + len(separator)
+        return best if best < end else start
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into chunk spans.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of (start, end) character offsets; text[start:end] is the
+            chunk content with surrounding whitespace removed
+        """
+        length = len(text)
+        if length == 0:
+            return []
+
+        positions = self.token_positions(text)
+        spans: List[Tuple[int, int]] = []
+        start = 0
+
+        while start < length:
+            while start < length and text[start].isspace():
+                start += 1
+            if start >= length:
+                break
+
+            # Largest end whose cost from start fits in chunk_size
+            limit = int(np.searchsorted(positions, positions[start] + self.chunk_size, side="right")) - 1
+            if limit >= length:
+                end = length
+            else:
+                end = self._find_end(text, start, max(limit, start + 1))
+
+            chunk_start, chunk_end = start, end
+            while chunk_end > chunk_start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_end > chunk_start:
+                spans.append((chunk_start, chunk_end))
+
+            if end >= length:
+                break
+
+            next_start = int(np.searchsorted(positions, positions[end] - self.chunk_overlap, side="left"))
+            next_start = self._find_start(text, max(next_start, start + 1), end)
+            start = max(next_start, start + 1)
+
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunk strings."""
+        return [text[start:end] for start, end in self.split_text_with_offsets(text)]
+
+    def create_documents(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None
+    ) -> List[Document]:
+        """
+        Create chunk documents from texts.
+
+        Args:
+            texts: Texts to split
+            metadatas: Metadata for each text (optional)
+
+        Returns:
+            List of Document objects with start_index/end_index metadata
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{}] * len(texts)
+
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, end in self.split_text_with_offsets(text):
+                documents.append(
+                    Document(
+                        page_content=text[start:end],
+                        metadata={**metadata, "start_index": start, "end_index": end}
+                    )
+                )
+        return documents
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        """
+        Split documents into chunks.
+
+        Args:
+            documents: Documents (e.g. PDF pages) to split
+
+        Returns:
+            List of Document objects split into chunks
+        """
+        documents = list(documents)
+        return self.create_documents(
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents]
+        )
+
+
 def get_text_splitter(
     chunk_size: int = None,
-    chunk_overlap: int = None
-) -> RecursiveCharacterTextSplitter:
+    chunk_overlap: int = None,
+    splitter: str = None
+) -> Union[RecursiveCharacterTextSplitter, ApproxTokenTextSplitter]:
     """
     Get a text splitter configured with specified or environment parameters.
 
     Args:
-        chunk_size: Size of each text chunk (default from env: CHUNK_SIZE or 1000)
-        chunk_overlap: Overlap between chunks (default from env: CHUNK_OVERLAP or 200)
+        chunk_size: Size of each text chunk; characters for 'recursive', approximate tokens for 'token'
+            (default from env: CHUNK_SIZE or 1000, CHUNK_SIZE_TOKENS or 300)
+        chunk_overlap: Overlap between chunks in the same unit
+            (default from env: CHUNK_OVERLAP or 200, CHUNK_OVERLAP_TOKENS or 60)
+        splitter: 'recursive' or 'token' (default from env: TEXT_SPLITTER or 'recursive')
 
     Returns:
-        Configured RecursiveCharacterTextSplitter instance
+        Configured text splitter instance
+
+    Raises:
+        ValueError: If the splitter name is unknown
     """
+    if splitter is None:
+        splitter = os.getenv("TEXT_SPLITTER", "recursive")
+
+    if splitter == "token":
+        if chunk_size is None:
+            chunk_size = int(os.getenv("CHUNK_SIZE_TOKENS", "300"))
+
+        if chunk_overlap is None:
+            chunk_overlap = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+
+        return ApproxTokenTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+
+    if splitter != "recursive":
+        raise ValueError(f"Unknown text splitter: {splitter}")
+
     if chunk_size is None:
         chunk_size = int(os.getenv("CHUNK_SIZE", "1000"))
 
@@ -28,4 +254,4 @@ def get_text_splitter(
         chunk_overlap=chunk_overlap,
         length_function=len,
         separators=["\n\n", "\n", " ", ""]
-    )
\ No newline at end of file
+    )
@@ -1,24 +1,109 @@
 """Vector store management using Chroma."""
 import os
+import json
+import gzip
+import time
+import uuid
+import hashlib
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
-
-from .embeddings import get_embeddings
+from langchain.schema.embeddings import Embeddings
+
+from .embeddings import embedding_model_name, get_embeddings
+from ..observability import metrics
+from .dedup import (
+    Fingerprint,
+    content_hash,
+    CONTENT_HASH_KEY,
+    SIMHASH_KEY,
+    DUPLICATE_SOURCES_KEY,
+    BAND_KEYS,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# Snapshot format
+SNAPSHOT_FORMAT = "doc-sage-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MANIFEST_FILE = "manifest.json"
+SNAPSHOT_EMBEDDINGS_FILE = "embeddings.npy"
+SNAPSHOT_CHUNKS_FILE = "chunks.json.gz"
+
+# Chunk metadata holding the chunk's vector ID (DocumentChunk.vector_id)
+CHUNK_ID_KEY = "chunk_id"
+
+# Fallback when the chromadb client does not report its own limit
+DEFAULT_MAX_BATCH_SIZE = 5000
+
+
+def chunk_vector_id(
+    document_id: int,
+    document_hash: str,
+    chunk_index: int,
+    chunk_content_hash: str
+) -> str:
+    """
+    Derive a chunk's vector ID from what the chunk is.
+
+    Ingesting the same file into the same Document again yields the same
+    IDs, so a retried write overwrites its earlier vectors instead of adding
+    duplicates. The Document ID is part of the key because uploads are
+    stored by content: two Documents can share a file hash.
+
+    Args:
+        document_id: Document the chunk belongs to
+        document_hash: SHA-256 of the document's file
+        chunk_index: Position of the chunk in the split document
+        chunk_content_hash: content_hash() of the chunk text
+
+    Returns:
+        32-character hex ID
+    """
+    key = f"{document_id}:{document_hash}:{chunk_index}:{chunk_content_hash}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _upsert_records(
+    collection,
+    ids: List[str],
+    embeddings: List[List[float]],
+    texts: List[str],
+    metadatas: List[Optional[Dict]]
+):
+    """
+    Upsert records into a chromadb collection, keeping each record's metadata.
+
+    chromadb rejects empty metadata dicts, so records without metadata are
+    written in a separate call instead of dropping the metadata of the rest.
+    """
+    with_metadata = [i for i, metadata in enumerate(metadatas) if metadata]
+    without_metadata = [i for i, metadata in enumerate(metadatas) if not metadata]
+    for positions in (with_metadata, without_metadata):
+        if not positions:
+            continue
+        collection.upsert(
+            ids=[ids[i] for i in positions],
+            embeddings=[embeddings[i] for i in positions],
+            documents=[texts[i] for i in positions],
+            metadatas=[metadatas[i] for i in positions] if positions is with_metadata else None
+        )
+
+
 class VectorStoreManager:
     """Manages Chroma vector store operations."""
 
     def __init__(
         self,
         persist_directory: str = None,
-        collection_name: str = "documents"
+        collection_name: str = "documents",
+        embeddings: Optional[Embeddings] = None
     ):
         """
         Initialize vector store manager.
@@ -26,6 +111,7 @@ class VectorStoreManager:
         Args:
             persist_directory: Directory to persist vector store (default from env: CHROMA_PERSIST_DIRECTORY)
             collection_name: Name of the collection
+            embeddings: Embeddings model (default: get_embeddings())
         """
         if persist_directory is None:
             persist_directory = os.getenv(
@@ -35,7 +121,7 @@ class VectorStoreManager:
 
         self.persist_directory = persist_directory
         self.collection_name = collection_name
-        self.embeddings = get_embeddings()
+        self._embeddings = embeddings
 
         # Ensure directory exists
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
@@ -45,28 +131,30 @@ class VectorStoreManager:
             f"collection: {collection_name}"
         )
 
+    @property
+    def embeddings(self) -> Embeddings:
+        """Embeddings model, created on first use."""
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
     def create_vectorstore(
         self,
-        documents: List[Document]
+        documents: List[Document],
+        ids: Optional[List[str]] = None
     ) -> Chroma:
         """
         Create a new vector store from documents.
 
         Args:
             documents: List of documents to add to the vector store
+            ids: Vector IDs, one per document (default: generated)
 
         Returns:
             Chroma vector store instance
         """
         logger.info(f"Creating vector store with {len(documents)} documents")
-
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            collection_name=self.collection_name,
-            persist_directory=self.persist_directory
-        )
-
+        vectorstore = self.upsert_documents(documents, ids)
         logger.info("Vector store created successfully")
         return vectorstore
 
@@ -90,7 +178,8 @@ class VectorStoreManager:
     def add_documents(
         self,
         documents: List[Document],
-        vectorstore: Optional[Chroma] = None
+        vectorstore: Optional[Chroma] = None,
+        ids: Optional[List[str]] = None
     ) -> Chroma:
         """
         Add documents to an existing vector store.
@@ -98,24 +187,114 @@ class VectorStoreManager:
         Args:
             documents: List of documents to add
             vectorstore: Existing vector store (if None, loads from disk)
+            ids: Vector IDs, one per document (default: generated)
 
         Returns:
             Updated Chroma vector store instance
         """
-        if vectorstore is None:
-            vectorstore = self.get_vectorstore()
-
         logger.info(f"Adding {len(documents)} documents to vector store")
-        vectorstore.add_documents(documents)
-
+        vectorstore = self.upsert_documents(documents, ids, vectorstore)
         logger.info("Documents added successfully")
         return vectorstore
 
+    def chunk_ids(
+        self,
+        document_id: int,
+        document_hash: str,
+        chunks: List[Document]
+    ) -> List[str]:
+        """
+        Deterministic vector IDs for a document's chunks (see chunk_vector_id).
+
+        Args:
+            document_id: Document the chunks belong to
+            document_hash: SHA-256 of the document's file
+            chunks: All chunks of the document in split order, before deduplication
+
+        Returns:
+            One ID per chunk
+        """
+        return [
+            chunk_vector_id(document_id, document_hash, index, content_hash(chunk.page_content))
+            for index, chunk in enumerate(chunks)
+        ]
+
+    def upsert_documents(
+        self,
+        documents: List[Document],
+        ids: Optional[List[str]] = None,
+        vectorstore: Optional[Chroma] = None,
+        batch_size: Optional[int] = None,
+        skip_existing: bool = True
+    ) -> Chroma:
+        """
+        Embed and write documents in size-bounded batches, replacing records with the same ID.
+
+        Each batch is embedded and written in its own call, so chromadb's
+        batch limit is never exceeded and a crash loses at most the batch in
+        flight. With skip_existing, IDs already in the collection are not
+        embedded again: with deterministic IDs (chunk_ids) an interrupted
+        write resumes where it stopped.
+
+        Args:
+            documents: Documents to write
+            ids: Vector IDs, one per document (default: generated)
+            vectorstore: Existing vector store (if None, loads from disk)
+            batch_size: Records per write (default from env: VECTOR_WRITE_BATCH_SIZE,
+                500; capped at chromadb's maximum batch size)
+            skip_existing: Keep records whose ID is already stored instead of
+                embedding them again
+
+        Returns:
+            Chroma vector store instance
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+        if ids is None:
+            ids = [uuid.uuid4().hex for _ in documents]
+        if len(ids) != len(documents):
+            raise ValueError(f"Got {len(ids)} ids for {len(documents)} documents")
+
+        batch_size = min(
+            batch_size or int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "500")),
+            self._max_batch_size(vectorstore)
+        )
+        collection = vectorstore._collection
+        written = skipped = 0
+
+        # Includes embedding time; the 'embed' stage reports it separately
+        with metrics.timer("vector_write"):
+            for begin in range(0, len(documents), batch_size):
+                batch = list(zip(ids[begin:begin + batch_size], documents[begin:begin + batch_size]))
+                if skip_existing:
+                    stored = set(collection.get(ids=[vector_id for vector_id, _ in batch], include=[])["ids"])
+                    batch = [(vector_id, doc) for vector_id, doc in batch if vector_id not in stored]
+                    skipped += len(stored)
+                if not batch:
+                    continue
+
+                texts = [doc.page_content for _, doc in batch]
+                _upsert_records(
+                    collection,
+                    [vector_id for vector_id, _ in batch],
+                    self.embeddings.embed_documents(texts),
+                    texts,
+                    [doc.metadata for _, doc in batch]
+                )
+                written += len(batch)
+                logger.debug(f"Wrote {written}/{len(documents)} vectors")
+
+        if skipped:
+            logger.info(f"Skipped {skipped} vectors already stored")
+        logger.info(f"Wrote {written} vectors in batches of {batch_size}")
+        return vectorstore
+
     def similarity_search(
         self,
         query: str,
         k: int = 4,
-        vectorstore: Optional[Chroma] = None
+        vectorstore: Optional[Chroma] = None,
+        filter: Optional[Dict] = None
     ) -> List[Document]:
         """
         Search for similar documents.
@@ -124,6 +303,7 @@ class VectorStoreManager:
             query: Search query
             k: Number of results to return
             vectorstore: Existing vector store (if None, loads from disk)
+            filter: Chroma metadata filter, e.g. {"document_id": 1} (optional)
 
         Returns:
             List of similar documents
@@ -132,11 +312,297 @@ class VectorStoreManager:
             vectorstore = self.get_vectorstore()
 
         logger.info(f"Searching for top {k} similar documents")
-        results = vectorstore.similarity_search(query, k=k)
+        with metrics.timer("retrieval"):
+            results = vectorstore.similarity_search(query, k=k, filter=filter)
 
         logger.info(f"Found {len(results)} results")
         return results
 
+    def delete_document(
+        self,
+        document_id: int,
+        vectorstore: Optional[Chroma] = None
+    ):
+        """
+        Delete all chunks of a document from the collection.
+
+        Args:
+            document_id: Document ID stored in chunk metadata
+            vectorstore: Existing vector store (if None, loads from disk)
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        vectorstore._collection.delete(where={"document_id": document_id})
+        logger.info(f"Deleted chunks of document {document_id} from {self.collection_name}")
+
+    def delete_stale_chunks(
+        self,
+        document_id: int,
+        keep_ids: List[str],
+        vectorstore: Optional[Chroma] = None
+    ) -> int:
+        """
+        Delete a document's vectors that are not among its current chunk IDs.
+
+        Removes what an interrupted run with different chunks left behind.
+
+        Args:
+            document_id: Document ID stored in chunk metadata
+            keep_ids: Vector IDs of the document's current chunks
+            vectorstore: Existing vector store (if None, loads from disk)
+
+        Returns:
+            Number of vectors deleted
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        keep = set(keep_ids)
+        stored = collection.get(where={"document_id": document_id}, include=[])["ids"]
+        stale = [vector_id for vector_id in stored if vector_id not in keep]
+        if stale:
+            collection.delete(ids=stale)
+            logger.info(f"Deleted {len(stale)} stale chunks of document {document_id}")
+        return len(stale)
+
+    def release_document(
+        self,
+        document_id: int,
+        owners: Callable[[List[str]], Dict[str, int]],
+        vectorstore: Optional[Chroma] = None
+    ) -> Dict[int, List[Tuple[str, Document]]]:
+        """
+        Delete a document's chunks, handing shared ones to the documents using them.
+
+        Vectors stored before corpus duplicates got vectors of their own list
+        the chunks of other documents they stand for in duplicate_sources.
+        Such a vector is moved to the first of those documents (document_id,
+        source and page from its entry) and every further document gets a
+        copy of it; the document's other vectors are deleted.
+
+        Args:
+            document_id: Document ID stored in chunk metadata
+            owners: Maps source paths to the ID of the document still using
+                them; paths left out are treated as gone
+            vectorstore: Existing vector store (if None, loads from disk)
+
+        Returns:
+            Document ID -> (vector ID, chunk) pairs now stored for it
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        stored = collection.get(
+            where={"document_id": document_id},
+            include=["documents", "metadatas", "embeddings"]
+        )
+
+        shared = []
+        for vector_id, text, metadata, embedding in zip(
+            stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+        ):
+            if metadata and metadata.get(DUPLICATE_SOURCES_KEY):
+                shared.append((vector_id, text, metadata, embedding))
+        paths = sorted({
+            source.get("source")
+            for _, _, metadata, _ in shared
+            for source in json.loads(metadata[DUPLICATE_SOURCES_KEY])
+            if source.get("source")
+        })
+        owner_ids = owners(paths) if paths else {}
+
+        rehomed: Dict[int, List[Tuple[str, Document]]] = {}
+        kept = set()
+        ids, vectors, texts, metadatas = [], [], [], []
+        for vector_id, text, metadata, embedding in shared:
+            # First entry per document that still exists
+            entries: Dict[int, Dict] = {}
+            for source in json.loads(metadata[DUPLICATE_SOURCES_KEY]):
+                owner = owner_ids.get(source.get("source"))
+                if owner is not None and owner != document_id:
+                    entries.setdefault(owner, source)
+
+            for position, (owner, source) in enumerate(entries.items()):
+                # The first document keeps the vector, the others get copies
+                new_id = vector_id if position == 0 else chunk_vector_id(
+                    owner, vector_id, position, metadata.get(CONTENT_HASH_KEY, "")
+                )
+                chunk_metadata = {
+                    key: value for key, value in metadata.items()
+                    if key not in (DUPLICATE_SOURCES_KEY, "page")
+                }
+                chunk_metadata.update({"document_id": owner, "source": source["source"], CHUNK_ID_KEY: new_id})
+                if source.get("page") is not None:
+                    chunk_metadata["page"] = source["page"]
+
+                ids.append(new_id)
+                vectors.append(list(embedding))
+                texts.append(text)
+                metadatas.append(chunk_metadata)
+                rehomed.setdefault(owner, []).append(
+                    (new_id, Document(page_content=text, metadata=chunk_metadata))
+                )
+            if entries:
+                kept.add(vector_id)
+
+        batch_size = self._max_batch_size(vectorstore)
+        # chromadb merges upserted metadata into the stored record, which
+        # would keep duplicate_sources: kept vectors are written again
+        kept_ids = list(kept)
+        for begin in range(0, len(kept_ids), batch_size):
+            collection.delete(ids=kept_ids[begin:begin + batch_size])
+        for begin in range(0, len(ids), batch_size):
+            end = begin + batch_size
+            _upsert_records(collection, ids[begin:end], vectors[begin:end], texts[begin:end], metadatas[begin:end])
+
+        deleted = [vector_id for vector_id in stored["ids"] if vector_id not in kept]
+        for begin in range(0, len(deleted), batch_size):
+            collection.delete(ids=deleted[begin:begin + batch_size])
+        logger.info(
+            f"Deleted {len(deleted)} chunks of document {document_id}, "
+            f"moved {len(kept)} shared chunks to {len(rehomed)} other documents"
+        )
+        return rehomed
+
+    def find_fingerprints(
+        self,
+        fingerprints: List[Fingerprint],
+        batch_size: int = 500,
+        vectorstore: Optional[Chroma] = None
+    ) -> List[Tuple[str, Fingerprint]]:
+        """
+        Find stored chunks that may duplicate any of the given fingerprints.
+
+        Candidates share the content hash or at least one SimHash band; the
+        caller checks the actual Hamming distance.
+
+        Args:
+            fingerprints: Fingerprints of the chunks about to be added
+            batch_size: Fingerprints per metadata query
+            vectorstore: Existing vector store (if None, loads from disk)
+
+        Returns:
+            List of (vector ID, fingerprint) pairs
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        found: Dict[str, Fingerprint] = {}
+
+        for begin in range(0, len(fingerprints), batch_size):
+            batch = fingerprints[begin:begin + batch_size]
+            clauses = [{CONTENT_HASH_KEY: {"$in": list({fp.content_hash for fp in batch})}}]
+            for i, key in enumerate(BAND_KEYS):
+                clauses.append({key: {"$in": list({fp.bands[i] for fp in batch})}})
+
+            result = collection.get(where={"$or": clauses}, include=["metadatas"])
+            for vector_id, metadata in zip(result["ids"], result["metadatas"]):
+                found[vector_id] = Fingerprint(
+                    content_hash=metadata[CONTENT_HASH_KEY],
+                    simhash=int(metadata[SIMHASH_KEY], 16)
+                )
+
+        logger.info(f"Found {len(found)} stored duplicate candidates")
+        return list(found.items())
+
+    def copy_embeddings(
+        self,
+        matches: Dict[str, List[Tuple[str, Document]]],
+        vectorstore: Optional[Chroma] = None
+    ) -> List[Tuple[str, Document]]:
+        """
+        Store chunks under their own IDs with the embedding of a stored duplicate.
+
+        Each chunk gets a vector with its own text and metadata (so filters
+        on document_id find it) without calling the embeddings model.
+
+        Args:
+            matches: Stored vector ID -> (new vector ID, chunk) pairs duplicating it
+            vectorstore: Existing vector store (if None, loads from disk)
+
+        Returns:
+            (vector ID, chunk) pairs whose stored vector no longer exists; the
+            caller must embed them
+        """
+        if not matches:
+            return []
+
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        stored = collection.get(ids=list(matches), include=["embeddings"])
+        embeddings = dict(zip(stored["ids"], stored["embeddings"]))
+
+        ids, vectors, texts, metadatas = [], [], [], []
+        missing = []
+        for vector_id, pairs in matches.items():
+            for new_id, chunk in pairs:
+                if vector_id not in embeddings:
+                    missing.append((new_id, chunk))
+                    continue
+                ids.append(new_id)
+                vectors.append(list(embeddings[vector_id]))
+                texts.append(chunk.page_content)
+                metadatas.append(chunk.metadata)
+
+        batch_size = self._max_batch_size(vectorstore)
+        for begin in range(0, len(ids), batch_size):
+            end = begin + batch_size
+            _upsert_records(collection, ids[begin:end], vectors[begin:end], texts[begin:end], metadatas[begin:end])
+        logger.info(f"Stored {len(ids)} chunks with copied embeddings")
+        return missing
+
+    def reassign_chunks(
+        self,
+        chunks: Dict[str, Document],
+        vectorstore: Optional[Chroma] = None,
+        replaced_source: Optional[str] = None
+    ) -> int:
+        """
+        Point stored vectors at new chunks without re-embedding them.
+
+        The stored metadata (fingerprints, duplicate sources) is kept and the
+        new chunk's metadata (document_id, source, page, ...) overrides it.
+
+        Args:
+            chunks: Vector ID -> chunk with identical text
+            vectorstore: Existing vector store (if None, loads from disk)
+            replaced_source: Source whose duplicate-source entries are stale
+                (the previous version's file) and are dropped
+
+        Returns:
+            Number of vectors updated
+        """
+        if not chunks:
+            return 0
+
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        stored = collection.get(ids=list(chunks), include=["metadatas"])
+
+        metadatas = []
+        for vector_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = {**(metadata or {}), **chunks[vector_id].metadata}
+            if replaced_source and DUPLICATE_SOURCES_KEY in metadata:
+                sources = [
+                    source for source in json.loads(metadata[DUPLICATE_SOURCES_KEY])
+                    if source.get("source") != replaced_source
+                ]
+                metadata[DUPLICATE_SOURCES_KEY] = json.dumps(sources, ensure_ascii=False)
+            metadatas.append(metadata)
+
+        if metadatas:
+            collection.update(ids=stored["ids"], metadatas=metadatas)
+        logger.info(f"Reassigned {len(metadatas)} stored chunks")
+        return len(metadatas)
+
     def delete_collection(self):
         """Delete the vector store collection."""
         logger.warning(f"Deleting collection: {self.collection_name}")
@@ -144,4 +610,238 @@ class VectorStoreManager:
         vectorstore = self.get_vectorstore()
         vectorstore.delete_collection()
 
-        logger.info("Collection deleted successfully")
\ No newline at end of file
+        logger.info("Collection deleted successfully")
+
+    def _check_snapshot_embeddings(self, manifest: Dict, collection, probe: bool = False):
+        """Raise ValueError if snapshot vectors would not match the collection or the embeddings."""
+        if not manifest.get("count"):
+            return
+
+        snapshot_model = manifest.get("embedding_model")
+        model = embedding_model_name(self.embeddings)
+        if snapshot_model and model and snapshot_model != model:
+            raise ValueError(
+                f"Snapshot was embedded with {snapshot_model}, but this collection uses {model}"
+            )
+
+        dimension = manifest.get("dimension")
+        stored = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if stored and len(stored[0]) != dimension:
+            raise ValueError(
+                f"Snapshot has {dimension}-dimensional vectors, but collection "
+                f"{self.collection_name} stores {len(stored[0])} dimensions"
+            )
+        if not probe:
+            return
+        query_dimension = len(self.embeddings.embed_query("dimension check"))
+        if query_dimension != dimension:
+            raise ValueError(
+                f"Snapshot has {dimension}-dimensional vectors, but the embeddings "
+                f"({model or 'unknown model'}) produce {query_dimension} dimensions"
+            )
+
+    def _max_batch_size(self, vectorstore: Chroma) -> int:
+        """Get the maximum number of records chromadb accepts in one call."""
+        client = getattr(vectorstore, "_client", None)
+        return getattr(client, "max_batch_size", None) or DEFAULT_MAX_BATCH_SIZE
+
+    def export_snapshot(
+        self,
+        snapshot_dir: str,
+        document_ids: Optional[List[int]] = None,
+        batch_size: int = 10000,
+        vectorstore: Optional[Chroma] = None
+    ) -> Dict:
+        """
+        Export the collection to a compact, versioned snapshot.
+
+        The snapshot directory contains:
+            manifest.json: format version, counts, dimension and per-document chunk counts
+            embeddings.npy: contiguous float32 matrix, one row per chunk
+            chunks.json.gz: columnar ids, document_ids, texts and metadatas
+
+        Row i of the embedding matrix belongs to element i of every column.
+
+        Args:
+            snapshot_dir: Directory to write the snapshot into
+            document_ids: Only export chunks of these Document IDs (optional)
+            batch_size: Number of records to read from Chroma per call
+            vectorstore: Existing vector store (if None, loads from disk)
+
+        Returns:
+            Snapshot manifest
+        """
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        where = {"document_id": {"$in": list(document_ids)}} if document_ids else None
+
+        output_dir = Path(snapshot_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"Exporting snapshot of collection {self.collection_name} to {snapshot_dir}")
+        start = time.perf_counter()
+
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict] = []
+        matrix = None
+        offset = 0
+
+        # The upper bound is the collection size; filtered exports may read fewer rows
+        capacity = collection.count()
+
+        while True:
+            batch = collection.get(
+                where=where,
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            batch_ids = batch["ids"]
+            if not batch_ids:
+                break
+
+            vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    output_dir / SNAPSHOT_EMBEDDINGS_FILE,
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(capacity, vectors.shape[1])
+                )
+            matrix[offset:offset + len(batch_ids)] = vectors
+
+            ids.extend(batch_ids)
+            texts.extend(batch["documents"])
+            metadatas.extend(m or {} for m in batch["metadatas"])
+            offset += len(batch_ids)
+
+        count = len(ids)
+        dimension = int(matrix.shape[1]) if matrix is not None else 0
+
+        if matrix is None:
+            np.save(output_dir / SNAPSHOT_EMBEDDINGS_FILE, np.zeros((0, 0), dtype=np.float32))
+        else:
+            matrix.flush()
+            del matrix
+            if count < capacity:
+                # Filtered export: shrink the preallocated matrix to the rows written
+                full = np.load(output_dir / SNAPSHOT_EMBEDDINGS_FILE, mmap_mode="r")
+                trimmed = np.array(full[:count])
+                del full
+                np.save(output_dir / SNAPSHOT_EMBEDDINGS_FILE, trimmed)
+
+        doc_column = [m.get("document_id") for m in metadatas]
+        with gzip.open(output_dir / SNAPSHOT_CHUNKS_FILE, "wt", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": ids,
+                    "document_ids": doc_column,
+                    "texts": texts,
+                    "metadatas": metadatas
+                },
+                f,
+                ensure_ascii=False
+            )
+
+        per_document: Dict[str, int] = {}
+        for document_id in doc_column:
+            key = str(document_id)
+            per_document[key] = per_document.get(key, 0) + 1
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "collection_name": self.collection_name,
+            "embedding_model": embedding_model_name(self.embeddings),
+            "count": count,
+            "dimension": dimension,
+            "dtype": "float32",
+            "documents": per_document,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        with open(output_dir / SNAPSHOT_MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Exported {count} chunks ({dimension} dims) in {elapsed:.2f}s")
+        return manifest
+
+    def import_snapshot(
+        self,
+        snapshot_dir: str,
+        batch_size: Optional[int] = None,
+        vectorstore: Optional[Chroma] = None,
+        verify_embeddings: bool = False
+    ) -> int:
+        """
+        Bulk-load a snapshot into the collection without calling the embeddings model.
+
+        Records whose IDs already exist in the collection are overwritten.
+        The snapshot's embedding model must match the configured one, and its
+        dimension the embedding matrix and the vectors already stored.
+
+        Args:
+            snapshot_dir: Directory written by export_snapshot
+            batch_size: Records per write (default: chromadb's maximum batch size)
+            vectorstore: Existing vector store (if None, loads from disk)
+            verify_embeddings: Also embed one probe query to check the
+                embeddings' dimension (one paid API call)
+
+        Returns:
+            Number of chunks imported
+
+        Raises:
+            ValueError: If the snapshot format or version is not supported, or
+                its embedding model or dimension does not match
+        """
+        input_dir = Path(snapshot_dir)
+        with open(input_dir / SNAPSHOT_MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Not a snapshot directory: {snapshot_dir}")
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+        if vectorstore is None:
+            vectorstore = self.get_vectorstore()
+
+        collection = vectorstore._collection
+        self._check_snapshot_embeddings(manifest, collection, verify_embeddings)
+        if batch_size is None:
+            batch_size = self._max_batch_size(vectorstore)
+
+        logger.info(f"Importing snapshot with {manifest['count']} chunks from {snapshot_dir}")
+        start = time.perf_counter()
+
+        matrix = np.load(input_dir / SNAPSHOT_EMBEDDINGS_FILE, mmap_mode="r")
+        with gzip.open(input_dir / SNAPSHOT_CHUNKS_FILE, "rt", encoding="utf-8") as f:
+            columns = json.load(f)
+
+        ids = columns["ids"]
+        if len(ids) != matrix.shape[0]:
+            raise ValueError(
+                f"Snapshot is inconsistent: {len(ids)} ids but {matrix.shape[0]} embeddings"
+            )
+        if ids and matrix.shape[1] != manifest.get("dimension"):
+            raise ValueError(
+                f"Snapshot is inconsistent: manifest says {manifest.get('dimension')} dimensions "
+                f"but embeddings have {matrix.shape[1]}"
+            )
+
+        for begin in range(0, len(ids), batch_size):
+            end = begin + batch_size
+            _upsert_records(
+                collection,
+                ids[begin:end],
+                matrix[begin:end].tolist(),
+                columns["texts"][begin:end],
+                columns["metadatas"][begin:end]
+            )
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Imported {len(ids)} chunks in {elapsed:.2f}s")
+        return len(ids)
@@ -0,0 +1,132 @@
+"""
+Re-chunk and re-index stored documents.
+
+Page text comes from the extracted text store, so changing CHUNK_SIZE,
+CHUNK_OVERLAP or TEXT_SPLITTER does not parse any PDF again (PDFs missing
+from the store are parsed once and added). Set EMBEDDING_CACHE_DIR to also
+reuse the embeddings of chunks whose text did not change.
+
+Usage:
+    python -m src.reindex --splitter token --chunk-size 300 --chunk-overlap 60
+"""
+import argparse
+import logging
+import time
+from typing import Dict, List, Optional
+
+from . import scheduler
+from .config import Config
+from .database.init_db import get_session
+from .database import crud
+from .loaders.pdf_loader import PDFDocumentLoader
+from .loaders.text_store import ExtractedTextStore, file_hash
+from .processing.text_splitter import get_text_splitter
+from .processing.vectorstore import VectorStoreManager
+from .ingest import index_chunks
+from .observability import accounting
+
+logger = logging.getLogger(__name__)
+
+
+def reindex_documents(
+    document_ids: Optional[List[int]] = None,
+    splitter: str = None,
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    collection_name: str = "documents",
+    text_store: Optional[ExtractedTextStore] = None,
+    vectorstore_manager: Optional[VectorStoreManager] = None
+) -> Dict:
+    """
+    Re-chunk completed documents and replace their vectors.
+
+    Args:
+        document_ids: Documents to re-index (default: all completed documents)
+        splitter: Text splitter name (default from env: TEXT_SPLITTER)
+        chunk_size: Chunk size in the splitter's unit (default from env)
+        chunk_overlap: Chunk overlap in the splitter's unit (default from env)
+        collection_name: Target collection; use a new name to build alongside the live one
+        text_store: Extracted text store (default: ExtractedTextStore())
+        vectorstore_manager: Vector store manager (default: VectorStoreManager(collection_name=...))
+
+    Returns:
+        Summary with document, page and chunk counts and elapsed seconds
+    """
+    text_store = text_store or ExtractedTextStore()
+    vectorstore_manager = vectorstore_manager or VectorStoreManager(collection_name=collection_name)
+    loader = PDFDocumentLoader(
+        text_store=text_store,
+        text_splitter=get_text_splitter(chunk_size, chunk_overlap, splitter)
+    )
+
+    db = get_session()
+    try:
+        if document_ids:
+            documents = [crud.get_document(db, document_id) for document_id in document_ids]
+            documents = [d for d in documents if d is not None]
+        else:
+            documents = crud.get_documents(db, limit=None, status="completed")
+    finally:
+        db.close()
+
+    vectorstore = vectorstore_manager.get_vectorstore()
+    summary = {"documents": 0, "pages_from_store": 0, "pages_parsed": 0, "chunks": 0, "failed": []}
+    start = time.perf_counter()
+
+    for document in documents:
+        try:
+            key = file_hash(document.file_path)
+            pages = text_store.get(key, source=document.file_path)
+            from_store = pages is not None
+            if pages is None:
+                # Parses the PDF once and adds it to the store
+                pages = loader.load(document.file_path)
+
+            chunks = loader.text_splitter.split_documents(pages)
+            # Same path as ingestion: chunks unchanged by the new settings
+            # keep their vectors, duplicates of stored chunks reuse their embedding,
+            # and the old vectors are deleted once the new ones are written
+            with accounting.usage_scope(document_id=document.id), \
+                    scheduler.priority(scheduler.BULK):
+                result = index_chunks(
+                    document.id, chunks, vectorstore_manager, vectorstore, document_hash=key
+                )
+
+            summary["documents"] += 1
+            summary["pages_from_store" if from_store else "pages_parsed"] += len(pages)
+            summary["chunks"] += result.chunks
+            logger.info(
+                f"Re-indexed document {document.id} ({document.filename}): "
+                f"{len(pages)} pages, {result.chunks} chunks, from text store: {from_store}"
+            )
+        except Exception as e:
+            logger.error(f"Failed to re-index document {document.id}: {e}")
+            summary["failed"].append(document.id)
+
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    logger.info(f"Re-index finished: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--document-id", type=int, action="append", dest="document_ids")
+    parser.add_argument("--splitter", choices=["recursive", "token"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--chunk-overlap", type=int, default=None)
+    parser.add_argument("--collection", default="documents")
+    args = parser.parse_args()
+
+    Config.initialize()
+    summary = reindex_documents(
+        document_ids=args.document_ids,
+        splitter=args.splitter,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        collection_name=args.collection
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
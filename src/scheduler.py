@@ -0,0 +1,338 @@
+"""Admission control and priority queueing for LLM and embedding API calls."""
+import os
+import json
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .observability import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Priority classes; lower values are admitted first
+INTERACTIVE = 0
+INGEST = 1
+BULK = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", INGEST: "ingest", BULK: "bulk"}
+
+# Called with (position in the queue starting at 1, seconds until admission
+# or None when other calls are ahead)
+QueueCallback = Callable[[int, Optional[float]], None]
+
+_priority: ContextVar[int] = ContextVar("admission_priority", default=INTERACTIVE)
+_on_queue: ContextVar[Optional[QueueCallback]] = ContextVar("admission_on_queue", default=None)
+
+
+class AdmissionTimeoutError(TimeoutError):
+    """Raised when a call waited longer than the queue timeout for admission."""
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """
+    Queue the API calls made inside the block with a priority class.
+
+    Calls outside any block are INTERACTIVE.
+
+    Args:
+        level: INTERACTIVE, INGEST or BULK
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def on_queue(callback: QueueCallback) -> Iterator[None]:
+    """
+    Report the queue position of API calls made inside the block.
+
+    Args:
+        callback: Called with the position and expected wait while a call
+            is queued; called from the waiting thread
+    """
+    token = _on_queue.set(callback)
+    try:
+        yield
+    finally:
+        _on_queue.reset(token)
+
+
+class TokenBucket:
+    """Token bucket holding at most one minute's allowance."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._clock = clock
+        self.updated = clock()
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if they are now)."""
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A call larger than the whole allowance waits for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class AdmissionScheduler:
+    """
+    Admits API calls within request and token rate limits, by priority.
+
+    Calls wait in one queue ordered by priority class and then arrival, so
+    interactive questions overtake queued ingestion traffic; within a class
+    calls are admitted in order. A 429 from the provider pauses admission
+    for its Retry-After, so all callers back off together instead of each
+    retrying into the limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        timeout: float = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            name: Label of the scheduler's metrics, e.g. 'chat' or 'embedding'
+            requests_per_minute: Request limit (0 for no limit)
+            tokens_per_minute: Token limit (0 for no limit)
+            timeout: Maximum seconds a call waits for admission
+                (default from env: LLM_QUEUE_TIMEOUT, 120; 0 for no limit)
+            clock: Monotonic clock
+        """
+        self.name = name
+        self.timeout = timeout if timeout is not None else float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+        self._clock = clock
+        self._requests = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self._paused_until = 0.0
+
+        self._cond = threading.Condition(threading.Lock())
+        self._queue: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._admitted = 0
+        self._waited = 0
+        self._rate_limited = 0
+
+    @property
+    def counts_tokens(self) -> bool:
+        """Whether calls must say how many tokens they use."""
+        return self._tokens is not None
+
+    def _delay(self, tokens: float) -> float:
+        # Called with the lock held
+        delay = max(0.0, self._paused_until - self._clock())
+        if self._requests is not None:
+            delay = max(delay, self._requests.delay(1))
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.delay(tokens))
+        return delay
+
+    def acquire(self, tokens: float = 0, level: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """
+        Wait until a call may be sent.
+
+        Args:
+            tokens: Tokens the call is expected to use (prompt and completion)
+            level: Priority class (default: the enclosing priority() block)
+            timeout: Maximum seconds to wait (default: the scheduler's timeout)
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            AdmissionTimeoutError: If the call was not admitted in time
+        """
+        level = _priority.get() if level is None else level
+        timeout = self.timeout if timeout is None else timeout
+        callback = _on_queue.get()
+        start = self._clock()
+        reported = None
+        queued = False
+
+        with self._cond:
+            ticket = (level, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = self._clock()
+                    delay = None
+                    if self._queue[0] == ticket:
+                        delay = self._delay(tokens)
+                        if delay <= 0:
+                            break
+
+                    remaining = start + timeout - now if timeout else None
+                    if remaining is not None and remaining <= 0:
+                        raise AdmissionTimeoutError(
+                            f"No {self.name} API capacity within {timeout:.0f}s; "
+                            f"{len(self._queue)} calls queued"
+                        )
+
+                    position = 1 + sum(1 for other in self._queue if other < ticket)
+                    if callback is not None and (position, delay is None) != reported:
+                        reported = (position, delay is None)
+                        # Report without holding the lock
+                        self._cond.release()
+                        try:
+                            callback(position, delay)
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    waits = [w for w in (delay, remaining) if w is not None]
+                    queued = True
+                    self._cond.wait(min(waits) if waits else None)
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            self._admitted += 1
+            waited = self._clock() - start if queued else 0.0
+            if queued:
+                self._waited += 1
+            # The next call in line recomputes its delay
+            self._cond.notify_all()
+
+        metrics.observe(
+            "admission_wait_seconds", waited,
+            "Seconds API calls waited for admission",
+            api=self.name, priority=PRIORITY_NAMES.get(level, str(level))
+        )
+        return waited
+
+    def rate_limited(self, retry_after: float = 1.0):
+        """
+        Pause admission after the provider rejected a call with 429.
+
+        Args:
+            retry_after: Seconds the provider asked to wait
+        """
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+            self._rate_limited += 1
+        metrics.inc("admission_rate_limited_total", 1, "Calls the provider rejected with 429", api=self.name)
+        logger.warning(f"{self.name} API rate limited; pausing admission for {retry_after:.1f}s")
+
+    def delay(self, tokens: float = 0) -> float:
+        """Seconds until a call with this many tokens could be admitted."""
+        with self._cond:
+            return self._delay(tokens)
+
+    def queued(self) -> int:
+        """Number of calls waiting for admission."""
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Admission counters.
+
+        Returns:
+            Dictionary with 'admitted', 'waited' (admitted after queueing),
+            'rate_limited' (429s reported) and 'queued' (waiting now)
+        """
+        with self._cond:
+            return {
+                "admitted": self._admitted,
+                "waited": self._waited,
+                "rate_limited": self._rate_limited,
+                "queued": len(self._queue),
+            }
+
+
+def estimate_tokens(kind: str, body: bytes) -> int:
+    """
+    Estimate the tokens an OpenAI API request uses.
+
+    Args:
+        kind: 'chat' or 'embedding'
+        body: JSON request body
+
+    Returns:
+        Prompt tokens plus, for chat, the requested maximum completion tokens
+    """
+    from .observability.accounting import count_tokens
+
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return 0
+    model = payload.get("model", "")
+
+    if kind == "chat":
+        texts = [
+            message.get("content") or "" for message in payload.get("messages", [])
+            if isinstance(message.get("content"), str)
+        ]
+        return count_tokens(texts, model) + int(payload.get("max_tokens") or 0)
+
+    inputs = payload.get("input", [])
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    # Token id lists are exact
+    texts = [item for item in inputs if isinstance(item, str)]
+    ids = sum(len(item) for item in inputs if isinstance(item, list))
+    return (count_tokens(texts, model) if texts else 0) + ids
+
+
+_schedulers: Dict[str, AdmissionScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+# Environment variable prefix of each API's limits
+_LIMIT_PREFIXES = {"chat": "LLM", "embedding": "EMBEDDING"}
+
+
+def get_scheduler(kind: str) -> AdmissionScheduler:
+    """
+    Get the process-wide scheduler of an API.
+
+    Limits are read from the environment: LLM_REQUESTS_PER_MINUTE and
+    LLM_TOKENS_PER_MINUTE for chat, EMBEDDING_REQUESTS_PER_MINUTE and
+    EMBEDDING_TOKENS_PER_MINUTE for embeddings (0 for no limit).
+
+    Args:
+        kind: 'chat' or 'embedding'
+
+    Returns:
+        Shared AdmissionScheduler instance
+    """
+    scheduler = _schedulers.get(kind)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(kind)
+            if scheduler is None:
+                prefix = _LIMIT_PREFIXES[kind]
+                scheduler = _schedulers[kind] = AdmissionScheduler(
+                    kind,
+                    requests_per_minute=float(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", "0")),
+                    tokens_per_minute=float(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", "0"))
+                )
+    return scheduler
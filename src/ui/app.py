@@ -1,22 +1,20 @@
 """Streamlit application for Doc Sage."""
 import streamlit as st
-import os
+import json
 import uuid
-from pathlib import Path
 from datetime import datetime
+from pathlib import Path
 
 # Import application modules
+# LangChain, chromadb and SQLAlchemy are imported inside the functions that
+# use them so that script reruns and cold start render the page without them.
 from ..config import Config
-from ..database.init_db import get_session
-from ..database import crud
-from ..loaders.pdf_loader import PDFDocumentLoader
-from ..processing.vectorstore import VectorStoreManager
-from ..chains.qa_chain import QAChainManager
+from ..observability import metrics
 
 # Page configuration
 st.set_page_config(
-    page_title="Doc Sage - ɭn",
-    page_icon="=",
+    page_title="Doc Sage - ドキュメントの賢者",
+    page_icon="📚",
     layout="wide",
     initial_sidebar_state="expanded"
 )
@@ -53,9 +51,22 @@ st.markdown("""
 
 
 def initialize_session_state():
-    """Initialize Streamlit session state."""
+    """
+    Initialize Streamlit session state.
+
+    The session ID is kept in the URL (?session=...), so a reconnect or page
+    reload continues the same conversation from the database.
+    """
     if "session_id" not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())
+        session_id = st.query_params.get("session")
+        st.session_state.session_id = session_id or str(uuid.uuid4())
+        st.query_params["session"] = st.session_state.session_id
+        # Recent turns only; older turns are paged from the database
+        st.session_state.messages = []
+        st.session_state.history_truncated = False
+        st.session_state.history_pages = 0
+        if session_id:
+            restore_session(session_id)
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -70,27 +81,403 @@ def initialize_session_state():
         st.session_state.qa_manager = None
 
 
-def save_uploaded_file(uploaded_file) -> str:
+@st.cache_resource
+def get_vectorstore_manager():
+    """VectorStoreManager and Chroma client shared by every session of the process."""
+    from ..processing.vectorstore import VectorStoreManager
+
+    return VectorStoreManager()
+
+
+@st.cache_resource
+def get_shared_vectorstore():
+    """Opened persisted vector store shared by every session of the process."""
+    return get_vectorstore_manager().get_vectorstore()
+
+
+def create_qa_manager(document_id: int, vectorstore=None, history: list = None, session_id: str = None):
     """
-    Save uploaded file to disk.
+    Create a QA manager that retrieves only from one document.
+
+    Args:
+        document_id: Completed document to chat with
+        vectorstore: Vector store holding its chunks (default: the shared one)
+        history: Earlier turns as {"user", "assistant"} dicts for the memory
+        session_id: Session the turns belong to (default: the current session)
+
+    Returns:
+        QAChainManager for the session
+    """
+    from ..chains.qa_chain import QAChainManager
+
+    qa_manager = QAChainManager(
+        vectorstore or get_shared_vectorstore(),
+        document_id=document_id,
+        session_id=session_id or st.session_state.session_id,
+        search_filter={"document_id": document_id}
+    )
+    if history:
+        qa_manager.get_memory().load_from_history(history)
+    return qa_manager
+
+
+def load_library() -> list:
+    """
+    List the documents that can be opened without processing them again.
+
+    Returns:
+        Dicts with 'id', 'filename', 'version' and 'upload_date' of completed
+        documents, newest first
+    """
+    from ..database.init_db import get_session
+    from ..database import crud
+
+    db = get_session()
+    try:
+        documents = crud.get_documents(db, limit=None, status="completed")
+        return sorted(
+            (
+                {"id": d.id, "filename": d.filename, "version": d.version or 1, "upload_date": d.upload_date}
+                for d in documents
+            ),
+            key=lambda d: d["id"],
+            reverse=True
+        )
+    finally:
+        db.close()
+
+
+def document_history(session_id: str, document_id: int) -> list:
+    """
+    Get a session's latest turns about one document for the QA memory.
+
+    Args:
+        session_id: Session identifier
+        document_id: Document the turns are about
+
+    Returns:
+        Up to CHAT_WINDOW_TURNS {"user", "assistant"} dicts, oldest first
+    """
+    from ..database.init_db import get_session
+    from ..database import crud
+    from ..database.writer import get_conversation_writer
+
+    # Include turns still waiting in the write buffer
+    get_conversation_writer().flush()
+    db = get_session()
+    try:
+        turns = crud.get_conversations_page(
+            db, session_id, limit=Config.CHAT_WINDOW_TURNS, document_id=document_id
+        )
+        return [{"user": turn.user_message, "assistant": turn.assistant_message} for turn in turns]
+    finally:
+        db.close()
+
+
+def open_document(document_id: int, session_id: str, vectorstore=None):
+    """
+    Create a QA manager for an already processed document.
+
+    Only the persisted vectors are opened: nothing is loaded, split or
+    embedded. The session's earlier turns about the document are loaded into
+    the QA memory.
+
+    Args:
+        document_id: Completed document to open
+        session_id: Session that chats with it
+        vectorstore: Vector store holding its chunks (default: the shared one)
+
+    Returns:
+        QAChainManager for the session
+    """
+    return create_qa_manager(
+        document_id,
+        vectorstore,
+        history=document_history(session_id, document_id),
+        session_id=session_id
+    )
+
+
+def attach_document(document_id: int):
+    """
+    Chat with an already processed document in the current session.
+
+    Args:
+        document_id: Completed document to open
+    """
+    st.session_state.qa_manager = open_document(document_id, st.session_state.session_id)
+    st.session_state.vectorstore_manager = get_vectorstore_manager()
+    st.session_state.current_document_id = document_id
+
+
+def display_document_library():
+    """Sidebar list of processed documents to open."""
+    st.markdown("## 📚 ドキュメントライブラリ")
+
+    documents = load_library()
+    if not documents:
+        st.caption("処理済みのドキュメントはまだありません")
+        return
+
+    labels = {
+        d["id"]: f"{d['filename']}"
+        + (f"（v{d['version']}）" if d["version"] > 1 else "")
+        + f" - {d['upload_date'].strftime('%Y-%m-%d')}"
+        for d in documents
+    }
+    ids = list(labels)
+    current = st.session_state.current_document_id
+    selected = st.selectbox(
+        "処理済みのドキュメント",
+        ids,
+        index=ids.index(current) if current in labels else None,
+        format_func=labels.get,
+        placeholder="ドキュメントを選択",
+        help="再アップロードせずに、保存済みのベクトルを使って質問できます"
+    )
+
+    if selected is not None and selected != current:
+        if st.button("📂 このドキュメントを開く", use_container_width=True):
+            try:
+                attach_document(selected)
+            except Exception as e:
+                st.error(f"ドキュメントを開けませんでした: {e}")
+            else:
+                st.rerun()
+
+
+def turn_messages(conversation) -> list:
+    """
+    Convert a stored conversation turn to chat messages.
+
+    Args:
+        conversation: Conversation record
+
+    Returns:
+        User and assistant message dicts
+    """
+    refs = json.loads(conversation.source_refs) if conversation.source_refs else []
+    return [
+        {
+            "role": "user",
+            "content": conversation.user_message,
+            "created_at": conversation.created_at,
+            "id": conversation.id
+        },
+        {
+            "role": "assistant",
+            "content": conversation.assistant_message,
+            "source_refs": refs,
+            "created_at": conversation.created_at,
+            "id": conversation.id
+        },
+    ]
+
+
+def restore_session(session_id: str):
+    """
+    Restore a session's recent turns, document and QA memory from the database.
+
+    Args:
+        session_id: Session identifier from the URL
+    """
+    from ..database.init_db import get_session
+    from ..database import crud
+
+    db = get_session()
+    try:
+        # One extra turn tells whether older turns exist
+        turns = crud.get_conversations_page(db, session_id, limit=Config.CHAT_WINDOW_TURNS + 1)
+        st.session_state.history_truncated = len(turns) > Config.CHAT_WINDOW_TURNS
+        turns = turns[-Config.CHAT_WINDOW_TURNS:]
+        st.session_state.messages = [m for turn in turns for m in turn_messages(turn)]
+
+        document_id = turns[-1].document_id if turns else None
+        document = crud.get_document(db, document_id) if document_id else None
+    finally:
+        db.close()
+
+    if document is None or document.status != "completed":
+        return
+
+    try:
+        # Only turns about the document, as when it is opened from the library
+        qa_manager = open_document(document.id, session_id)
+    except Exception as e:
+        st.warning(f"ドキュメントを復元できませんでした: {e}")
+        return
+
+    st.session_state.vectorstore_manager = get_vectorstore_manager()
+    st.session_state.current_document_id = document.id
+    st.session_state.qa_manager = qa_manager
+
+
+def append_turn(prompt: str, answer: str, refs: list, created_at: datetime):
+    """Add a turn to the session window, dropping turns beyond CHAT_WINDOW_TURNS."""
+    messages = st.session_state.messages
+    messages.append({"role": "user", "content": prompt, "created_at": created_at})
+    messages.append({"role": "assistant", "content": answer, "source_refs": refs, "created_at": created_at})
+
+    limit = 2 * Config.CHAT_WINDOW_TURNS
+    if len(messages) > limit:
+        # The dropped turns are in the database and can be paged back in
+        del messages[:len(messages) - limit]
+        st.session_state.history_truncated = True
+
+
+def load_older_messages() -> tuple:
+    """
+    Page in the turns before the session window from the database.
+
+    Returns:
+        (messages, more) where more tells whether even older turns exist
+    """
+    if not st.session_state.history_truncated or not st.session_state.history_pages:
+        return [], st.session_state.history_truncated
+    messages = st.session_state.messages
+    oldest = messages[0] if messages else {}
+    before = oldest.get("created_at")
+
+    from ..database.init_db import get_session
+    from ..database import crud
+    from ..database.writer import get_conversation_writer
+
+    # Turns that left the window may still be in the write buffer
+    get_conversation_writer().flush()
+    limit = st.session_state.history_pages * Config.CHAT_PAGE_TURNS
+    db = get_session()
+    try:
+        before_id = oldest.get("id")
+        if before is not None and before_id is None:
+            # Turns asked in this session were shown before they had an ID
+            before_id = crud.get_conversation_id(db, st.session_state.session_id, before, oldest["content"])
+        turns = crud.get_conversations_page(
+            db, st.session_state.session_id, before=before, before_id=before_id, limit=limit + 1
+        )
+    finally:
+        db.close()
+
+    more = len(turns) > limit
+    turns = turns[-limit:]
+    return [m for turn in turns for m in turn_messages(turn)], more
+
+
+def load_source_texts(messages: list) -> dict:
+    """
+    Look up the text of every chunk the messages reference, in one query.
+
+    Args:
+        messages: Chat messages with 'source_refs'
+
+    Returns:
+        Dictionary of chunk ID to chunk text
+    """
+    chunk_ids = list({
+        ref["chunk_id"]
+        for message in messages
+        for ref in message.get("source_refs", [])
+        if ref.get("chunk_id")
+    })
+    if not chunk_ids:
+        return {}
+
+    from ..database.init_db import get_session
+    from ..database import crud
+
+    db = get_session()
+    try:
+        chunks = crud.get_chunks_by_vector_ids(db, chunk_ids)
+        return {chunk_id: chunk.content for chunk_id, chunk in chunks.items()}
+    finally:
+        db.close()
+
+
+def display_sources(refs: list, texts: dict):
+    """Show the chunks an answer referenced."""
+    if not refs:
+        return
+    with st.expander("📄 参照元を表示"):
+        for i, ref in enumerate(refs, 1):
+            page = ref.get("page")
+            st.markdown(f"**{i}. ページ {page if page is not None else 'N/A'}**")
+            text = texts.get(ref.get("chunk_id"))
+            st.text(text[:200] + "..." if text else "（参照元のテキストは削除されています）")
+            st.divider()
+
+
+def save_uploaded_file(uploaded_file):
+    """
+    Save uploaded file to disk, content-addressed by its SHA-256.
 
     Args:
         uploaded_file: Streamlit UploadedFile object
 
     Returns:
-        Path to saved file
+        StoredUpload with the path, hash, size and page count
+
+    Raises:
+        UploadTooLargeError: If the file exceeds UPLOAD_MAX_MB or UPLOAD_MAX_PAGES
+    """
+    from ..loaders.upload_store import store_upload
+
+    uploaded_file.seek(0)
+    return store_upload(uploaded_file)
+
+
+def find_previous_version(filename: str):
+    """
+    Get the completed document an upload of this name could replace.
+
+    Args:
+        filename: Name of the uploaded file
+
+    Returns:
+        Dict with 'id' and 'version', or None if there is no such document
     """
-    upload_dir = Path("/app/data/documents")
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    from ..database.init_db import get_session
+    from ..database import crud
+
+    db = get_session()
+    try:
+        previous = crud.get_latest_version(db, filename)
+        return {"id": previous.id, "version": previous.version or 1} if previous else None
+    finally:
+        db.close()
 
-    file_path = upload_dir / uploaded_file.name
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
 
-    return str(file_path)
+def document_file_hash(document_id: int):
+    """
+    SHA-256 of a document's stored file.
+
+    Args:
+        document_id: Document ID
 
+    Returns:
+        Hex digest, or None if the document or its file no longer exists
+    """
+    from ..database.init_db import get_session
+    from ..database import crud
+    from ..loaders.text_store import file_hash
 
-def process_document(file_path: str, filename: str, file_size: int) -> int:
+    db = get_session()
+    try:
+        document = crud.get_document(db, document_id)
+        file_path = document.file_path if document else None
+    finally:
+        db.close()
+    if file_path is None or not Path(file_path).exists():
+        return None
+    return file_hash(file_path)
+
+
+def process_document(
+    file_path: str,
+    filename: str,
+    file_size: int,
+    content_hash: str = None,
+    page_count: int = None,
+    parent_id: int = None
+) -> int:
     """
     Process uploaded document.
 
@@ -98,222 +485,283 @@ def process_document(file_path: str, filename: str, file_size: int) -> int:
         file_path: Path to the file
         filename: Name of the file
         file_size: Size of the file in bytes
+        content_hash: SHA-256 of the file (skips hashing it again)
+        page_count: Number of pages, if known
+        parent_id: Completed document the upload replaces as its new
+            version, as chosen by the user (None for a new document)
 
     Returns:
         Document ID
     """
-    db = get_session()
+    from ..ingest import ingest_document
+    from ..loaders.text_store import file_hash
+
+    def on_progress(stage: str, detail: dict):
+        if stage == "loading" and detail.get("page_count"):
+            status.update(label=f"PDFを読み込んでいます（{detail['page_count']}ページ）...")
+        elif stage == "indexing":
+            st.success(f"✓ {detail['chunks']}個のチャンクに分割しました")
+            if detail["duplicates_skipped"]:
+                st.info(
+                    f"重複チャンク {detail['duplicates_skipped']}個の埋め込みを省略しました"
+                    f"（約{detail['index_bytes_saved'] / 1024 / 1024:.1f}MB削減）"
+                )
+            status.update(label="ベクトルストアを作成しています...")
+        elif stage == "summarizing":
+            status.update(label="要約を作成しています...")
+        elif stage == "completed":
+            st.success("✓ ベクトルストアを作成しました")
+            if detail["chunks_reused"]:
+                st.info(
+                    f"前のバージョンから {detail['chunks_reused']}個のチャンクを再利用しました"
+                    f"（再利用率 {detail['reuse_ratio']:.0%}、削除 {detail['chunks_removed']}個）"
+                )
+            if detail["summaries"]:
+                st.success(f"✓ 要約を作成しました（{detail['summaries']}件）")
 
     try:
-        # Create document record
-        document = crud.create_document(
-            db=db,
-            filename=filename,
-            file_path=file_path,
-            file_type="pdf",
-            file_size=file_size,
-            status="processing"
-        )
-
-        # Load and split PDF
-        with st.spinner("PDFgD~Y..."):
-            loader = PDFDocumentLoader()
-            chunks = loader.load_and_split(file_path)
-            st.success(f" {len(chunks)}nkrW~W_")
-
-        # Create vector store
-        with st.spinner("ٯȢ\WfD~Y..."):
-            vectorstore_manager = VectorStoreManager()
-            vectorstore = vectorstore_manager.create_vectorstore(chunks)
-            st.success(" ٯȢ\W~W_")
-
-        # Update document status
-        crud.update_document_status(db, document.id, "completed")
+        if parent_id is not None:
+            previous_hash = document_file_hash(parent_id)
+            if previous_hash is not None and previous_hash == (content_hash or file_hash(file_path)):
+                # Nothing changed: open the processed version instead of superseding it
+                attach_document(parent_id)
+                st.info(f"「{filename}」は前のバージョンと同じ内容のため、処理済みのドキュメントを開きました")
+                return parent_id
+            st.info(f"「{filename}」の新しいバージョンとして、変更されたチャンクだけを埋め込みます")
+
+        vectorstore_manager = get_vectorstore_manager()
+        with st.status("PDFを読み込んでいます...") as status:
+            result = ingest_document(
+                file_path=file_path,
+                filename=filename,
+                file_size=file_size,
+                vectorstore_manager=vectorstore_manager,
+                vectorstore=get_shared_vectorstore(),
+                on_progress=on_progress,
+                content_hash=content_hash,
+                page_count=page_count,
+                parent_id=parent_id
+            )
+            status.update(label="ドキュメントの処理が完了しました", state="complete")
 
         # Store in session state
         st.session_state.vectorstore_manager = vectorstore_manager
-        st.session_state.current_document_id = document.id
+        st.session_state.current_document_id = result.document_id
 
         # Initialize QA manager
-        st.session_state.qa_manager = QAChainManager(vectorstore)
+        st.session_state.qa_manager = create_qa_manager(result.document_id, result.vectorstore)
 
-        return document.id
+        return result.document_id
 
     except Exception as e:
-        st.error(f"LzW~W_: {e}")
-        if 'document' in locals():
-            crud.update_document_status(db, document.id, "failed")
+        st.error(f"エラーが発生しました: {e}")
         raise
-    finally:
-        db.close()
 
 
 def display_chat_interface():
     """Display chat interface."""
-    st.markdown("### = ")
+    st.markdown("### 💬 チャット")
+
+    # Older turns are read from the database only when asked for
+    older, more = load_older_messages()
+    if more and st.button("以前の会話を表示"):
+        st.session_state.history_pages += 1
+        st.rerun()
 
     # Display chat history
-    for message in st.session_state.messages:
+    history = older + st.session_state.messages
+    texts = load_source_texts(history)
+    for message in history:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
-            if "sources" in message:
-                with st.expander("= gCh:"):
-                    for i, source in enumerate(message["sources"], 1):
-                        st.markdown(f"**{i}.  {source['metadata'].get('page', 'N/A')}**")
-                        st.text(source["content"])
-                        st.divider()
+            display_sources(message.get("source_refs", []), texts)
 
     # Chat input
-    if prompt := st.chat_input("OeWfO`UD..."):
+    if prompt := st.chat_input("質問を入力してください..."):
         if not st.session_state.qa_manager:
-            st.error("~ZPDFա뒢WfO`UD")
+            st.error("まずPDFファイルをアップロードしてください")
             return
 
-        # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         # Get AI response
         with st.chat_message("assistant"):
-            with st.spinner("TWfD~Y..."):
+            with st.spinner("回答を生成しています..."):
+                from .. import scheduler
+
+                queue_notice = st.empty()
+
+                def show_queue_position(position, wait):
+                    if wait is None:
+                        queue_notice.info(f"⏳ 混雑しています。順番待ち: {position}番目")
+                    else:
+                        queue_notice.info(f"⏳ APIの利用上限に達しています。約{wait:.0f}秒後に送信します")
+
                 try:
-                    result = st.session_state.qa_manager.ask_with_sources(prompt)
+                    from ..chains.qa_chain import source_refs
+                    from ..database.writer import get_conversation_writer
+
+                    with scheduler.on_queue(show_queue_position):
+                        result = st.session_state.qa_manager.ask_with_sources(prompt)
+                    queue_notice.empty()
                     answer = result["answer"]
-                    sources = result.get("sources", [])
+                    source_documents = result["source_documents"]
+                    # Session state keeps chunk IDs, not copies of the source text
+                    refs = source_refs(source_documents)
 
                     st.markdown(answer)
+                    if result.get("route") == "summary":
+                        st.caption("📝 事前に作成した要約から回答しました")
+                    display_sources(
+                        refs,
+                        {doc.metadata.get("chunk_id"): doc.page_content for doc in source_documents}
+                    )
 
-                    # Display sources
-                    if sources:
-                        with st.expander("= gCh:"):
-                            for i, source in enumerate(sources, 1):
-                                st.markdown(f"**{i}.  {source['metadata'].get('page', 'N/A')}**")
-                                st.text(source["content"])
-                                st.divider()
-
-                    # Add to messages
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer,
-                        "sources": sources
-                    })
-
-                    # Save to database
-                    db = get_session()
-                    try:
-                        crud.create_conversation(
-                            db=db,
-                            session_id=st.session_state.session_id,
-                            user_message=prompt,
-                            assistant_message=answer,
-                            document_id=st.session_state.current_document_id
-                        )
-                    finally:
-                        db.close()
+                    created_at = datetime.utcnow()
+                    append_turn(prompt, answer, refs, created_at)
+
+                    # Save to database (written in the background)
+                    get_conversation_writer().submit(
+                        session_id=st.session_state.session_id,
+                        user_message=prompt,
+                        assistant_message=answer,
+                        document_id=st.session_state.current_document_id,
+                        source_refs=refs,
+                        created_at=created_at
+                    )
 
+                except scheduler.AdmissionTimeoutError:
+                    queue_notice.empty()
+                    st.warning("現在混雑しています。しばらくしてから再度お試しください")
                 except Exception as e:
-                    st.error(f"LzW~W_: {e}")
+                    st.error(f"エラーが発生しました: {e}")
 
 
 def main():
     """Main application."""
+    Config.initialize()
+    metrics.start_exporter()
     initialize_session_state()
 
     # Validate configuration
     try:
         Config.validate()
     except ValueError as e:
-        st.error(f"-: {e}")
-        st.info("	p `OPENAI_API_KEY` -WfO`UD")
+        st.error(f"設定エラー: {e}")
+        st.info("環境変数 `OPENAI_API_KEY` を設定してください")
         st.stop()
 
     # Header
-    st.markdown('<div class="main-header">= Doc Sage</div>', unsafe_allow_html=True)
-    st.markdown("##### ɭn - PDFɭkOgMAI")
+    st.markdown('<div class="main-header">📚 Doc Sage</div>', unsafe_allow_html=True)
+    st.markdown("##### ドキュメントの賢者 - PDFドキュメントに質問できるAIチャットボット")
 
     # Sidebar
     with st.sidebar:
-        st.markdown("## = ɭȢ")
+        st.markdown("## 📤 ドキュメントアップロード")
 
         uploaded_file = st.file_uploader(
-            "PDFաx",
+            "PDFファイルを選択",
             type=["pdf"],
-            help="OW_DPDFա뒢WfO`UD"
+            help="質問したいPDFファイルをアップロードしてください"
         )
 
         if uploaded_file is not None:
-            if st.button("= Wf", type="primary", use_container_width=True):
+            # Replacing a document is explicit: a file may share a name without being its revision
+            previous = find_previous_version(uploaded_file.name)
+            as_new_version = previous is not None and st.checkbox(
+                f"「{uploaded_file.name}」（v{previous['version']}）の新しいバージョンとしてアップロード",
+                value=False,
+                help="オンにすると前のバージョンを置き換え、変更されたチャンクだけを埋め込みます。"
+                     "オフのときは別のドキュメントとして追加します"
+            )
+            if st.button("📥 アップロードして処理", type="primary", use_container_width=True):
                 try:
                     # Save file
-                    file_path = save_uploaded_file(uploaded_file)
+                    stored = save_uploaded_file(uploaded_file)
 
                     # Process document
                     document_id = process_document(
-                        file_path=file_path,
+                        file_path=stored.path,
                         filename=uploaded_file.name,
-                        file_size=uploaded_file.size
+                        file_size=stored.size,
+                        content_hash=stored.content_hash,
+                        page_count=stored.page_count,
+                        parent_id=previous["id"] if as_new_version else None
                     )
 
-                    st.success(f" ɭnLW~W_")
-                    st.info("gOeWfO`UD")
+                    st.success(f"✅ ドキュメントの処理が完了しました！")
+                    st.info("チャットで質問を入力してください")
 
                 except Exception as e:
-                    st.error(f"-kLzW~W_: {e}")
+                    st.error(f"処理中にエラーが発生しました: {e}")
+
+        st.divider()
+
+        display_document_library()
 
         st.divider()
 
         # Document info
         if st.session_state.current_document_id:
-            st.markdown("## = (nɭ")
+            st.markdown("## 📄 現在のドキュメント")
+            from ..database.init_db import get_session
+            from ..database import crud
+
             db = get_session()
             try:
                 doc = crud.get_document(db, st.session_state.current_document_id)
                 if doc:
-                    st.markdown(f"**ա:** {doc.filename}")
-                    st.markdown(f"**:** {doc.status}")
-                    st.markdown(f"**B:** {doc.upload_date.strftime('%Y-%m-%d %H:%M:%S')}")
+                    st.markdown(f"**ファイル名:** {doc.filename}")
+                    st.markdown(f"**ステータス:** {doc.status}")
+                    st.markdown(f"**アップロード日時:** {doc.upload_date.strftime('%Y-%m-%d %H:%M:%S')}")
             finally:
                 db.close()
 
         st.divider()
 
         # Clear chat button
-        if st.button("= et", use_container_width=True):
+        if st.button("🗑️ チャット履歴をクリア", use_container_width=True):
+            # Stored turns stay in the database under the old session
+            st.session_state.session_id = str(uuid.uuid4())
+            st.query_params["session"] = st.session_state.session_id
             st.session_state.messages = []
+            st.session_state.history_truncated = False
+            st.session_state.history_pages = 0
             if st.session_state.qa_manager:
                 st.session_state.qa_manager.clear_memory()
+                st.session_state.qa_manager.session_id = st.session_state.session_id
             st.rerun()
 
         # Session info
         st.divider()
-        st.markdown("## 9 ÷1")
-        st.caption(f"÷ID: {st.session_state.session_id[:8]}...")
-        st.caption(f"ûp: {len(st.session_state.messages)}")
+        st.markdown("## ℹ️ セッション情報")
+        st.caption(f"セッションID: {st.session_state.session_id[:8]}...")
+        st.caption(f"メッセージ数: {len(st.session_state.messages)}")
 
     # Main content
     if st.session_state.current_document_id:
         display_chat_interface()
     else:
-        st.info("=H KPDFա뒢WfO`UD")
+        st.info("👈 サイドバーからPDFファイルをアップロードするか、ドキュメントライブラリから開いてください")
 
         # Instructions
-        st.markdown("### = D")
+        st.markdown("### 📖 使い方")
         st.markdown("""
-        1. K PDFա뒢
-        2. ɭLU~gdpp	
-        3. kOe
-        4. AIL ɭnkT
+        1. サイドバーから PDFファイルをアップロード（処理済みのドキュメントはライブラリから開けます）
+        2. ドキュメントが処理されるまで待つ（数秒〜数分）
+        3. チャット欄に質問を入力
+        4. AIが ドキュメントの内容を基に回答を生成
         """)
 
-        st.markdown("### ( y")
+        st.markdown("### ✨ 特徴")
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown("- = **ؾ"**: ٯ"g#1 Oz")
-            st.markdown("- = **q**: W_6jq")
+            st.markdown("- 🔍 **高精度検索**: ベクトル検索で関連情報を素早く発見")
+            st.markdown("- 💬 **会話型**: 文脈を理解した自然な対話")
         with col2:
-            st.markdown("- = **gCh:**: Tn9hj@:")
-            st.markdown("- = **etX**: qetX")
+            st.markdown("- 📄 **参照元表示**: 回答の根拠となる箇所を明示")
+            st.markdown("- 💾 **履歴保存**: 会話履歴を自動保存")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""Tests for the HTTP API layer."""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+from src.config import Config
+from src.api.server import create_app
+from src.api.service import DocSageService
+
+
+class CannedService(DocSageService):
+    """Answers every question with a fixed reply, without calling any model."""
+
+    async def ask(self, question, session_id, document_id=None):
+        await self._acquire(self._ask_slots, "ask")
+        self._ask_slots.release()
+        return {"answer": f"answer to {question}", "sources": []}
+
+    async def ask_stream(self, question, session_id, document_id=None):
+        await self._acquire(self._ask_slots, "ask")
+        try:
+            for token in ("answer ", "to ", question):
+                yield {"token": token}
+        finally:
+            self._ask_slots.release()
+        yield {"answer": f"answer to {question}", "sources": []}
+
+
+@pytest.fixture
+def make_client(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("CHROMA_PERSIST_DIRECTORY", str(tmp_path / "vectorstore"))
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    Config.load()
+
+    def make(**options):
+        service = CannedService(upload_directory=str(tmp_path / "documents"), **options)
+        return TestClient(create_app(service))
+
+    yield make
+    Config.load()
+
+
+def test_ask(make_client):
+    with make_client() as client:
+        response = client.post("/ask", json={"question": "why?", "session_id": "s1"})
+
+    assert response.status_code == 200
+    assert response.json() == {"answer": "answer to why?", "sources": []}
+
+
+def test_ask_stream(make_client):
+    with make_client() as client:
+        response = client.post("/ask", json={"question": "why?", "session_id": "s1", "stream": True})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [e[0] for e in events] == ["event: token"] * 3 + ["event: answer"]
+    assert json.loads(events[-1][1][len("data: "):])["answer"] == "answer to why?"
+
+
+def test_busy_service_returns_503(make_client):
+    with make_client(max_concurrent_asks=1, queue_timeout=0.05) as client:
+        # Occupy the only slot
+        asyncio.run(client.app.state.service._ask_slots.acquire())
+        response = client.post("/ask", json={"question": "why?", "session_id": "s1"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_upload_rejects_non_pdf_and_unknown_job(make_client):
+    with make_client() as client:
+        response = client.post("/documents", files={"file": ("notes.txt", b"hello", "text/plain")})
+        assert response.status_code == 400
+        assert client.get("/jobs/unknown").status_code == 404
@@ -0,0 +1,54 @@
+"""Tests for bulk ingestion bookkeeping."""
+from src.bulk_ingest import IngestCheckpoint, ThroughputMeter
+
+
+def test_checkpoint_resumes_and_ignores_partial_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = IngestCheckpoint(str(path))
+    checkpoint.record("/data/a.pdf", "completed", document_id=1, chunks=10)
+    checkpoint.record("/data/b.pdf", "failed", document_id=2, error="boom")
+    checkpoint.close()
+    # A run killed mid-write
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "/data/c.pdf", "sta')
+
+    resumed = IngestCheckpoint(str(path))
+
+    assert resumed.status("/data/a.pdf") == "completed"
+    assert resumed.status("/data/b.pdf") == "failed"
+    assert resumed.status("/data/c.pdf") is None
+
+    # A later record for the same file wins
+    resumed.record("/data/b.pdf", "completed", document_id=2, chunks=3)
+    resumed.close()
+    assert IngestCheckpoint(str(path)).status("/data/b.pdf") == "completed"
+
+
+def test_throughput_meter_estimates_from_bytes():
+    now = [0.0]
+    meter = ThroughputMeter(total_files=4, total_bytes=4000, clock=lambda: now[0])
+    assert meter.eta_seconds() is None
+
+    now[0] = 10.0
+    meter.update(1000, chunks=50)
+
+    assert meter.eta_seconds() == 30.0
+    assert meter.format() == "[1/4] 25.0% | 0.10 files/s, 5.0 chunks/s, 0.00 MB/s | ETA 0:00:30"
+
+
+def test_documents_by_file_path_returns_latest(tmp_path):
+    from src.database import crud
+    from src.database.init_db import get_session
+
+    db = get_session(str(tmp_path / "bulk.db"))
+    try:
+        crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf", status="failed")
+        latest = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf", status="completed")
+        crud.create_document(db, "b.pdf", "/data/b.pdf", "pdf")
+
+        documents = crud.get_documents_by_file_path(db, ["/data/a.pdf", "/data/c.pdf"], batch_size=1)
+
+        assert list(documents) == ["/data/a.pdf"]
+        assert documents["/data/a.pdf"].id == latest.id
+    finally:
+        db.close()
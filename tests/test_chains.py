@@ -0,0 +1,182 @@
+"""Tests for question coalescing and summary routing."""
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from src.chains.singleflight import SingleFlight, normalize_question
+from src.chains.summary import build_summary_tree, group_pages, is_overview_question, summary_prompt
+from src.database import crud
+from src.database.init_db import get_session
+
+
+def test_normalize_question():
+    assert normalize_question("  What   is RAG？ ") == normalize_question("what is rag?")
+    assert normalize_question("ＡＰＩとは。") == "apiとは"
+    assert normalize_question("What is RAG") != normalize_question("What is a RAG")
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    group = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def answer():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {"answer": "42"}
+
+    with ThreadPoolExecutor(5) as pool:
+        leader = pool.submit(group.do, "q", answer)
+        started.wait(5)
+        followers = [pool.submit(group.do, "q", answer) for _ in range(4)]
+        while group.stats()["coalesced"] < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(runs) == 1
+    assert [shared for _, shared in results] == [False] + [True] * 4
+    assert all(result == {"answer": "42"} for result, _ in results)
+    assert group.stats()["coalescing_rate"] == 0.8
+
+    # Finished calls are not cached
+    assert group.do("q", lambda: {"answer": "43"}) == ({"answer": "43"}, False)
+
+
+def test_waiting_callers_receive_the_leaders_error():
+    group = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("API down")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(group.do, "q", fail)
+        started.wait(5)
+        follower = pool.submit(group.do, "q", fail)
+        while group.stats()["coalesced"] < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+class RecordingLLM:
+    """Chat model double whose summary is a digest of the prompt."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def batch(self, prompts, config=None):
+        self.prompts.extend(prompts)
+        return [SimpleNamespace(content=hashlib.sha1(p.encode()).hexdigest()) for p in prompts]
+
+
+def chunk(text, page):
+    return SimpleNamespace(page_content=text, metadata={"page": page})
+
+
+def test_overview_questions_are_routed():
+    assert is_overview_question("このドキュメントを要約して")
+    assert is_overview_question("What is this document about?")
+    assert is_overview_question("Give me a summary")
+    assert not is_overview_question("第3条の解除条件は？")
+
+
+def test_group_pages_respects_page_and_size_limits():
+    chunks = [chunk("a" * 10, page) for page in range(5)] + [chunk("b" * 10, 2)]
+    assert [(s, e) for s, e, _ in group_pages(chunks, pages_per_group=2, max_chars=1000)] == [(0, 1), (2, 3), (4, 4)]
+    assert [(s, e) for s, e, _ in group_pages(chunks, pages_per_group=10, max_chars=25)] == [
+        (0, 1), (2, 2), (3, 4)
+    ]
+
+
+def test_summary_tree_reduces_to_one_document_summary_and_reuses_unchanged_groups():
+    chunks = [chunk(f"page {page} text", page) for page in range(9)]
+    llm = RecordingLLM()
+    tree = build_summary_tree(chunks, llm, pages_per_group=1, max_chars=1000, fan_in=3)
+
+    # 9 page groups, 3 sections, 1 document summary
+    assert [node["level"] for node in tree] == [0] * 9 + [1] * 3 + [2]
+    assert (tree[-1]["start_page"], tree[-1]["end_page"]) == (0, 8)
+    assert len(llm.prompts) == 13
+
+    # A new version changing one page re-summarizes only that page and its ancestors
+    previous = {node["source_hash"]: node["content"] for node in tree}
+    chunks[4] = chunk("page 4 revised", 4)
+    llm = RecordingLLM()
+    build_summary_tree(chunks, llm, pages_per_group=1, max_chars=1000, fan_in=3, previous=previous)
+    assert len(llm.prompts) == 3
+
+
+def test_summaries_are_stored_with_the_document(tmp_path):
+    db = get_session(str(tmp_path / "summaries.db"))
+    try:
+        document = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf")
+        tree = build_summary_tree([chunk(f"page {p}", p) for p in range(4)], RecordingLLM(), pages_per_group=2)
+        crud.replace_document_summaries(db, document.id, tree)
+
+        stored = crud.get_document_summaries(db, document.id)
+        assert [(s.level, s.start_page, s.end_page) for s in stored] == [(0, 0, 1), (0, 2, 3), (1, 0, 3)]
+        prompt = summary_prompt("要約して", stored)
+        assert stored[-1].content in prompt and "1〜2ページ" in prompt
+    finally:
+        db.close()
+
+
+def test_astream_streams_from_a_real_chat_model(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_openai")
+    pytest.importorskip("chromadb")
+    import asyncio
+
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from benchmarks.openai_stub import OpenAIStubServer, StubConfig
+    from src import clients
+    from src.chains.qa_chain import QAChainManager, create_chat_model
+    from src.clients import ClientRegistry
+    from src.processing.vectorstore import VectorStoreManager
+
+    server = OpenAIStubServer(StubConfig(dimension=8, stream_chunk_chars=4)).start()
+    registry = ClientRegistry()
+    monkeypatch.setattr(clients, "_registry", registry)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=HashEmbeddings(dimension=8))
+    vectorstore = manager.upsert_documents([
+        Document(page_content=f"Clause {i}: the term is {i} years.", metadata={"document_id": 1, "page": i})
+        for i in range(3)
+    ])
+    qa_manager = QAChainManager(
+        vectorstore, llm=create_chat_model(), document_id=1, search_filter={"document_id": 1},
+        adaptive=False, summary_routing=False
+    )
+
+    async def run():
+        events = [event async for event in qa_manager.astream("How long is the term?")]
+        await registry.aclose()
+        return events
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        registry.close()
+        server.stop()
+
+    tokens = [event["token"] for event in events if "token" in event]
+    assert len(tokens) > 1
+    assert events[-1]["answer"] == "".join(tokens)
+    assert events[-1]["source_documents"]
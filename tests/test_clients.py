@@ -0,0 +1,75 @@
+"""Tests for the shared API client registry."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.openai_stub import OpenAIStubServer, StubConfig
+from src.clients import ClientRegistry
+
+
+@pytest.fixture
+def stub():
+    server = OpenAIStubServer(StubConfig(dimension=8)).start()
+    yield server
+    server.stop()
+
+
+def test_requests_reuse_pooled_connections(stub):
+    registry = ClientRegistry(pool_size=4)
+    try:
+        client = registry.http_client()
+        for _ in range(5):
+            client.get(stub.base_url + "/models").raise_for_status()
+        assert registry.stats() == {"requests": 5, "connections_opened": 1, "connections_reused": 4}
+
+        # Concurrent sessions share the pool and never exceed its size
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda _: client.get(stub.base_url + "/models").raise_for_status(), range(20)))
+        stats = registry.stats()
+        assert stats["requests"] == 25
+        assert stats["connections_opened"] <= 4
+        assert registry.http_client() is client
+    finally:
+        registry.close()
+
+
+def test_openai_clients_are_shared_per_endpoint():
+    pytest.importorskip("openai")
+
+    registry = ClientRegistry()
+    try:
+        first = registry.openai_client("key", "http://127.0.0.1:1/v1")
+        assert registry.openai_client("key", "http://127.0.0.1:1/v1") is first
+        assert registry.openai_client("other", "http://127.0.0.1:1/v1") is not first
+    finally:
+        registry.close()
+
+
+def test_async_requests_reuse_pooled_connections(stub):
+    import asyncio
+
+    registry = ClientRegistry(pool_size=4)
+
+    async def run():
+        client = registry.async_http_client()
+        for _ in range(5):
+            (await client.get(stub.base_url + "/models")).raise_for_status()
+        await asyncio.gather(*(client.get(stub.base_url + "/models") for _ in range(8)))
+        assert registry.async_http_client() is client
+        await registry.aclose()
+
+    asyncio.run(run())
+    stats = registry.stats()
+    assert stats["requests"] == 13
+    assert stats["connections_opened"] <= 4
+
+
+def test_async_openai_clients_are_shared_per_endpoint():
+    pytest.importorskip("openai")
+    import asyncio
+
+    registry = ClientRegistry()
+    first = registry.async_openai_client("key", "http://127.0.0.1:1/v1")
+    assert registry.async_openai_client("key", "http://127.0.0.1:1/v1") is first
+    assert first._client is registry.async_http_client()
+    asyncio.run(registry.aclose())
@@ -0,0 +1,189 @@
+"""Tests for the write-behind conversation buffer."""
+import json
+import time
+from datetime import datetime, timedelta
+
+from src.database import crud
+from src.database.init_db import get_session
+from src.database.writer import ConversationWriter
+
+
+def _messages(db_path, session_id="s1"):
+    db = get_session(db_path)
+    try:
+        return [c.user_message for c in crud.get_conversations_by_session(db, session_id)]
+    finally:
+        db.close()
+
+
+def test_turns_are_buffered_until_flush(tmp_path):
+    db_path = str(tmp_path / "chat.db")
+    writer = ConversationWriter(db_path=db_path, batch_size=100, flush_interval=60)
+
+    writer.submit("s1", "q1", "a1")
+    writer.submit("s1", "q2", "a2", document_id=None)
+
+    assert writer.pending() == 2
+    assert _messages(db_path) == []
+
+    writer.close()
+
+    assert writer.pending() == 0
+    assert _messages(db_path) == ["q1", "q2"]
+
+
+def test_full_batch_is_written_in_background(tmp_path):
+    db_path = str(tmp_path / "chat.db")
+    writer = ConversationWriter(db_path=db_path, batch_size=3, flush_interval=60)
+
+    for i in range(3):
+        writer.submit("s1", f"q{i}", f"a{i}")
+
+    deadline = time.monotonic() + 5
+    while len(_messages(db_path)) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert _messages(db_path) == ["q0", "q1", "q2"]
+    writer.close()
+
+
+def test_disabled_or_closed_writer_writes_synchronously(tmp_path):
+    db_path = str(tmp_path / "chat.db")
+    writer = ConversationWriter(db_path=db_path, enabled=False)
+    writer.submit("s1", "q1", "a1")
+    assert _messages(db_path) == ["q1"]
+
+    writer = ConversationWriter(db_path=db_path)
+    writer.close()
+    writer.submit("s1", "q2", "a2")
+    assert _messages(db_path) == ["q1", "q2"]
+
+
+def test_failed_flush_keeps_turns_queued(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "chat.db")
+    writer = ConversationWriter(db_path=db_path, batch_size=100, flush_interval=60)
+    writer.submit("s1", "q1", "a1")
+
+    def fail(db, conversations):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(crud, "create_conversations", fail)
+    assert writer.flush() == 0
+    assert writer.pending() == 1
+
+    monkeypatch.undo()
+    writer.close()
+    assert _messages(db_path) == ["q1"]
+
+
+def test_permanently_failing_turns_are_set_aside(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "chat.db")
+    writer = ConversationWriter(db_path=db_path, batch_size=100, flush_interval=60, max_retries=2)
+    writer.submit("s1", "q1", "a1")
+    writer.submit("s1", "bad", "a2")
+    create_conversations = crud.create_conversations
+
+    def fail_on_bad(db, conversations):
+        if any(c["user_message"] == "bad" for c in conversations):
+            raise RuntimeError("constraint failed")
+        return create_conversations(db, conversations)
+
+    monkeypatch.setattr(crud, "create_conversations", fail_on_bad)
+    assert writer.flush() == 0
+    assert writer.flush() == 0
+    assert writer.pending() == 2
+
+    # The third failure gives up on the batch and saves what it can
+    assert writer.flush() == 1
+    assert writer.pending() == 0
+    assert [c["user_message"] for c in writer.dead_letters] == ["bad"]
+    assert _messages(db_path) == ["q1"]
+
+    writer.submit("s1", "q3", "a3")
+    writer.close()
+    assert _messages(db_path) == ["q1", "q3"]
+
+
+def test_conversation_pages_and_source_refs(tmp_path):
+    db_path = str(tmp_path / "pages.db")
+    writer = ConversationWriter(db_path=db_path, enabled=False)
+    start = datetime(2024, 1, 1)
+    for i in range(5):
+        writer.submit(
+            "s1", f"q{i}", f"a{i}",
+            source_refs=[{"chunk_id": f"v{i}", "document_id": 1, "page": i}],
+            created_at=start + timedelta(minutes=i)
+        )
+
+    db = get_session(db_path)
+    try:
+        latest = crud.get_conversations_page(db, "s1", limit=2)
+        assert [c.user_message for c in latest] == ["q3", "q4"]
+        older = crud.get_conversations_page(db, "s1", before=latest[0].created_at, limit=2)
+        assert [c.user_message for c in older] == ["q1", "q2"]
+        assert json.loads(older[0].source_refs) == [{"chunk_id": "v1", "document_id": 1, "page": 1}]
+    finally:
+        db.close()
+
+
+def test_conversation_pages_keep_turns_with_equal_timestamps(tmp_path):
+    db_path = str(tmp_path / "ties.db")
+    writer = ConversationWriter(db_path=db_path, enabled=False)
+    same = datetime(2024, 1, 1)
+    for i in range(4):
+        writer.submit("s1", f"q{i}", f"a{i}", created_at=same)
+
+    db = get_session(db_path)
+    try:
+        latest = crud.get_conversations_page(db, "s1", limit=2)
+        assert [c.user_message for c in latest] == ["q2", "q3"]
+        older = crud.get_conversations_page(
+            db, "s1", before=latest[0].created_at, before_id=latest[0].id, limit=2
+        )
+        assert [c.user_message for c in older] == ["q0", "q1"]
+        assert crud.get_conversation_id(db, "s1", same, "q2") == latest[0].id
+    finally:
+        db.close()
+
+
+def test_api_history_returns_the_latest_turns(tmp_path, monkeypatch):
+    import asyncio
+
+    from src.api.service import DocSageService
+
+    db_path = str(tmp_path / "api.db")
+    monkeypatch.setenv("DB_PATH", db_path)
+    writer = ConversationWriter(db_path=db_path, enabled=False)
+    start = datetime(2024, 1, 1)
+    for i in range(7):
+        writer.submit("s1", f"q{i}", f"a{i}", document_id=i % 2 or None, created_at=start + timedelta(minutes=i))
+
+    service = DocSageService(upload_directory=str(tmp_path / "documents"), conversation_writer=writer)
+    try:
+        history = asyncio.run(service.history("s1", limit=3))
+    finally:
+        asyncio.run(service.close())
+    assert [turn["user_message"] for turn in history] == ["q4", "q5", "q6"]
+
+    db = get_session(db_path)
+    try:
+        turns = crud.get_conversations_page(db, "s1", limit=2, document_id=1)
+        assert [c.user_message for c in turns] == ["q3", "q5"]
+    finally:
+        db.close()
+
+
+def test_get_chunks_by_vector_ids(tmp_path):
+    db = get_session(str(tmp_path / "chunks.db"))
+    try:
+        document = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf")
+        crud.replace_document_chunks(db, document.id, [
+            {"chunk_index": i, "content": f"text {i}", "content_hash": f"h{i}", "vector_id": f"v{i}"}
+            for i in range(3)
+        ])
+
+        chunks = crud.get_chunks_by_vector_ids(db, ["v0", "v2", "missing"])
+        assert {k: c.content for k, c in chunks.items()} == {"v0": "text 0", "v2": "text 2"}
+        assert crud.get_chunks_by_vector_ids(db, []) == {}
+    finally:
+        db.close()
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from src.database import crud
+from src.database.compression import (
+    FORMAT_RAW,
+    FORMAT_ZLIB,
+    compress_database,
+    compress_text,
+    decompress_text,
+)
+from src.database.init_db import get_session
+
+LONG_TEXT = "契約期間は本書の締結日から1年間とする。 The term is one year. " * 20
+
+
+def test_compress_text_round_trip():
+    stored = compress_text(LONG_TEXT, "zlib")
+    assert stored[0] == FORMAT_ZLIB
+    assert len(stored) < len(LONG_TEXT.encode("utf-8"))
+    assert decompress_text(stored) == LONG_TEXT
+
+    # Short values are not worth compressing
+    assert compress_text("hi", "zlib") == bytes([FORMAT_RAW]) + b"hi"
+    assert decompress_text(compress_text("hi", "zlib")) == "hi"
+    assert compress_text(LONG_TEXT, "none")[0] == FORMAT_RAW
+
+
+def test_plain_text_rows_are_read_and_migrated(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_COMPRESSION", "zlib")
+    db_path = str(tmp_path / "compress.db")
+    db = get_session(db_path)
+    try:
+        document = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf")
+        crud.replace_document_chunks(db, document.id, [
+            {"chunk_index": 0, "content": LONG_TEXT, "content_hash": "h0", "vector_id": "v0"}
+        ])
+        document_id = document.id
+    finally:
+        db.close()
+
+    # A row written before compression was added
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "INSERT INTO document_chunks (document_id, chunk_index, content, content_hash, vector_id) "
+        "VALUES (?, 1, ?, 'h1', 'v1')",
+        (document_id, LONG_TEXT)
+    )
+    connection.commit()
+    assert connection.execute("SELECT typeof(content) FROM document_chunks ORDER BY id").fetchall() == [
+        ("blob",), ("text",)
+    ]
+    connection.close()
+
+    db = get_session(db_path)
+    try:
+        chunks = crud.get_chunks_by_vector_ids(db, ["v0", "v1"])
+        assert chunks["v0"].content == LONG_TEXT
+        assert chunks["v1"].content == LONG_TEXT
+    finally:
+        db.close()
+
+    summary = compress_database(db_path, codec="zlib", vacuum=False)
+    assert summary["rewritten"] == 1
+    # Running it again finds nothing to do
+    assert compress_database(db_path, codec="zlib", vacuum=False)["rewritten"] == 0
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("SELECT typeof(content) FROM document_chunks").fetchall() == [("blob",), ("blob",)]
+    connection.close()
+
+    db = get_session(db_path)
+    try:
+        assert [c.content for c in crud.get_document_chunks(db, document_id)] == [LONG_TEXT, LONG_TEXT]
+    finally:
+        db.close()
+
+
+def test_unknown_codec_is_rejected(monkeypatch):
+    from src.database.compression import default_codec
+
+    monkeypatch.setenv("DB_COMPRESSION", "lz4")
+    with pytest.raises(ValueError):
+        default_codec()
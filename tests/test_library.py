@@ -0,0 +1,79 @@
+"""Tests for opening processed documents from the library."""
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("langchain")
+pytest.importorskip("chromadb")
+
+from langchain.schema import Document
+
+from benchmarks.fakes import HashEmbeddings
+from src.config import Config
+from src.database import crud
+from src.database.init_db import get_session
+from src.database.writer import ConversationWriter
+from src.ingest import index_chunks
+from src.processing.vectorstore import VectorStoreManager
+from src.ui import app
+
+
+def test_library_opens_processed_document_without_embedding(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "doc-sage.db")
+    monkeypatch.setenv("DB_PATH", db_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(Config, "CHAT_WINDOW_TURNS", 2)
+    writer = ConversationWriter(db_path=db_path, enabled=False)
+    monkeypatch.setattr("src.database.writer._writer", writer)
+
+    embeddings = HashEmbeddings(dimension=8)
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=embeddings)
+    texts = [" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(3)]
+
+    db = get_session()
+    try:
+        document_id = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf").id
+        other_id = crud.create_document(db, "b.pdf", "/data/b.pdf", "pdf").id
+        crud.update_document_status(db, document_id, "completed")
+    finally:
+        db.close()
+    chunks = [Document(page_content=t, metadata={"source": "/data/a.pdf", "page": i}) for i, t in enumerate(texts)]
+    vectorstore = index_chunks(document_id, chunks, manager).vectorstore
+
+    start = datetime(2024, 1, 1)
+    for i, about in enumerate([document_id, other_id, document_id, document_id, other_id]):
+        writer.submit("s1", f"q{i}", f"a{i}", document_id=about, created_at=start + timedelta(minutes=i))
+
+    assert [d["id"] for d in app.load_library()] == [document_id]
+
+    embedded_before = embeddings.texts_embedded
+    qa_manager = app.open_document(document_id, "s1", vectorstore)
+
+    assert embeddings.texts_embedded == embedded_before
+    assert qa_manager.search_filter == {"document_id": document_id}
+    # The latest turns about this document, not the other one's
+    assert app.document_history("s1", document_id) == [
+        {"user": "q2", "assistant": "a2"},
+        {"user": "q3", "assistant": "a3"},
+    ]
+
+
+def test_previous_version_lookup_and_file_hash(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    stored = tmp_path / "a.pdf"
+    stored.write_bytes(b"%PDF-1.4 contract")
+
+    assert app.find_previous_version("a.pdf") is None
+    db = get_session()
+    try:
+        document_id = crud.create_document(db, "a.pdf", str(stored), "pdf").id
+        crud.update_document_status(db, document_id, "completed")
+    finally:
+        db.close()
+
+    assert app.find_previous_version("a.pdf") == {"id": document_id, "version": 1}
+    assert app.document_file_hash(document_id) == hashlib.sha256(b"%PDF-1.4 contract").hexdigest()
+    stored.unlink()
+    assert app.document_file_hash(document_id) is None
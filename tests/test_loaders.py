@@ -0,0 +1,29 @@
+"""Tests for the document loaders."""
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from src.loaders.text_store import ExtractedTextStore, file_hash
+
+
+def test_text_store_round_trip(tmp_path):
+    store = ExtractedTextStore(str(tmp_path / "store"))
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    key = file_hash(str(pdf))
+    pages = [
+        Document(page_content="一ページ目", metadata={"source": "old/a.pdf", "page": 0}),
+        Document(page_content="second page", metadata={"source": "old/a.pdf", "page": 1}),
+    ]
+
+    assert store.get(key) is None
+    store.put(key, pages)
+
+    loaded = store.get(key, source=str(pdf))
+    assert store.contains(key)
+    assert [p.page_content for p in loaded] == ["一ページ目", "second page"]
+    assert loaded[1].metadata == {"source": str(pdf), "page": 1}
+    assert store.delete(key)
+    assert not store.contains(key)
@@ -0,0 +1,151 @@
+"""Tests for metrics, usage accounting and profiling."""
+import time
+
+import pytest
+
+from src.observability import metrics
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.registry.reset()
+    metrics.configure(True)
+    yield metrics.registry
+    metrics.configure(False)
+    metrics.registry.reset()
+
+
+def test_timer_is_noop_when_disabled():
+    metrics.registry.reset()
+    metrics.configure(False)
+
+    with metrics.timer("pdf_load"):
+        pass
+
+    assert metrics.registry.render() == "\n"
+
+
+def test_timer_records_histogram_and_errors(enabled_metrics):
+    with metrics.timer("pdf_load"):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.timer("split"):
+            raise KeyError("boom")
+
+    text = enabled_metrics.render()
+
+    assert "# TYPE doc_sage_stage_duration_seconds histogram" in text
+    assert 'doc_sage_stage_duration_seconds_bucket{stage="pdf_load",le="+Inf"} 1' in text
+    assert 'doc_sage_stage_duration_seconds_count{stage="split"} 1' in text
+    assert 'doc_sage_stage_total{stage="split",status="error"} 1' in text
+
+
+def test_timed_decorator(enabled_metrics):
+    @metrics.timed("db_write")
+    def write(value):
+        return value * 2
+
+    assert write(21) == 42
+    assert 'doc_sage_stage_total{stage="db_write",status="ok"} 1' in enabled_metrics.render()
+
+
+def test_histogram_buckets_are_cumulative(enabled_metrics):
+    for seconds in (0.003, 0.2, 7.0):
+        metrics.observe_stage("embed", seconds)
+
+    text = enabled_metrics.render()
+
+    assert 'doc_sage_stage_duration_seconds_bucket{stage="embed",le="0.005"} 1' in text
+    assert 'doc_sage_stage_duration_seconds_bucket{stage="embed",le="0.25"} 2' in text
+    assert 'doc_sage_stage_duration_seconds_bucket{stage="embed",le="10"} 3' in text
+    assert 'doc_sage_stage_duration_seconds_sum{stage="embed"} 7.203000' in text
+
+
+def test_usage_is_aggregated_per_scope_and_persisted(tmp_path):
+    from src.database import crud
+    from src.database.init_db import get_session
+    from src.observability import accounting
+
+    db_path = str(tmp_path / "usage.db")
+    accounting.accumulator.drain()
+
+    with accounting.usage_scope(document_id=1, flush_on_exit=False):
+        accounting.record(accounting.EMBEDDING, "text-embedding-3-small", input_tokens=120, latency_ms=40.0)
+        accounting.record(accounting.EMBEDDING, "text-embedding-3-small", calls=0, cache_hits=5)
+        with accounting.usage_scope(session_id="s1", flush_on_exit=False):
+            accounting.record(accounting.CHAT, "gpt-3.5-turbo", input_tokens=300, output_tokens=50, latency_ms=900.0)
+
+    assert accounting.flush(db_path) == 2
+    # A second flush of new usage adds to the existing rows
+    with accounting.usage_scope(document_id=1, session_id="s1", flush_on_exit=False):
+        accounting.record(accounting.CHAT, "gpt-3.5-turbo", input_tokens=100, output_tokens=10, latency_ms=300.0)
+    accounting.flush(db_path)
+
+    db = get_session(db_path)
+    try:
+        totals = crud.get_usage_totals(db, document_id=1)
+        assert totals["embedding/text-embedding-3-small"]["calls"] == 1
+        assert totals["embedding/text-embedding-3-small"]["cache_hits"] == 5
+        assert totals["chat/gpt-3.5-turbo"]["input_tokens"] == 400
+        assert totals["chat/gpt-3.5-turbo"]["avg_latency_ms"] == 600.0
+
+        stats = crud.get_usage_stats(db, session_id="s1", kind=accounting.CHAT)
+        assert len(stats) == 1
+        assert stats[0].calls == 2
+        assert crud.get_usage_stats(db, session_id="other") == []
+    finally:
+        db.close()
+
+
+def test_profile_is_disabled_by_default(monkeypatch, tmp_path):
+    from src.observability import profiling
+
+    monkeypatch.delenv("PROFILE_ENABLED", raising=False)
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+
+    with profiling.profile("qa", "session-1") as outputs:
+        pass
+
+    assert outputs is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_writes_tagged_outputs(monkeypatch, tmp_path):
+    from src.observability import profiling
+
+    monkeypatch.setenv("PROFILE_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_MODES", "cprofile,tracemalloc,sampling")
+    monkeypatch.setenv("PROFILE_SAMPLING_INTERVAL_MS", "5")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+
+    with profiling.profile("ingest", "document-7") as outputs:
+        with profiling.profile("qa", "nested") as nested:
+            time.sleep(0.05)
+
+    assert nested is None
+    suffixes = sorted(p.name.split("-")[-1].split(".", 1)[1] for p in outputs)
+    assert suffixes == ["collapsed", "prof", "tracemalloc.txt", "txt"]
+    assert all(p.name.startswith("ingest-document-7-") and p.exists() for p in outputs)
+
+
+def test_profile_ignores_unknown_modes(monkeypatch, tmp_path):
+    from src.observability import profiling
+
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_MODES", "perf")
+    # Not even read while profiling is off
+    monkeypatch.setenv("PROFILE_RATE", "often")
+    with profiling.profile("qa", "session-1") as outputs:
+        pass
+    assert outputs is None
+
+    monkeypatch.setenv("PROFILE_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_RATE", "1.0")
+    with profiling.profile("qa", "session-1") as outputs:
+        pass
+    assert outputs is None
+
+    monkeypatch.setenv("PROFILE_MODES", "perf,cprofile")
+    with profiling.profile("qa", "session-1") as outputs:
+        pass
+    assert [p.suffix for p in outputs] == [".prof", ".txt"]
@@ -0,0 +1,76 @@
+"""Tests for the local OpenAI-compatible stand-in server."""
+import base64
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from benchmarks.openai_stub import LatencyModel, OpenAIStubServer, StubConfig, hash_vector
+
+
+@pytest.fixture
+def stub():
+    server = OpenAIStubServer(StubConfig(dimension=8)).start()
+    yield server
+    server.stop()
+
+
+def post(server, path, payload):
+    request = urllib.request.Request(
+        server.base_url + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.read().decode("utf-8")
+
+
+def test_embeddings_are_deterministic(stub):
+    payload = {"model": "text-embedding-3-small", "input": ["alpha", "beta"]}
+    first = json.loads(post(stub, "/embeddings", payload))
+    second = json.loads(post(stub, "/embeddings", payload))
+
+    assert first == second
+    assert [d["index"] for d in first["data"]] == [0, 1]
+    assert np.allclose(first["data"][0]["embedding"], hash_vector("alpha", 8))
+
+    encoded = json.loads(post(stub, "/embeddings", {**payload, "encoding_format": "base64"}))
+    decoded = np.frombuffer(base64.b64decode(encoded["data"][1]["embedding"]), dtype="<f4")
+    assert np.allclose(decoded, hash_vector("beta", 8))
+
+
+def test_chat_completion_and_stream(stub):
+    payload = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "要約して"}]}
+    answer = json.loads(post(stub, "/chat/completions", payload))["choices"][0]["message"]["content"]
+    assert "要約して" in answer
+
+    events = [
+        line[len("data: "):]
+        for line in post(stub, "/chat/completions", {**payload, "stream": True}).splitlines()
+        if line.startswith("data: ")
+    ]
+    assert events[-1] == "[DONE]"
+    streamed = "".join(
+        json.loads(event)["choices"][0]["delta"].get("content", "") for event in events[:-1]
+    )
+    assert streamed == answer
+
+
+def test_injected_rate_limit():
+    server = OpenAIStubServer(StubConfig(dimension=8, rate_limit_rate=1.0)).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server, "/embeddings", {"input": "alpha"})
+        assert error.value.code == 429
+        assert error.value.headers["Retry-After"] == "1"
+    finally:
+        server.stop()
+
+
+def test_latency_model():
+    assert LatencyModel("fixed:50").sample() == 0.05
+    assert all(0.02 <= LatencyModel("uniform:20:80").sample() <= 0.08 for _ in range(100))
+    with pytest.raises(ValueError):
+        LatencyModel("pareto:1")
@@ -0,0 +1,146 @@
+"""Tests for the processing modules."""
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from src.processing.dedup import (
+    ChunkDeduplicator,
+    fingerprint,
+    hamming_distance,
+    simhash,
+)
+
+BOILERPLATE = "Confidential - Do not distribute. Copyright 2024 Example Corp. All rights reserved. " * 3
+JAPANESE = "本資料は社外秘です。無断転載を禁じます。株式会社サンプル。" * 5
+
+
+def chunk(text: str, page: int, source: str = "a.pdf") -> Document:
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_simhash_is_close_for_near_duplicates():
+    assert hamming_distance(simhash(BOILERPLATE), simhash(BOILERPLATE + " Page 2")) <= 3
+    assert hamming_distance(simhash(JAPANESE), simhash(JAPANESE.replace("。", "．", 1))) <= 3
+    assert hamming_distance(simhash(BOILERPLATE), simhash(JAPANESE)) > 3
+
+
+def test_deduplicate_within_document():
+    deduplicator = ChunkDeduplicator()
+    chunks = [
+        chunk(BOILERPLATE, 0),
+        chunk(BOILERPLATE + " Page 2", 1),
+        chunk(JAPANESE, 2),
+        chunk(BOILERPLATE, 3),
+    ]
+
+    kept = deduplicator.deduplicate(chunks)
+
+    assert [c.metadata["page"] for c in kept] == [0, 2]
+    assert deduplicator.stats.exact_duplicates == 1
+    assert deduplicator.stats.near_duplicates == 1
+    assert deduplicator.stats.embedding_calls_saved == 2
+    assert '"page": 3' in kept[0].metadata["duplicate_sources"]
+
+
+def test_deduplicate_against_corpus():
+    stored = [("vector-1", fingerprint(BOILERPLATE))]
+    deduplicator = ChunkDeduplicator(corpus_lookup=lambda fingerprints: stored)
+
+    chunks = [chunk(BOILERPLATE, 0, "b.pdf"), chunk(JAPANESE, 1, "b.pdf")]
+    kept = deduplicator.deduplicate(chunks)
+
+    # The duplicate belongs to b.pdf: it is not embedded but kept for a copied vector
+    assert kept == [chunks[1]]
+    assert deduplicator.corpus_matches == {"vector-1": [chunks[0]]}
+    assert "content_hash" in chunks[0].metadata
+    assert deduplicator.stats.embedding_calls_saved == 1
+    assert deduplicator.stats.index_bytes_saved() == 0
+
+
+def test_token_splitter_offsets_and_sizes():
+    from src.processing.text_splitter import ApproxTokenTextSplitter
+
+    splitter = ApproxTokenTextSplitter(chunk_size=100, chunk_overlap=20)
+    text = "これは日本語のテスト文章です。ベクトル検索の性能を評価します。\n" * 30
+    page = Document(page_content=text, metadata={"page": 3})
+
+    chunks = splitter.split_documents([page])
+
+    assert len(chunks) > 1
+    for c in chunks:
+        assert text[c.metadata["start_index"]:c.metadata["end_index"]] == c.page_content
+        assert splitter.count_tokens(c.page_content) <= 100
+        assert c.metadata["page"] == 3
+    # Consecutive chunks overlap
+    assert chunks[1].metadata["start_index"] < chunks[0].metadata["end_index"]
+
+
+def test_token_splitter_counts_japanese_higher_than_english():
+    from src.processing.text_splitter import ApproxTokenTextSplitter
+
+    splitter = ApproxTokenTextSplitter()
+
+    assert splitter.count_tokens("日本語") == 3
+    assert splitter.count_tokens("abcd") == 1
+
+
+def test_records_without_metadata_keep_the_batch_metadata(tmp_path):
+    pytest.importorskip("chromadb")
+    from benchmarks.fakes import HashEmbeddings
+    from src.processing.vectorstore import VectorStoreManager
+
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=HashEmbeddings(dimension=8))
+    documents = [
+        Document(page_content="first", metadata={"document_id": 1, "page": 0}),
+        Document(page_content="second", metadata={}),
+        Document(page_content="third", metadata={"document_id": 1, "page": 2}),
+    ]
+    vectorstore = manager.upsert_documents(documents, ["a", "b", "c"])
+
+    stored = vectorstore._collection.get(ids=["a", "b", "c"], include=["metadatas"])
+    metadatas = dict(zip(stored["ids"], stored["metadatas"]))
+    assert metadatas["a"] == {"document_id": 1, "page": 0}
+    assert not metadatas["b"]
+    assert metadatas["c"] == {"document_id": 1, "page": 2}
+
+
+def test_snapshot_round_trip_and_mismatch_checks(tmp_path):
+    pytest.importorskip("chromadb")
+    from benchmarks.fakes import HashEmbeddings
+    from src.processing.vectorstore import VectorStoreManager
+
+    source = VectorStoreManager(str(tmp_path / "source"), embeddings=HashEmbeddings(dimension=8))
+    documents = [
+        Document(page_content=f"chunk {i} " + JAPANESE, metadata={"document_id": 1 + i % 2, "page": i})
+        for i in range(6)
+    ]
+    ids = [f"v{i}" for i in range(6)]
+    source.upsert_documents(documents, ids)
+    manifest = source.export_snapshot(str(tmp_path / "snapshot"))
+    assert (manifest["count"], manifest["dimension"], manifest["embedding_model"]) == (6, 8, "hash-embedding")
+
+    target_embeddings = HashEmbeddings(dimension=8)
+    target = VectorStoreManager(str(tmp_path / "target"), embeddings=target_embeddings)
+    assert target.import_snapshot(str(tmp_path / "snapshot")) == 6
+    assert target_embeddings.texts_embedded == 0
+
+    stored = target.get_vectorstore()._collection.get(ids=ids, include=["metadatas"])
+    assert dict(zip(stored["ids"], stored["metadatas"])) == {
+        vector_id: document.metadata for vector_id, document in zip(ids, documents)
+    }
+    found = target.similarity_search(documents[3].page_content, k=1, filter={"document_id": 2})
+    assert found[0].metadata["page"] == 3
+
+    other_model = VectorStoreManager(str(tmp_path / "other"), embeddings=HashEmbeddings(dimension=8, model="other"))
+    with pytest.raises(ValueError, match="embedded with"):
+        other_model.import_snapshot(str(tmp_path / "snapshot"))
+    wide = VectorStoreManager(str(tmp_path / "wide"), embeddings=HashEmbeddings(dimension=16))
+    # An empty collection only reveals the embeddings' dimension when probed
+    with pytest.raises(ValueError, match="dimension"):
+        wide.import_snapshot(str(tmp_path / "snapshot"), verify_embeddings=True)
+    wide.upsert_documents([Document(page_content="wide", metadata={"document_id": 9})], ["w"])
+    with pytest.raises(ValueError, match="stores 16 dimensions"):
+        wide.import_snapshot(str(tmp_path / "snapshot"))
+    assert wide.embeddings.texts_embedded == 2
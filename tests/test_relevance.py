@@ -0,0 +1,38 @@
+"""Tests for local re-scoring of retrieval candidates."""
+from src.processing.relevance import lexical_overlap, query_terms, select_relevant
+
+
+def test_query_terms_cover_english_and_japanese():
+    terms = query_terms("Return policy の返品期限")
+
+    assert {"return", "policy", "返品", "期限"} <= terms
+    assert lexical_overlap(query_terms("返品期限"), "返品の期限は30日です") == 2 / 3
+
+
+def test_clear_winner_sends_one_chunk():
+    candidates = [
+        ("配送料は全国一律です", 0.55),
+        ("返品期限は購入後30日です", 0.80),
+        ("会員登録の方法", 0.40),
+    ]
+
+    kept = select_relevant("返品期限は？", candidates, min_k=1, max_k=4, threshold=0.3, max_gap=0.1)
+
+    assert [chunk.index for chunk in kept] == [1]
+
+
+def test_close_scores_are_kept_up_to_max_k():
+    candidates = [(f"refund policy section {i}", 0.8 - 0.02 * i) for i in range(6)]
+
+    kept = select_relevant("refund policy", candidates, min_k=1, max_k=3)
+
+    assert [chunk.index for chunk in kept] == [0, 1, 2]
+
+
+def test_min_k_is_kept_even_below_threshold():
+    candidates = [("unrelated", 0.1), ("also unrelated", 0.05)]
+
+    kept = select_relevant("refund policy", candidates, min_k=1, threshold=0.5)
+
+    assert len(kept) == 1
+    assert select_relevant("refund policy", [], min_k=1) == []
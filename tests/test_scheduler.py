@@ -0,0 +1,157 @@
+"""Tests for API admission control."""
+import json
+import threading
+import time
+
+import pytest
+
+from benchmarks.openai_stub import OpenAIStubServer, StubConfig
+from src import scheduler
+from src.clients import ClientRegistry
+from src.scheduler import AdmissionScheduler, AdmissionTimeoutError
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_interactive_calls_overtake_queued_bulk_calls():
+    # 600 requests per minute: after the burst, one call every 0.1s
+    limiter = AdmissionScheduler("chat", requests_per_minute=600, timeout=5)
+    for _ in range(600):
+        limiter.acquire()
+
+    admitted = []
+
+    def call(name, level):
+        limiter.acquire(level=level)
+        admitted.append(name)
+
+    threads = []
+    for name, level in [("bulk-1", scheduler.BULK), ("bulk-2", scheduler.BULK), ("question", scheduler.INTERACTIVE)]:
+        thread = threading.Thread(target=call, args=(name, level))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.queued() == len(threads))
+    for thread in threads:
+        thread.join()
+
+    assert admitted == ["question", "bulk-1", "bulk-2"]
+    assert limiter.stats()["waited"] == 3
+
+
+def test_token_limit_and_queue_timeout():
+    limiter = AdmissionScheduler("embedding", tokens_per_minute=6000, timeout=0.2)
+    limiter.acquire(tokens=6000)
+
+    positions = []
+    with scheduler.on_queue(lambda position, wait: positions.append((position, wait))):
+        # 6000 more tokens need a full minute
+        with pytest.raises(AdmissionTimeoutError):
+            limiter.acquire(tokens=6000)
+
+    assert positions[0][0] == 1 and positions[0][1] > 50
+    assert limiter.queued() == 0
+    # Small calls still fit the tokens refilled meanwhile
+    limiter.acquire(tokens=10)
+
+
+def test_rate_limited_responses_pause_admission():
+    server = OpenAIStubServer(StubConfig(dimension=8, rate_limit_rate=1.0)).start()
+    chat = AdmissionScheduler("chat", timeout=0.2)
+    registry = ClientRegistry(schedulers={"chat": chat, "embedding": AdmissionScheduler("embedding")})
+    try:
+        response = registry.http_client().post(
+            server.base_url + "/chat/completions",
+            content=json.dumps({"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "hi"}]})
+        )
+        assert response.status_code == 429
+        assert chat.stats()["rate_limited"] == 1
+        assert chat.delay() > 0.5
+
+        # Everyone backs off for Retry-After instead of retrying into the limit
+        with pytest.raises(AdmissionTimeoutError):
+            registry.http_client().post(server.base_url + "/chat/completions", content=b"{}")
+        # Other endpoints are not scheduled
+        assert registry.http_client().get(server.base_url + "/models").status_code == 200
+    finally:
+        registry.close()
+        server.stop()
+
+
+class RecordingScheduler(AdmissionScheduler):
+    """Records the priority class each call was admitted under."""
+
+    def __init__(self, name):
+        super().__init__(name, timeout=0.2)
+        self.levels = []
+
+    def acquire(self, tokens=0, level=None, timeout=None):
+        self.levels.append(scheduler._priority.get() if level is None else level)
+        return super().acquire(tokens, level, timeout)
+
+
+def test_async_requests_are_admitted_and_back_off():
+    import asyncio
+
+    server = OpenAIStubServer(StubConfig(dimension=8)).start()
+    chat = RecordingScheduler("chat")
+    registry = ClientRegistry(schedulers={"chat": chat, "embedding": AdmissionScheduler("embedding")})
+    body = json.dumps({"model": "gpt-3.5-turbo", "stream": True, "messages": [{"role": "user", "content": "hi"}]})
+
+    async def run():
+        client = registry.async_http_client()
+        with scheduler.priority(scheduler.BULK):
+            async with client.stream("POST", server.base_url + "/chat/completions", content=body) as response:
+                chunks = [line async for line in response.aiter_lines() if line]
+        assert chunks[-1] == "data: [DONE]"
+
+        server.config.rate_limit_rate = 1.0
+        assert (await client.post(server.base_url + "/chat/completions", content=body)).status_code == 429
+        with pytest.raises(AdmissionTimeoutError):
+            await client.post(server.base_url + "/chat/completions", content=body)
+        await registry.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop()
+
+    assert chat.levels == [scheduler.BULK, scheduler.INTERACTIVE, scheduler.INTERACTIVE]
+    assert chat.stats()["admitted"] == 2
+    assert chat.stats()["rate_limited"] == 1
+
+
+def test_streamed_answers_go_through_the_scheduler(monkeypatch):
+    pytest.importorskip("langchain_openai")
+    import asyncio
+
+    from src import clients
+    from src.chains.qa_chain import create_chat_model, streaming_chat_model
+
+    server = OpenAIStubServer(StubConfig(dimension=8)).start()
+    chat = RecordingScheduler("chat")
+    registry = ClientRegistry(schedulers={"chat": chat, "embedding": AdmissionScheduler("embedding")})
+    monkeypatch.setattr(clients, "_registry", registry)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+
+    async def run():
+        llm = streaming_chat_model(create_chat_model())
+        with scheduler.priority(scheduler.INGEST):
+            tokens = [chunk.content async for chunk in llm.astream("hi")]
+        await registry.aclose()
+        return tokens
+
+    try:
+        tokens = asyncio.run(run())
+    finally:
+        registry.close()
+        server.stop()
+
+    assert len(tokens) > 1
+    assert chat.stats()["admitted"] == 1
+    assert chat.levels == [scheduler.INGEST]
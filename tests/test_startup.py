@@ -0,0 +1,70 @@
+"""Startup cost regression tests."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_import_time import parse_importtime, measure_import, summarize
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must only be imported when a document is ingested or queried
+HEAVY_PACKAGES = ["langchain", "langchain_openai", "langchain_community", "chromadb", "sqlalchemy"]
+
+# Generous budget for importing the config module in a fresh interpreter
+CONFIG_IMPORT_BUDGET_MS = float(os.getenv("CONFIG_IMPORT_BUDGET_MS", "150"))
+
+
+def imported_packages(module: str) -> set:
+    """Import a module in a fresh interpreter and return the loaded top-level packages."""
+    code = (
+        f"import sys, {module}; "
+        "print('\\n'.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return set(result.stdout.split())
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:        80 |        200 | encodings\n"
+        "import time:      3000 |       5000 |     src.config\n"
+    )
+    records = parse_importtime(output)
+
+    assert [r.module for r in records] == ["_io", "encodings", "src.config"]
+    assert records[2].self_us == 3000
+    assert records[2].cumulative_us == 5000
+    assert records[2].depth == 2
+    assert summarize("src.config", records)["total_ms"] == 5.0
+
+
+def test_config_import_is_light():
+    loaded = imported_packages("src.config")
+
+    assert "dotenv" not in loaded
+    assert not loaded.intersection(HEAVY_PACKAGES)
+
+
+def test_config_import_within_budget():
+    summary = summarize("src.config", measure_import("src.config"))
+
+    assert summary["total_ms"] < CONFIG_IMPORT_BUDGET_MS
+
+
+def test_app_import_defers_heavy_packages():
+    pytest.importorskip("streamlit")
+
+    loaded = imported_packages("src.ui.app")
+
+    assert not loaded.intersection(HEAVY_PACKAGES)
@@ -0,0 +1,48 @@
+"""Tests for content-addressed upload storage."""
+import hashlib
+import io
+
+import pytest
+
+from src.loaders.upload_store import UploadTooLargeError, store_upload
+
+
+def test_upload_is_content_addressed_and_hashed_in_one_pass(tmp_path):
+    data = b"%PDF-1.4 " + b"x" * 5000
+
+    stored = store_upload(io.BytesIO(data), directory=str(tmp_path), max_bytes=0, count_pages=False, block_size=1024)
+
+    assert stored.content_hash == hashlib.sha256(data).hexdigest()
+    assert stored.size == len(data)
+    assert stored.path == str(tmp_path / stored.content_hash[:2] / f"{stored.content_hash}.pdf")
+    assert stored.created
+
+    again = store_upload(io.BytesIO(data), directory=str(tmp_path), max_bytes=0, count_pages=False)
+    assert again.path == stored.path
+    assert not again.created
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [f"{stored.content_hash}.pdf"]
+
+
+def test_upload_over_size_limit_is_rejected(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        store_upload(io.BytesIO(b"x" * 3000), directory=str(tmp_path), max_bytes=2048, block_size=1024)
+
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
+
+
+def test_page_count_is_handed_off_and_limited(tmp_path):
+    pytest.importorskip("pypdf")
+    from benchmarks.pdfgen import generate_pdf
+
+    pdf = tmp_path / "doc.pdf"
+    generate_pdf(pdf, pages=3)
+    store = tmp_path / "store"
+
+    with open(pdf, "rb") as f:
+        stored = store_upload(f, directory=str(store), max_bytes=0, max_pages=0)
+    assert stored.page_count == 3
+
+    with open(pdf, "rb") as f, pytest.raises(UploadTooLargeError):
+        store_upload(f, directory=str(store), max_bytes=0, max_pages=2)
+    with pytest.raises(ValueError):
+        store_upload(io.BytesIO(b"not a pdf"), directory=str(store), max_bytes=0)
@@ -0,0 +1,342 @@
+"""Tests for document versions and chunk-diff re-indexing."""
+import hashlib
+import sqlite3
+
+import pytest
+
+from src.database import crud
+from src.database.init_db import get_session
+
+
+def test_new_version_links_to_parent(tmp_path):
+    db = get_session(str(tmp_path / "versions.db"))
+    try:
+        first = crud.create_document(db, "spec.pdf", "/data/a.pdf", "pdf", status="completed")
+        second = crud.create_document(db, "spec.pdf", "/data/b.pdf", "pdf", parent_id=first.id)
+
+        assert (first.version, second.version, second.parent_id) == (1, 2, first.id)
+        # Only completed documents count as the current version
+        assert crud.get_latest_version(db, "spec.pdf").id == first.id
+        crud.update_document_status(db, second.id, "completed")
+        assert crud.get_latest_version(db, "spec.pdf").id == second.id
+
+        with pytest.raises(ValueError):
+            crud.create_document(db, "spec.pdf", "/data/c.pdf", "pdf", parent_id=999)
+    finally:
+        db.close()
+
+
+def test_replace_document_chunks(tmp_path):
+    db = get_session(str(tmp_path / "chunks.db"))
+    try:
+        document = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf")
+        rows = [
+            {"chunk_index": i, "content": f"text {i}", "content_hash": f"h{i}", "vector_id": f"v{i}"}
+            for i in range(3)
+        ]
+        crud.replace_document_chunks(db, document.id, rows)
+        crud.replace_document_chunks(db, document.id, rows[1:])
+
+        stored = crud.get_document_chunks(db, document.id)
+        assert [(c.chunk_index, c.vector_id) for c in stored] == [(1, "v1"), (2, "v2")]
+
+        crud.append_document_chunks(db, document.id, [{"content": "moved", "content_hash": "h9", "vector_id": "v9"}])
+        stored = crud.get_document_chunks(db, document.id)
+        assert [(c.chunk_index, c.vector_id) for c in stored][-1] == (3, "v9")
+    finally:
+        db.close()
+
+
+def test_missing_columns_are_added_to_existing_tables(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY, filename VARCHAR(255) NOT NULL, "
+        "file_path VARCHAR(512) NOT NULL, file_type VARCHAR(50) NOT NULL, upload_date DATETIME, "
+        "file_size INTEGER, status VARCHAR(50))"
+    )
+    connection.execute(
+        "INSERT INTO documents (filename, file_path, file_type, status) "
+        "VALUES ('old.pdf', '/data/old.pdf', 'pdf', 'completed')"
+    )
+    connection.commit()
+    connection.close()
+
+    db = get_session(str(db_path))
+    try:
+        legacy = crud.get_latest_version(db, "old.pdf")
+        assert legacy.parent_id is None
+        assert crud.create_document(db, "old.pdf", "/data/new.pdf", "pdf", parent_id=legacy.id).version == 2
+    finally:
+        db.close()
+
+
+def test_new_version_embeds_only_changed_chunks(tmp_path, monkeypatch):
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from src.ingest import index_chunks, index_new_version
+    from src.processing.vectorstore import VectorStoreManager
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    embeddings = HashEmbeddings(dimension=8)
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=embeddings)
+    pages = [" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(5)]
+
+    def chunks(texts, source):
+        return [Document(page_content=t, metadata={"source": source, "page": i}) for i, t in enumerate(texts)]
+
+    db = get_session()
+    try:
+        v1 = crud.create_document(db, "spec.pdf", "/data/v1.pdf", "pdf").id
+        v2 = crud.create_document(db, "spec.pdf", "/data/v2.pdf", "pdf", parent_id=v1).id
+    finally:
+        db.close()
+
+    vectorstore = index_chunks(v1, chunks(pages[:4], "/data/v1.pdf"), manager).vectorstore
+    embedded_before = embeddings.texts_embedded
+
+    revised = [pages[0], pages[1], pages[4], pages[3]]
+    result = index_new_version(v2, v1, chunks(revised, "/data/v2.pdf"), manager, vectorstore)
+
+    assert embeddings.texts_embedded - embedded_before == 1
+    assert (result.chunks, result.chunks_reused, result.chunks_removed) == (4, 3, 1)
+    assert result.reuse_ratio == 0.75
+
+    stored = vectorstore._collection.get(include=["metadatas"])
+    assert len(stored["ids"]) == 4
+    assert {m["document_id"] for m in stored["metadatas"]} == {v2}
+    assert {m["source"] for m in stored["metadatas"]} == {"/data/v2.pdf"}
+
+    db = get_session()
+    try:
+        assert [c.chunk_index for c in crud.get_document_chunks(db, v2)] == [0, 1, 2, 3]
+        assert crud.get_document_chunks(db, v1) == []
+    finally:
+        db.close()
+
+
+def test_chunk_vector_ids_are_deterministic():
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    from src.processing.vectorstore import chunk_vector_id
+
+    first = chunk_vector_id(1, "abc", 0, "def")
+    assert first == chunk_vector_id(1, "abc", 0, "def")
+    assert len(first) == 32
+    # Same file ingested into another Document, another position or text
+    assert first != chunk_vector_id(2, "abc", 0, "def")
+    assert first != chunk_vector_id(1, "abc", 1, "def")
+    assert first != chunk_vector_id(1, "abc", 0, "xyz")
+
+
+def test_interrupted_ingest_resumes_without_duplicates(tmp_path, monkeypatch):
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from src.ingest import index_chunks
+    from src.processing.vectorstore import VectorStoreManager
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    monkeypatch.setenv("VECTOR_WRITE_BATCH_SIZE", "2")
+    embeddings = HashEmbeddings(dimension=8)
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=embeddings)
+    texts = [" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(5)]
+
+    def chunks():
+        return [Document(page_content=t, metadata={"source": "/data/a.pdf", "page": i}) for i, t in enumerate(texts)]
+
+    db = get_session()
+    try:
+        document_id = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf").id
+    finally:
+        db.close()
+
+    # A crashed run wrote the first batch only
+    vectorstore = manager.get_vectorstore()
+    partial = chunks()[:2]
+    ids = manager.chunk_ids(document_id, "hash-a", chunks())
+    for chunk in partial:
+        chunk.metadata["document_id"] = document_id
+    manager.upsert_documents(partial, ids[:2], vectorstore)
+    embedded_before = embeddings.texts_embedded
+
+    result = index_chunks(document_id, chunks(), manager, vectorstore, document_hash="hash-a")
+
+    assert result.chunks == 5
+    assert embeddings.texts_embedded - embedded_before == 3
+    stored = vectorstore._collection.get()
+    assert sorted(stored["ids"]) == sorted(ids)
+
+    # Running it again writes nothing new
+    index_chunks(document_id, chunks(), manager, vectorstore, document_hash="hash-a")
+    assert vectorstore._collection.count() == 5
+
+    db = get_session()
+    try:
+        assert [c.vector_id for c in crud.get_document_chunks(db, document_id)] == ids
+    finally:
+        db.close()
+
+
+def test_chunk_shared_with_another_document_is_retrievable_in_both(tmp_path, monkeypatch):
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from src.ingest import index_chunks
+    from src.processing.vectorstore import VectorStoreManager
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    embeddings = HashEmbeddings(dimension=8)
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=embeddings)
+    a, b, shared = (" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(3))
+
+    def chunks(texts, source):
+        return [Document(page_content=t, metadata={"source": source, "page": i}) for i, t in enumerate(texts)]
+
+    db = get_session()
+    try:
+        doc_a = crud.create_document(db, "a.pdf", "/data/a.pdf", "pdf").id
+        doc_b = crud.create_document(db, "b.pdf", "/data/b.pdf", "pdf").id
+    finally:
+        db.close()
+
+    vectorstore = index_chunks(doc_a, chunks([a, shared], "/data/a.pdf"), manager, document_hash="a").vectorstore
+    embedded_before = embeddings.texts_embedded
+    result = index_chunks(doc_b, chunks([b, shared], "/data/b.pdf"), manager, vectorstore, document_hash="b")
+
+    # The shared chunk reuses A's embedding but is stored for B as well
+    assert embeddings.texts_embedded - embedded_before == 1
+    assert result.chunks == 2
+    stored_b = vectorstore._collection.get(where={"document_id": doc_b})
+    assert shared in stored_b["documents"]
+    found = manager.similarity_search(shared, k=1, vectorstore=vectorstore, filter={"document_id": doc_b})
+    assert found[0].page_content == shared
+
+    db = get_session()
+    try:
+        assert [c.content for c in crud.get_document_chunks(db, doc_b)] == [b, shared]
+    finally:
+        db.close()
+
+
+def test_replaced_version_hands_shared_chunks_to_other_documents(tmp_path, monkeypatch):
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    import json
+
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from src.ingest import index_chunks, index_new_version
+    from src.processing.vectorstore import VectorStoreManager
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=HashEmbeddings(dimension=8))
+    a, shared, b, revised = (" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(4))
+
+    def chunks(texts, source):
+        return [Document(page_content=t, metadata={"source": source, "page": i}) for i, t in enumerate(texts)]
+
+    db = get_session()
+    try:
+        v1 = crud.create_document(db, "a.pdf", "/data/a1.pdf", "pdf").id
+        v2 = crud.create_document(db, "a.pdf", "/data/a2.pdf", "pdf", parent_id=v1).id
+        other = crud.create_document(db, "b.pdf", "/data/b.pdf", "pdf").id
+    finally:
+        db.close()
+
+    vectorstore = index_chunks(v1, chunks([a, shared], "/data/a1.pdf"), manager, document_hash="a1").vectorstore
+    collection = vectorstore._collection
+
+    # Indexed before corpus duplicates got their own vectors: b.pdf's copy of
+    # the shared chunk only exists as a duplicate source of a1.pdf's vector
+    db = get_session()
+    try:
+        shared_id = crud.get_document_chunks(db, v1)[1].vector_id
+        crud.replace_document_chunks(db, other, [
+            {"chunk_index": 0, "content": b, "content_hash": "b", "vector_id": "other-0"}
+        ])
+    finally:
+        db.close()
+    metadata = collection.get(ids=[shared_id], include=["metadatas"])["metadatas"][0]
+    metadata["duplicate_sources"] = json.dumps([{"source": "/data/b.pdf", "page": 1}])
+    collection.update(ids=[shared_id], metadatas=[metadata])
+
+    index_new_version(v2, v1, chunks([a, revised], "/data/a2.pdf"), manager, vectorstore, document_hash="a2")
+
+    moved = collection.get(ids=[shared_id], include=["metadatas"])["metadatas"][0]
+    assert (moved["document_id"], moved["source"], moved["page"]) == (other, "/data/b.pdf", 1)
+    assert "duplicate_sources" not in moved
+    found = manager.similarity_search(shared, k=1, vectorstore=vectorstore, filter={"document_id": other})
+    assert found[0].page_content == shared
+    assert not collection.get(where={"document_id": v1}, include=[])["ids"]
+
+    db = get_session()
+    try:
+        rows = crud.get_document_chunks(db, other)
+        assert [(c.chunk_index, c.content, c.vector_id) for c in rows] == [(0, b, "other-0"), (1, shared, shared_id)]
+    finally:
+        db.close()
+
+
+def test_reindex_uses_the_ingestion_path(tmp_path, monkeypatch):
+    pytest.importorskip("langchain")
+    pytest.importorskip("chromadb")
+    from langchain.schema import Document
+
+    from benchmarks.fakes import HashEmbeddings
+    from src.ingest import index_chunks
+    from src.loaders.text_store import ExtractedTextStore, file_hash
+    from src.processing.dedup import CONTENT_HASH_KEY
+    from src.processing.vectorstore import VectorStoreManager
+    from src.reindex import reindex_documents
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "doc-sage.db"))
+    embeddings = HashEmbeddings(dimension=8)
+    manager = VectorStoreManager(str(tmp_path / "chroma"), embeddings=embeddings)
+    store = ExtractedTextStore(str(tmp_path / "text"))
+    a, b, shared = (" ".join(hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)) for i in range(3))
+
+    paths = {}
+    for name in ("a", "b"):
+        paths[name] = tmp_path / f"{name}.pdf"
+        paths[name].write_bytes(name.encode())
+    db = get_session()
+    try:
+        doc_a = crud.create_document(db, "a.pdf", str(paths["a"]), "pdf", status="completed").id
+        doc_b = crud.create_document(db, "b.pdf", str(paths["b"]), "pdf", status="completed").id
+    finally:
+        db.close()
+
+    pages_a = [Document(page_content=t, metadata={"source": str(paths["a"]), "page": i}) for i, t in enumerate([a, shared])]
+    vectorstore = index_chunks(doc_a, pages_a, manager, document_hash=file_hash(str(paths["a"]))).vectorstore
+    pages_b = [Document(page_content=t, metadata={"source": str(paths["b"]), "page": i}) for i, t in enumerate([b, shared])]
+    store.put(file_hash(str(paths["b"])), pages_b)
+    embedded_before = embeddings.texts_embedded
+
+    summary = reindex_documents(
+        document_ids=[doc_b], chunk_size=1000, chunk_overlap=0,
+        text_store=store, vectorstore_manager=manager
+    )
+
+    # The chunk shared with A reuses A's embedding, as on ingestion
+    assert summary["documents"] == 1 and summary["failed"] == []
+    assert embeddings.texts_embedded - embedded_before == 1
+    stored_b = vectorstore._collection.get(where={"document_id": doc_b})
+    assert sorted(stored_b["documents"]) == sorted([b, shared])
+    assert all(CONTENT_HASH_KEY in metadata for metadata in stored_b["metadatas"])
+
+    db = get_session()
+    try:
+        chunks = crud.get_document_chunks(db, doc_b)
+        assert [c.content for c in chunks] == [b, shared]
+        assert {c.vector_id for c in chunks} == set(stored_b["ids"])
+    finally:
+        db.close()